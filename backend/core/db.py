@@ -0,0 +1,19 @@
+from django.db import IntegrityError, transaction
+
+
+def upsert(model, key, changes, create_values):
+    """
+    Applies `changes` (which may use F() and other expressions) to the row
+    matching `key`, or inserts `key` plus `create_values` when there is no
+    such row. `key` must be covered by a unique constraint: if a concurrent
+    writer inserts the row first, the insert fails and the update is
+    applied to that row instead.
+    """
+    if model.objects.filter(**key).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **create_values)
+    except IntegrityError:
+        # Another writer created the row first
+        model.objects.filter(**key).update(**changes)
@@ -52,6 +52,15 @@ INSTALLED_APPS = [
 
 PAYSTACK_SECRET_KEY = config('PAYSTACK_SECRET_KEY')
 PAYSTACK_PUBLIC_KEY = config('PAYSTACK_PUBLIC_KEY')
+PAYSTACK_CONNECT_TIMEOUT = config('PAYSTACK_CONNECT_TIMEOUT', default=5, cast=float)
+PAYSTACK_READ_TIMEOUT = config('PAYSTACK_READ_TIMEOUT', default=30, cast=float)
+PAYSTACK_MAX_RETRIES = config('PAYSTACK_MAX_RETRIES', default=3, cast=int)
+PAYSTACK_RETRY_BACKOFF = config('PAYSTACK_RETRY_BACKOFF', default=0.3, cast=float)
+PAYSTACK_POOL_MAXSIZE = config('PAYSTACK_POOL_MAXSIZE', default=20, cast=int)
+PAYSTACK_WEBHOOK_ASYNC = config('PAYSTACK_WEBHOOK_ASYNC', default=False, cast=bool)
+PAYSTACK_WEBHOOK_BATCH_SIZE = config('PAYSTACK_WEBHOOK_BATCH_SIZE', default=200, cast=int)
+# Failed inbox events are retried on each sweep until this many attempts
+PAYSTACK_WEBHOOK_MAX_ATTEMPTS = config('PAYSTACK_WEBHOOK_MAX_ATTEMPTS', default=5, cast=int)
 
 
 MIDDLEWARE = [
@@ -75,15 +84,77 @@ CELERY_ACCEPT_CONTENT = config('CELERY_ACCEPT_CONTENT', default='application/jso
 CELERY_TASK_SERIALIZER = config('CELERY_TASK_SERIALIZER', default='json')
 CELERY_RESULT_SERIALIZER = config('CELERY_RESULT_SERIALIZER', default='json')
 
+MONTHLY_BILLING_CHUNK_SIZE = config('MONTHLY_BILLING_CHUNK_SIZE', default=500, cast=int)
+MONTHLY_CHARGE_CONCURRENCY = config('MONTHLY_CHARGE_CONCURRENCY', default=8, cast=int)
+MONTHLY_CHARGE_RATE_PER_SEC = config('MONTHLY_CHARGE_RATE_PER_SEC', default=10, cast=float)
+MONTHLY_REMINDER_DAYS_BEFORE = config('MONTHLY_REMINDER_DAYS_BEFORE', default=3, cast=int)
+BALANCE_CHECK_CHUNK_SIZE = config('BALANCE_CHECK_CHUNK_SIZE', default=2000, cast=int)
+AUDIT_EXPORT_ROOT = config('AUDIT_EXPORT_ROOT', default=str(BASE_DIR / 'audit_exports'))
+AUDIT_EXPORT_CHUNK_SIZE = config('AUDIT_EXPORT_CHUNK_SIZE', default=50000, cast=int)
+# Payments can change status after insert; months this far back are rewritten on each export
+AUDIT_EXPORT_REWRITE_DAYS = config('AUDIT_EXPORT_REWRITE_DAYS', default=35, cast=int)
+# Ids can commit out of order; months this far back are rewritten for every table
+AUDIT_EXPORT_OVERLAP_HOURS = config('AUDIT_EXPORT_OVERLAP_HOURS', default=24, cast=int)
+NISAB_STALE_AFTER_HOURS = config('NISAB_STALE_AFTER_HOURS', default=12, cast=float)
+NISAB_REFRESH_LOCK_SECONDS = config('NISAB_REFRESH_LOCK_SECONDS', default=120, cast=int)
+NISAB_FETCH_DEADLINE_SECONDS = config('NISAB_FETCH_DEADLINE_SECONDS', default=12, cast=float)
+NISAB_SOURCE_TIMEOUT_SECONDS = config('NISAB_SOURCE_TIMEOUT_SECONDS', default=10, cast=float)
+ZAKAH_PRICE_SOURCES = config('ZAKAH_PRICE_SOURCES', default='live')  # 'live' or 'fixture'
+ZAKAH_PRICE_CACHE_SECONDS = config('ZAKAH_PRICE_CACHE_SECONDS', default=300, cast=int)
+ZAKAH_BREAKER_FAILURES = config('ZAKAH_BREAKER_FAILURES', default=3, cast=int)
+ZAKAH_BREAKER_RESET_SECONDS = config('ZAKAH_BREAKER_RESET_SECONDS', default=300, cast=int)
+ZAKAH_CACHE_MAX_AGE = config('ZAKAH_CACHE_MAX_AGE', default=300, cast=int)
+ZAKAH_CACHE_STALE_WHILE_REVALIDATE = config('ZAKAH_CACHE_STALE_WHILE_REVALIDATE', default=3600, cast=int)
+HIJRI_SOURCE = config('HIJRI_SOURCE', default='local')  # 'local' or 'dailynisab'
+HIJRI_NIGERIA_OFFSET_DAYS = config('HIJRI_NIGERIA_OFFSET_DAYS', default=0, cast=int)
+ZAKAH_CALCULATOR_MAX_BATCH = config('ZAKAH_CALCULATOR_MAX_BATCH', default=200000, cast=int)
+CROP_NISAB_KG = config('CROP_NISAB_KG', default=653, cast=float)  # 5 awsuq
+HAWL_NISAB_STANDARD = config('HAWL_NISAB_STANDARD', default='lower')  # 'lower', 'gold' or 'silver'
+
+# Shared cache for cross-process locks; set CACHE_URL (e.g. redis://localhost:6379/1)
+# in production so every web and worker process sees the same keys.
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+
 CELERY_BEAT_SCHEDULE = {
     'process_monthly_donations': {
         'task': 'donations.tasks.process_monthly_donations',
         'schedule': crontab(hour=1, minute=0),
     },
+    'send_monthly_donation_reminders': {
+        'task': 'donations.tasks.send_monthly_donation_reminders',
+        'schedule': crontab(hour=9, minute=0),
+    },
+    'process_paystack_webhook_events': {
+        'task': 'payments.tasks.process_paystack_webhook_events',
+        'schedule': crontab(minute='*'),
+    },
     'send_daily_inflow_outflow_to_google_sheet': {
         'task': 'donations.tasks.send_daily_inflow_outflow_to_google_sheet',
         'schedule': crontab(hour=23, minute=30),
     },
+    'snapshot_money_box_balances': {
+        'task': 'users.tasks.snapshot_money_box_balances',
+        'schedule': crontab(hour=0, minute=30),
+    },
+    'process_completed_hawls': {
+        'task': 'users.tasks.process_completed_hawls',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    'check_money_box_balances': {
+        'task': 'donations.tasks.check_money_box_balances_task',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'refresh_nisab_rates': {
+        'task': 'zakah.tasks.refresh_nisab_rates',
+        'schedule': crontab(hour='*/6', minute=15),
+    },
     'fetch_additional_zakah_references': {
         'task': 'zakah.tasks.fetch_additional_references_task',
         'schedule': crontab(hour=2, minute=0),
@@ -121,6 +192,10 @@ LOGGING = {
             'handlers': ['console'],
             'level': 'INFO',
         },
+        'users': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
     },
 }
 
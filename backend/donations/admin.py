@@ -1,5 +1,14 @@
 from django.contrib import admin
-from .models import DonationType, UserDonationSettings, Transaction, WaqfInterest
+from .models import (
+    DonationType,
+    UserDonationSettings,
+    Transaction,
+    WaqfInterest,
+    MonthlyDonationPeriod,
+    RecurringDonationSchedule,
+    BalanceCheckRun,
+    BalanceMismatch,
+)
 
 @admin.register(WaqfInterest)
 class WaqfInterestAdmin(admin.ModelAdmin):
@@ -27,3 +36,24 @@ class TransactionAdmin(admin.ModelAdmin):
     list_display = ('user', 'transaction_type', 'amount', 'created_at', 'description')
     list_filter = ('transaction_type', 'created_at')
     search_fields = ('user__username', 'description')
+
+@admin.register(MonthlyDonationPeriod)
+class MonthlyDonationPeriodAdmin(admin.ModelAdmin):
+    list_display = ('user', 'period', 'amount', 'created_at')
+    list_filter = ('period',)
+    search_fields = ('user__username', 'user__email')
+
+@admin.register(RecurringDonationSchedule)
+class RecurringDonationScheduleAdmin(admin.ModelAdmin):
+    list_display = ('donation_settings', 'next_due_at', 'last_charged_at', 'last_reminded_for')
+    search_fields = ('donation_settings__user__username', 'donation_settings__user__email')
+
+@admin.register(BalanceCheckRun)
+class BalanceCheckRunAdmin(admin.ModelAdmin):
+    list_display = ('started_at', 'finished_at', 'users_checked', 'mismatches', 'elapsed_seconds')
+
+@admin.register(BalanceMismatch)
+class BalanceMismatchAdmin(admin.ModelAdmin):
+    list_display = ('run', 'user', 'stored_balance', 'expected_balance', 'difference')
+    list_filter = ('run',)
+    search_fields = ('user__username', 'user__email')
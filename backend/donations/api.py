@@ -1,42 +1,52 @@
-from datetime import timedelta
+from datetime import date, datetime, time, timedelta
 import csv
 
 from django.conf import settings
 from django.db.models import Sum
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
+from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
-from .models import Transaction
+from .models import DailyTransactionRollup, Transaction
 
 
-def _inflow_outflow_by_date(user, days):
-    now = timezone.now()
-    start_date = now - timedelta(days=days)
-    tx = Transaction.objects.filter(created_at__gte=start_date)
+def _scope_to_region(qs, user, prefix=""):
+    """Restricts `qs` to the admin's region; `prefix` reaches the region fields."""
     if user.admin_level == "STATE":
-        tx = tx.filter(user__state=user.state)
+        qs = qs.filter(**{f"{prefix}state": user.state})
     elif user.admin_level == "LOCAL_GOVT":
-        tx = tx.filter(user__state=user.state, user__local_govt=user.local_govt)
+        qs = qs.filter(**{
+            f"{prefix}state": user.state,
+            f"{prefix}local_govt": user.local_govt,
+        })
     elif user.admin_level == "WARD":
-        tx = tx.filter(
-            user__state=user.state,
-            user__local_govt=user.local_govt,
-            user__ward=user.ward,
-        )
+        qs = qs.filter(**{
+            f"{prefix}state": user.state,
+            f"{prefix}local_govt": user.local_govt,
+            f"{prefix}ward": user.ward,
+        })
+    return qs
+
+
+def _inflow_outflow_by_date(user, days):
+    start_date = timezone.localdate() - timedelta(days=days)
+    rollups = _scope_to_region(
+        DailyTransactionRollup.objects.filter(date__gte=start_date), user
+    )
     by_date = (
-        tx.values("created_at__date", "transaction_type")
-        .order_by("created_at__date")
-        .annotate(total=Sum("amount"))
+        rollups.values("date", "transaction_type")
+        .order_by("date")
+        .annotate(total=Sum("total"))
     )
     labels = []
     inflow = []
     outflow = []
     seen = set()
     for row in by_date:
-        date = row["created_at__date"].isoformat()
+        date = row["date"].isoformat()
         if date not in seen:
             labels.append(date)
             seen.add(date)
@@ -44,7 +54,7 @@ def _inflow_outflow_by_date(user, days):
             outflow.append(0)
     index_by_date = {d: i for i, d in enumerate(labels)}
     for row in by_date:
-        date = row["created_at__date"].isoformat()
+        date = row["date"].isoformat()
         idx = index_by_date[date]
         amount = float(row["total"])
         t_type = row["transaction_type"]
@@ -80,3 +90,129 @@ def inflow_outflow_csv(request):
     for idx, date in enumerate(labels):
         writer.writerow([date, inflow[idx], outflow[idx]])
     return response
+
+
+class _Echo:
+    """File-like object whose write() hands the row straight back to the generator."""
+
+    def write(self, value):
+        return value
+
+
+# Leading characters that make Excel/Sheets evaluate a cell as a formula
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_safe(value):
+    """Prefixes member-entered text that would run as a formula with a quote."""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _export_rows(user, start, end, detail):
+    writer = csv.writer(_Echo())
+    app_name = getattr(settings, "APP_NAME", "Ishrakaat")
+    yield writer.writerow([app_name, f"{start.isoformat()} to {end.isoformat()}"])
+
+    if not detail:
+        rollups = _scope_to_region(
+            DailyTransactionRollup.objects.filter(date__gte=start, date__lte=end),
+            user,
+        )
+        rows = (
+            rollups.values("date", "transaction_type")
+            .order_by("date", "transaction_type")
+            .annotate(total=Sum("total"), count=Sum("count"))
+            .values_list("date", "transaction_type", "count", "total")
+        )
+        yield writer.writerow(["Date", "Type", "Count", "Total"])
+        for day, t_type, count, total in rows.iterator(chunk_size=2000):
+            yield writer.writerow([day.isoformat(), t_type, count, total])
+        return
+
+    tz = timezone.get_current_timezone()
+    transactions = _scope_to_region(
+        Transaction.objects.filter(
+            created_at__gte=timezone.make_aware(datetime.combine(start, time.min), tz),
+            created_at__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+        ),
+        user,
+        prefix="user__",
+    )
+    rows = transactions.order_by("created_at", "id").values_list(
+        "id",
+        "created_at",
+        "user__username",
+        "user__registration_number",
+        "user__state",
+        "user__local_govt",
+        "user__ward",
+        "transaction_type",
+        "amount",
+        "description",
+    )
+    yield writer.writerow([
+        "ID", "Date", "Username", "Registration number", "State",
+        "Local govt", "Ward", "Type", "Amount", "Description",
+    ])
+    # iterator() streams from a server-side cursor, so memory stays flat
+    for row in rows.iterator(chunk_size=2000):
+        row = [_csv_safe(value) for value in row]
+        row[1] = timezone.localtime(row[1]).isoformat()
+        yield writer.writerow(row)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def transactions_export_csv(request):
+    """
+    Streams a CSV report for any date range (`start`/`end`, YYYY-MM-DD,
+    inclusive) within the admin's region: daily totals by type, or one row
+    per transaction with `detail=true`.
+    """
+    try:
+        end = date.fromisoformat(request.query_params.get("end") or timezone.localdate().isoformat())
+        start = date.fromisoformat(request.query_params.get("start") or (end - timedelta(days=30)).isoformat())
+    except ValueError:
+        return Response(
+            {"detail": "Dates must be in YYYY-MM-DD format."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if start > end:
+        return Response(
+            {"detail": "start must be on or before end."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    detail = request.query_params.get("detail") == "true"
+
+    app_name = getattr(settings, "APP_NAME", "Ishrakaat")
+    kind = "transactions" if detail else "daily_report"
+    filename = f"{app_name.lower().replace(' ', '_')}_{kind}_{start.isoformat()}_{end.isoformat()}.csv"
+    response = StreamingHttpResponse(
+        _export_rows(request.user, start, end, detail), content_type="text/csv"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def audit_export(request):
+    """
+    Queues an incremental Parquet export of the ledger tables to
+    AUDIT_EXPORT_ROOT (`full=true` rebuilds it). National admins only.
+    """
+    if not (request.user.is_superuser or request.user.admin_level == "NATIONAL"):
+        return Response(
+            {"detail": "Only national admins can export the ledger."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    from .tasks import export_audit_tables_task
+
+    full = str(request.data.get("full", "")).lower() == "true"
+    result = export_audit_tables_task.delay(full=full)
+    return Response(
+        {"task_id": result.id, "full": full},
+        status=status.HTTP_202_ACCEPTED,
+    )
@@ -0,0 +1,208 @@
+import json
+import logging
+import shutil
+import time
+from datetime import timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from payments.models import Payment
+from .models import Transaction, WelfareFamilyNeedDonation
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "_manifest.json"
+
+# name -> (model, exported columns, partition column besides the month)
+EXPORT_TABLES = {
+    "transactions": (
+        Transaction,
+        ["id", "user_id", "amount", "transaction_type", "donation_type_id",
+         "description", "paid_from_money_box", "created_at"],
+        "transaction_type",
+    ),
+    "payments": (
+        Payment,
+        ["id", "user_id", "amount", "reference", "status", "purpose",
+         "created_at", "verified_at"],
+        "purpose",
+    ),
+    "welfare_family_donations": (
+        WelfareFamilyNeedDonation,
+        ["id", "user_id", "transaction_id", "purpose", "amount", "created_at"],
+        "purpose",
+    ),
+}
+
+# Tables whose rows change after insert (a Payment goes PENDING -> SUCCESS/FAILED
+# and gains verified_at). Their recent months are rewritten on every run.
+MUTABLE_TABLES = ("payments",)
+
+
+def _arrow_type(pa, field):
+    internal = field.get_internal_type()
+    if internal == "DecimalField":
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if internal == "DateTimeField":
+        return pa.timestamp("us", tz="UTC")
+    if internal == "BooleanField":
+        return pa.bool_()
+    if internal in ("AutoField", "BigAutoField", "ForeignKey", "IntegerField",
+                    "BigIntegerField", "PositiveIntegerField"):
+        return pa.int64()
+    return pa.string()
+
+
+def _schema(pa, model, columns):
+    fields = []
+    for column in columns:
+        field = model._meta.get_field(column[:-3] if column.endswith("_id") and column != "id" else column)
+        fields.append(pa.field(column, _arrow_type(pa, field)))
+    return pa.schema(fields)
+
+
+def _load_manifest(root):
+    path = root / MANIFEST_NAME
+    if path.exists():
+        return json.loads(path.read_text())
+    return {}
+
+
+def _save_manifest(root, manifest):
+    path = root / MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    tmp.replace(path)
+
+
+def _rewrite_cutoff(window):
+    """Start (UTC) of the month `window` ago; months from here on are re-exported."""
+    moment = timezone.now().astimezone(dt_timezone.utc) - window
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def export_table(root, name, last_id=0, chunk_size=50000, compression="zstd", rewrite_since=None):
+    """
+    Writes rows of table `name` with id > `last_id` to hive-style partitions
+    `<root>/<name>/month=YYYY-MM/<column>=<value>/part-<first id>.parquet`,
+    where the first id is that of the file's first row. Rows are read in id
+    order from a server-side cursor and written chunk by chunk, so memory is
+    bounded by `chunk_size`. Existing files are never rewritten, except that
+    with `rewrite_since` (an aware datetime at a month start) every month
+    from then on is deleted and exported again in full, picking up rows
+    changed since they were last written. Returns (rows written, highest id).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    model, columns, partition_column = EXPORT_TABLES[name]
+    schema = _schema(pa, model, columns)
+    month_index = columns.index("created_at")
+    partition_index = columns.index(partition_column)
+    condition = Q(id__gt=last_id)
+    if rewrite_since is not None:
+        first_month = f"month={rewrite_since:%Y-%m}"
+        table_dir = root / name
+        if table_dir.exists():
+            for month_dir in table_dir.iterdir():
+                if month_dir.is_dir() and month_dir.name >= first_month:
+                    shutil.rmtree(month_dir)
+        condition |= Q(created_at__gte=rewrite_since)
+    rows = (
+        model.objects.filter(condition)
+        .order_by("id")
+        .values_list(*columns)
+        .iterator(chunk_size=chunk_size)
+    )
+
+    writers = {}
+    written = 0
+    max_id = last_id
+    buffers = {}
+
+    def flush():
+        for key, buffered in buffers.items():
+            if not buffered:
+                continue
+            writer = writers.get(key)
+            if writer is None:
+                month, value = key
+                directory = root / name / f"month={month}" / f"{partition_column}={value}"
+                directory.mkdir(parents=True, exist_ok=True)
+                writer = pq.ParquetWriter(
+                    directory / f"part-{buffered[0][0]:012d}.parquet",
+                    schema,
+                    compression=compression,
+                )
+                writers[key] = writer
+            table = pa.Table.from_pylist(
+                [dict(zip(columns, row)) for row in buffered], schema=schema
+            )
+            writer.write_table(table)
+        buffers.clear()
+
+    try:
+        pending = 0
+        for row in rows:
+            created_at = row[month_index]
+            key = (created_at.strftime("%Y-%m"), row[partition_index] or "none")
+            buffers.setdefault(key, []).append(row)
+            pending += 1
+            written += 1
+            max_id = max(max_id, row[0])
+            if pending >= chunk_size:
+                flush()
+                pending = 0
+        flush()
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return written, max_id
+
+
+def export_audit_tables(root=None, full=False, chunk_size=None):
+    """
+    Exports Transaction, Payment and WelfareFamilyNeedDonation to Parquet
+    under `root`. A manifest keeps the last exported id per table, so later
+    runs only append new files for older months. Ids are not committed in
+    order, so a row can become visible after a higher id was exported; each
+    run therefore also rewrites the months from AUDIT_EXPORT_OVERLAP_HOURS
+    ago onwards (AUDIT_EXPORT_REWRITE_DAYS for tables in MUTABLE_TABLES).
+    Rewritten months are deleted and read back in one pass, so every id is
+    written once. `full=True` deletes the exported tables and starts again
+    from id 0.
+    """
+    root = Path(root or getattr(settings, "AUDIT_EXPORT_ROOT", settings.BASE_DIR / "audit_exports"))
+    if chunk_size is None:
+        chunk_size = getattr(settings, "AUDIT_EXPORT_CHUNK_SIZE", 50000)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = {} if full else _load_manifest(root)
+    overlap_since = _rewrite_cutoff(timedelta(hours=getattr(settings, "AUDIT_EXPORT_OVERLAP_HOURS", 24)))
+    mutable_since = _rewrite_cutoff(timedelta(days=getattr(settings, "AUDIT_EXPORT_REWRITE_DAYS", 35)))
+    summary = {}
+    for name in EXPORT_TABLES:
+        started = time.monotonic()
+        if full:
+            # Drop files from earlier runs so no row is exported twice
+            shutil.rmtree(root / name, ignore_errors=True)
+        last_id = manifest.get(name, {}).get("last_id", 0)
+        rows, max_id = export_table(
+            root, name, last_id=last_id, chunk_size=chunk_size,
+            rewrite_since=(mutable_since if name in MUTABLE_TABLES else overlap_since) if last_id else None,
+        )
+        manifest[name] = {
+            "last_id": max_id,
+            "exported_at": timezone.now().isoformat(),
+        }
+        summary[name] = {
+            "rows": rows,
+            "last_id": max_id,
+            "seconds": round(time.monotonic() - started, 3),
+        }
+        # Persist progress per table so a failure later does not re-export it
+        _save_manifest(root, manifest)
+    logger.info("Audit export to %s: %s", root, summary)
+    return summary
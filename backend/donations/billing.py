@@ -0,0 +1,96 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class RateLimiter:
+    """
+    Spaces calls evenly so that, across all worker threads, no more than
+    `rate_per_sec` calls are started per second. A rate of 0 disables it.
+    """
+
+    def __init__(self, rate_per_sec):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec and rate_per_sec > 0 else 0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def keyset_chunks(queryset, size):
+    """
+    Yields lists of up to `size` rows ordered by primary key, fetching each
+    chunk with `pk > last_pk` so rows can be updated while iterating.
+    """
+    last_pk = None
+    queryset = queryset.order_by('pk')
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(page[:size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def month_bounds(moment):
+    """Returns the [start, end) datetimes of the calendar month containing `moment`."""
+    start = moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+    return start, end
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[int(round(pct / 100.0 * (len(ordered) - 1)))]
+
+
+def charge_cards(paystack, jobs, max_workers=None, limiter=None):
+    """
+    Runs `paystack.charge_authorization` for every job concurrently on a
+    bounded thread pool. Each job is a dict with `email`, `amount_kobo`,
+    `authorization_code` and `reference`; the call fills in `ok`, `result`
+    and `latency`. Worker threads only talk to Paystack, never to the DB.
+    """
+    if not jobs:
+        return jobs
+    if max_workers is None:
+        max_workers = getattr(settings, "MONTHLY_CHARGE_CONCURRENCY", 8)
+    if limiter is None:
+        limiter = RateLimiter(getattr(settings, "MONTHLY_CHARGE_RATE_PER_SEC", 10))
+
+    def run(job):
+        limiter.wait()
+        started = time.monotonic()
+        try:
+            status_bool, result = paystack.charge_authorization(
+                email=job["email"],
+                amount=job["amount_kobo"],
+                authorization_code=job["authorization_code"],
+                reference=job["reference"],
+            )
+        except Exception as exc:
+            status_bool, result = False, str(exc)
+        job["latency"] = time.monotonic() - started
+        job["ok"] = bool(status_bool) and isinstance(result, dict) and result.get("status") == "success"
+        job["result"] = result
+        return job
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as pool:
+        return list(pool.map(run, jobs))
@@ -0,0 +1,66 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from donations.models import DailyTransactionRollup, Transaction
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily transaction rollup table from the Transaction ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=date.fromisoformat,
+            default=None,
+            help='Only rebuild buckets from this date (YYYY-MM-DD) onwards',
+        )
+
+    def handle(self, *args, **options):
+        since = options['since']
+        tx = Transaction.objects.annotate(day=TruncDate('created_at'))
+        rollups = DailyTransactionRollup.objects.all()
+        if since:
+            tx = tx.filter(day__gte=since)
+            rollups = rollups.filter(date__gte=since)
+
+        with transaction.atomic():
+            self._lock_ledger()
+            rows = (
+                tx.values('day', 'transaction_type', 'user__state', 'user__local_govt', 'user__ward')
+                .order_by()
+                .annotate(total=Sum('amount'), count=Count('id'))
+            )
+            buckets = [
+                DailyTransactionRollup(
+                    date=row['day'],
+                    transaction_type=row['transaction_type'],
+                    state=row['user__state'],
+                    local_govt=row['user__local_govt'],
+                    ward=row['user__ward'],
+                    total=row['total'],
+                    count=row['count'],
+                )
+                for row in rows.iterator(chunk_size=5000)
+            ]
+            deleted, _ = rollups.delete()
+            DailyTransactionRollup.objects.bulk_create(buckets, batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(buckets)} rollup rows (replaced {deleted})."
+        ))
+
+    def _lock_ledger(self):
+        """
+        Blocks transaction writes until the rebuild commits, so nothing can
+        land in the ledger (and bump a rollup) between the aggregate and the
+        swap. Reads carry on; SQLite already serialises writers.
+        """
+        if connection.vendor != 'postgresql':
+            return
+        table = connection.ops.quote_name(Transaction._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {table} IN SHARE MODE')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from donations.reconciliation import check_money_box_balances
+
+
+class Command(BaseCommand):
+    help = 'Compares every Money Box balance with the balance implied by its transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        run = check_money_box_balances(chunk_size=options['chunk_size'])
+        self.stdout.write(
+            f"Checked {run.users_checked} users in {run.elapsed_seconds}s, "
+            f"{run.mismatches} mismatches (run #{run.pk})"
+        )
+        if run.mismatches:
+            self.stdout.write(self.style.WARNING("Mismatches recorded in BalanceMismatch."))
+        else:
+            self.stdout.write(self.style.SUCCESS("All balances consistent."))
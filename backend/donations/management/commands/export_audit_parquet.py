@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from donations.audit_export import export_audit_tables
+
+
+class Command(BaseCommand):
+    help = 'Appends new Transaction, Payment and welfare donation rows to partitioned Parquet files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None, help='Export directory (defaults to AUDIT_EXPORT_ROOT)')
+        parser.add_argument('--full', action='store_true', help='Delete the exported tables and export every row again')
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            summary = export_audit_tables(
+                root=options['output'],
+                full=options['full'],
+                chunk_size=options['chunk_size'],
+            )
+        except ImportError:
+            raise CommandError('pyarrow is required for the audit export: pip install pyarrow')
+        for name, result in summary.items():
+            self.stdout.write(
+                f"{name}: {result['rows']} rows in {result['seconds']}s (last id {result['last_id']})"
+            )
+        self.stdout.write(self.style.SUCCESS('Audit export complete.'))
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-17 14:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def create_schedules(apps, schema_editor):
+    UserDonationSettings = apps.get_model('donations', 'UserDonationSettings')
+    RecurringDonationSchedule = apps.get_model('donations', 'RecurringDonationSchedule')
+    now = timezone.now()
+    RecurringDonationSchedule.objects.bulk_create(
+        [
+            RecurringDonationSchedule(donation_settings_id=pk, next_due_at=now)
+            for pk in UserDonationSettings.objects.filter(monthly_amount__gt=0).values_list('pk', flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0009_monthlydonationperiod'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringDonationSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_due_at', models.DateTimeField(db_index=True)),
+                ('last_charged_at', models.DateTimeField(blank=True, null=True)),
+                ('last_reminded_for', models.DateTimeField(blank=True, help_text='Due date the last reminder was sent for', null=True)),
+                ('donation_settings', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='schedule', to='donations.userdonationsettings')),
+            ],
+        ),
+        migrations.RunPython(create_schedules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-17 14:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_card_donations(apps, schema_editor):
+    # Card-funded donations were only distinguishable by their description
+    Transaction = apps.get_model('donations', 'Transaction')
+    Transaction.objects.filter(
+        transaction_type='DONATION', description__regex=r'\(.*Card \d{4}\)'
+    ).update(paid_from_money_box=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0010_recurringdonationschedule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('users_checked', models.PositiveIntegerField(default=0)),
+                ('mismatches', models.PositiveIntegerField(default=0)),
+                ('elapsed_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='paid_from_money_box',
+            field=models.BooleanField(default=True, help_text='False when the donation was charged to a card'),
+        ),
+        migrations.CreateModel(
+            name='BalanceMismatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stored_balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('expected_balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('difference', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mismatch_rows', to='donations.balancecheckrun')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_mismatches', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(mark_card_donations, migrations.RunPython.noop),
+    ]
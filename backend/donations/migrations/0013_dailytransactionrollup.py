@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-17 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0012_transaction_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTransactionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('DEPOSIT', 'Deposit to Money Box'), ('DONATION', 'Donation Payment'), ('WITHDRAWAL', 'Withdrawal')], max_length=20)),
+                ('state', models.CharField(blank=True, max_length=100)),
+                ('local_govt', models.CharField(blank=True, max_length=100)),
+                ('ward', models.CharField(blank=True, max_length=100)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['state', 'local_govt', 'ward', 'date'], name='rollup_region_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'transaction_type', 'state', 'local_govt', 'ward'), name='unique_daily_transaction_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0013_dailytransactionrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlydonationperiod',
+            name='claim_token',
+            field=models.CharField(blank=True, help_text='Run of the monthly job that claimed this period before charging', max_length=32),
+        ),
+    ]
@@ -1,5 +1,14 @@
-from django.db import models
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.conf import settings
+from django.utils import timezone
+
+from core.db import upsert
 
 
 class DonationType(models.Model):
@@ -30,11 +39,31 @@ class UserDonationSettings(models.Model):
     monthly_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     auto_deduct_from_box = models.BooleanField(default=True, help_text="Auto-deduct from Money Box")
     auto_charge_card = models.BooleanField(default=False, help_text="Auto-charge saved card if Money Box is insufficient")
-    
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Recurring donors need a schedule so the daily job can find them by due date
+        if self.monthly_amount and self.monthly_amount > 0:
+            RecurringDonationSchedule.objects.get_or_create(
+                donation_settings=self,
+                defaults={"next_due_at": timezone.now()},
+            )
+
     def __str__(self):
         return f"{self.user.username} - {self.monthly_amount}"
 
 
+class RecurringDonationSchedule(models.Model):
+    """When a user's monthly donation is next due; indexed so the daily job reads only due rows."""
+    donation_settings = models.OneToOneField(UserDonationSettings, on_delete=models.CASCADE, related_name='schedule')
+    next_due_at = models.DateTimeField(db_index=True)
+    last_charged_at = models.DateTimeField(null=True, blank=True)
+    last_reminded_for = models.DateTimeField(null=True, blank=True, help_text="Due date the last reminder was sent for")
+
+    def __str__(self):
+        return f"{self.donation_settings.user.username} - due {self.next_due_at:%Y-%m-%d}"
+
+
 class Transaction(models.Model):
     TRANSACTION_TYPES = (
         ('DEPOSIT', 'Deposit to Money Box'),
@@ -47,12 +76,158 @@ class Transaction(models.Model):
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPES)
     donation_type = models.ForeignKey(DonationType, on_delete=models.SET_NULL, null=True, blank=True)
     description = models.CharField(max_length=255)
+    paid_from_money_box = models.BooleanField(default=True, help_text="False when the donation was charged to a card")
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='tx_user_created_idx'),
+            models.Index(fields=['transaction_type', 'created_at'], name='tx_type_created_idx'),
+        ]
+
+    ROLLUP_FIELDS = ('amount', 'transaction_type', 'created_at', 'user_id')
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            previous = None
+            if not adding and self.pk:
+                # Lock the stored row so concurrent edits move it out of its old bucket once
+                previous = Transaction.objects.select_for_update().filter(pk=self.pk).first()
+            super().save(*args, **kwargs)
+            if adding or previous is None:
+                DailyTransactionRollup.record([self])
+            elif any(getattr(previous, f) != getattr(self, f) for f in self.ROLLUP_FIELDS):
+                DailyTransactionRollup.remove([previous])
+                DailyTransactionRollup.record([self])
+
     def __str__(self):
         return f"{self.user.username} - {self.transaction_type} - {self.amount}"
 
 
+class DailyTransactionRollup(models.Model):
+    """
+    Running totals per (local date, transaction type, state, LGA, ward),
+    kept up to date as transactions are written. Reports read this table
+    instead of grouping the raw Transaction ledger.
+    """
+    KEY_FIELDS = ('date', 'transaction_type', 'state', 'local_govt', 'ward')
+
+    date = models.DateField()
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TRANSACTION_TYPES)
+    state = models.CharField(max_length=100, blank=True)
+    local_govt = models.CharField(max_length=100, blank=True)
+    ward = models.CharField(max_length=100, blank=True)
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'transaction_type', 'state', 'local_govt', 'ward'],
+                name='unique_daily_transaction_rollup',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['state', 'local_govt', 'ward', 'date'], name='rollup_region_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.transaction_type} {self.state}/{self.local_govt}/{self.ward}: {self.total}"
+
+    @classmethod
+    def record(cls, transactions):
+        """Adds newly written transactions to their daily buckets."""
+        for key, (total, count) in cls._bucket(transactions).items():
+            cls._increment(dict(zip(cls.KEY_FIELDS, key)), total, count)
+
+    @classmethod
+    def remove(cls, transactions):
+        """Takes edited or deleted transactions back out of their daily buckets."""
+        for key, (total, count) in cls._bucket(transactions).items():
+            key = dict(zip(cls.KEY_FIELDS, key))
+            cls.objects.filter(**key).update(total=F('total') - total, count=F('count') - count)
+            cls.objects.filter(**key, count=0).delete()
+
+    @classmethod
+    def _bucket(cls, transactions):
+        buckets = defaultdict(lambda: [Decimal('0'), 0])
+        for tx in transactions:
+            user = tx.user
+            key = (
+                timezone.localdate(tx.created_at),
+                tx.transaction_type,
+                user.state,
+                user.local_govt,
+                user.ward,
+            )
+            buckets[key][0] += Decimal(str(tx.amount))
+            buckets[key][1] += 1
+        return buckets
+
+    @classmethod
+    def _increment(cls, key, total, count):
+        upsert(
+            cls,
+            key,
+            {'total': F('total') + total, 'count': F('count') + count},
+            {'total': total, 'count': count},
+        )
+
+
+@receiver(post_delete, sender=Transaction)
+def _remove_deleted_transaction_from_rollup(sender, instance, **kwargs):
+    # A signal rather than Transaction.delete() so queryset and cascade deletes are covered too
+    DailyTransactionRollup.remove([instance])
+
+
+class BalanceCheckRun(models.Model):
+    """One run of the Money Box consistency checker."""
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    users_checked = models.PositiveIntegerField(default=0)
+    mismatches = models.PositiveIntegerField(default=0)
+    elapsed_seconds = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"Balance check {self.started_at:%Y-%m-%d %H:%M} - {self.mismatches} mismatches"
+
+
+class BalanceMismatch(models.Model):
+    run = models.ForeignKey(BalanceCheckRun, on_delete=models.CASCADE, related_name='mismatch_rows')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='balance_mismatches')
+    stored_balance = models.DecimalField(max_digits=12, decimal_places=2)
+    expected_balance = models.DecimalField(max_digits=12, decimal_places=2)
+    difference = models.DecimalField(max_digits=12, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.user.username}: stored {self.stored_balance}, expected {self.expected_balance}"
+
+
+class MonthlyDonationPeriod(models.Model):
+    """
+    One row per user per billing month paid by the monthly job. The job
+    inserts the row before charging, so the unique (user, period) pair is
+    the claim that stops overlapping runs charging a user twice.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='monthly_donation_periods')
+    period = models.DateField(db_index=True, help_text="First day of the billing month")
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    claim_token = models.CharField(max_length=32, blank=True, help_text="Run of the monthly job that claimed this period before charging")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'period'], name='unique_monthly_donation_period'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.period:%Y-%m} - {self.amount}"
+
+
 class WelfareFamilyNeedDonation(models.Model):
     PURPOSE_CHOICES = (
         ("FOOD", "Food"),
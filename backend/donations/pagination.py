@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TransactionCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (-created_at, -id). Every page is an index range
+    scan on (user, -created_at), so deep pages cost the same as the first.
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
@@ -0,0 +1,97 @@
+import logging
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import Transaction, BalanceCheckRun, BalanceMismatch
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+ZERO = Decimal("0.00")
+
+
+def _expected_balances(first_id, last_id):
+    """
+    Expected Money Box balance for every user id in [first_id, last_id],
+    computed with a single grouped aggregate. Card-funded donations never
+    touched the Money Box, so they are left out.
+    """
+    rows = (
+        Transaction.objects.filter(
+            user_id__gte=first_id,
+            user_id__lte=last_id,
+            paid_from_money_box=True,
+        )
+        .values("user_id")
+        .annotate(
+            credits=Sum("amount", filter=Q(transaction_type="DEPOSIT")),
+            debits=Sum("amount", filter=Q(transaction_type__in=["DONATION", "WITHDRAWAL"])),
+        )
+    )
+    return {
+        row["user_id"]: (row["credits"] or ZERO) - (row["debits"] or ZERO)
+        for row in rows
+    }
+
+
+def _check_chunk(run, chunk):
+    expected = _expected_balances(chunk[0][0], chunk[-1][0])
+    mismatches = []
+    for user_id, stored in chunk:
+        stored = stored or ZERO
+        balance = expected.get(user_id, ZERO)
+        if stored != balance:
+            mismatches.append(BalanceMismatch(
+                run=run,
+                user_id=user_id,
+                stored_balance=stored,
+                expected_balance=balance,
+                difference=stored - balance,
+            ))
+    if mismatches:
+        BalanceMismatch.objects.bulk_create(mismatches)
+    return len(mismatches)
+
+
+def check_money_box_balances(chunk_size=None):
+    """
+    Streams users in primary-key order through a server-side cursor and
+    compares each stored Money Box balance with the one implied by their
+    transactions, `chunk_size` users per aggregate query. Mismatches are
+    written to BalanceMismatch; returns the BalanceCheckRun.
+    """
+    if chunk_size is None:
+        chunk_size = getattr(settings, "BALANCE_CHECK_CHUNK_SIZE", 2000)
+    started = time.monotonic()
+    run = BalanceCheckRun.objects.create()
+
+    users = (
+        User.objects.order_by("pk")
+        .values_list("pk", "money_box_balance")
+        .iterator(chunk_size=chunk_size)
+    )
+    chunk = []
+    for row in users:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            run.mismatches += _check_chunk(run, chunk)
+            run.users_checked += len(chunk)
+            chunk = []
+    if chunk:
+        run.mismatches += _check_chunk(run, chunk)
+        run.users_checked += len(chunk)
+
+    run.elapsed_seconds = round(time.monotonic() - started, 3)
+    run.finished_at = timezone.now()
+    run.save()
+    rate = run.users_checked / run.elapsed_seconds if run.elapsed_seconds else 0
+    logger.info(
+        "Balance check: %s users, %s mismatches in %ss (%.0f users/s)",
+        run.users_checked, run.mismatches, run.elapsed_seconds, rate,
+    )
+    return run
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.db import transaction
+from users.services import credit_money_box, debit_money_box, InsufficientFunds
 from .models import (
     DonationType,
     UserDonationSettings,
@@ -26,6 +27,11 @@ class TransactionSerializer(serializers.ModelSerializer):
         fields = ['id', 'amount', 'transaction_type', 'donation_type', 'description', 'created_at']
         read_only_fields = ['created_at']
 
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than zero.")
+        return value
+
     def validate(self, attrs):
         user = self.context['request'].user
         amount = attrs.get('amount')
@@ -47,15 +53,21 @@ class TransactionSerializer(serializers.ModelSerializer):
         transaction_type = validated_data["transaction_type"]
 
         with transaction.atomic():
-            trans = Transaction.objects.create(user=user, **validated_data)
-
+            description = validated_data.get("description", "")
             if transaction_type == "DEPOSIT":
-                user.money_box_balance += amount
+                try:
+                    credit_money_box(user, amount, description)
+                except ValueError as exc:
+                    raise serializers.ValidationError(str(exc))
             elif transaction_type in ["DONATION", "WITHDRAWAL"]:
-                user.money_box_balance -= amount
-
-            user.save()
-            return trans
+                try:
+                    debit_money_box(user, amount, description)
+                except InsufficientFunds:
+                    raise serializers.ValidationError("Insufficient funds in Money Box.")
+                except ValueError as exc:
+                    raise serializers.ValidationError(str(exc))
+
+            return Transaction.objects.create(user=user, **validated_data)
 
 
 class WelfareFamilyNeedDonationSerializer(serializers.ModelSerializer):
@@ -1,117 +1,317 @@
 from celery import shared_task
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import F, Max, Sum
+from django.core.mail import send_mail
 from django.conf import settings
-from .models import UserDonationSettings, Transaction, DonationType
+from .models import (
+    UserDonationSettings,
+    Transaction,
+    DonationType,
+    MonthlyDonationPeriod,
+    RecurringDonationSchedule,
+    DailyTransactionRollup,
+)
+from .reconciliation import check_money_box_balances
+from .audit_export import export_audit_tables
+from .billing import keyset_chunks, charge_cards, percentile, month_bounds
 from payments.models import SavedCard
 from payments.paystack import Paystack
+from users.services import debit_money_box, InsufficientFunds
 from decimal import Decimal
 import logging
+import time
 import uuid
 import requests
 
+logger = logging.getLogger(__name__)
+
 @shared_task
 def process_monthly_donations():
     """
     Task to process monthly donations.
     Should be scheduled to run daily (e.g. at 1 AM).
-    It checks if the user has already donated for the current month.
+    Only users whose RecurringDonationSchedule is due are selected; once a
+    user is paid up for the month their schedule moves to the start of the
+    next month, while failed users stay due and are retried the next day.
+
+    Due users are handled in chunks. Each user's MonthlyDonationPeriod row
+    is inserted first as a claim and only users this run claimed are
+    charged, so overlapping runs never charge anyone twice; claims of users
+    whose charge fails are removed again. Money Box deductions are
+    conditional balance updates, card charges for the chunk are fanned out
+    concurrently (bounded pool + global rate limit) and the resulting
+    transactions are written back in bulk. Returns a run summary.
     """
-    now = timezone.now()
-    current_month = now.month
-    current_year = now.year
-    
-    # Get all settings with enabled auto-deduct and amount > 0
-    settings_list = UserDonationSettings.objects.filter(monthly_amount__gt=0).select_related('user')
-    
-    for settings in settings_list:
-        user = settings.user
-        amount = settings.monthly_amount
-        
-        # Check if already donated this month
-        has_donated = Transaction.objects.filter(
-            user=user,
+    now = timezone.localtime()
+    period_start, period_end = month_bounds(now)
+    period_label = now.strftime('%B %Y')
+    chunk_size = getattr(settings, 'MONTHLY_BILLING_CHUNK_SIZE', 500)
+    started = time.monotonic()
+    paystack = Paystack()
+    claim_token = uuid.uuid4().hex
+
+    summary = {
+        "eligible": 0,
+        "skipped": 0,
+        "box_deducted": 0,
+        "card_charged": 0,
+        "failed": 0,
+    }
+    latencies = []
+
+    # Who has already paid this month: users the job recorded a period for,
+    # plus the largest manual donation per user in the month (one range query).
+    paid_user_ids = set(
+        MonthlyDonationPeriod.objects.filter(period=period_start.date())
+        .values_list('user_id', flat=True)
+    )
+    donated_this_month = dict(
+        Transaction.objects.filter(
             transaction_type='DONATION',
-            created_at__month=current_month,
-            created_at__year=current_year,
-            amount__gte=amount 
-        ).exists()
-        
-        if has_donated:
-            continue
-            
-        # Try to deduct
-        success = False
-        
-        # 1. Try Money Box
-        if settings.auto_deduct_from_box:
-            if user.money_box_balance >= amount:
-                with transaction.atomic():
-                    user.money_box_balance -= amount
-                    user.save()
-                    Transaction.objects.create(
-                        user=user,
-                        amount=amount,
-                        transaction_type='DONATION',
-                        description=f"Monthly Donation (Auto-deducted from Money Box) - {now.strftime('%B %Y')}"
-                    )
-                    success = True
-                    logger.info(f"User {user.username}: Auto-deducted {amount} from Money Box")
-        
-        # 2. Try Saved Card (if Money Box failed or disabled)
-        if not success and settings.auto_charge_card:
-            # Get latest active card
-            card = SavedCard.objects.filter(user=user, is_active=True).order_by('-created_at').first()
-            if card:
-                paystack = Paystack()
-                amount_kobo = int(float(amount) * 100)
-                ref = f"auto_{uuid.uuid4().hex}"
-                
-                status_bool, result = paystack.charge_authorization(
-                    email=user.email,
-                    amount=amount_kobo,
-                    authorization_code=card.authorization_code,
-                    reference=ref
+            created_at__gte=period_start,
+            created_at__lt=period_end,
+        )
+        .values('user_id')
+        .annotate(max_amount=Max('amount'))
+        .values_list('user_id', 'max_amount')
+    )
+
+    # Only settings with amount > 0 whose schedule is due (indexed next_due_at)
+    settings_list = UserDonationSettings.objects.filter(
+        monthly_amount__gt=0,
+        schedule__next_due_at__lte=now,
+    ).select_related('user')
+
+    for chunk in keyset_chunks(settings_list, chunk_size):
+        summary["eligible"] += len(chunk)
+        paid_settings_ids = []
+        charged_settings_ids = []
+        box_candidates = []
+        card_candidates = []
+
+        for user_settings in chunk:
+            user = user_settings.user
+            amount = user_settings.monthly_amount
+
+            # Check if already donated this month
+            if user.pk in paid_user_ids or donated_this_month.get(user.pk, 0) >= amount:
+                summary["skipped"] += 1
+                paid_settings_ids.append(user_settings.pk)
+            elif user_settings.auto_deduct_from_box and user.money_box_balance >= amount:
+                box_candidates.append(user_settings)
+            elif user_settings.auto_charge_card:
+                card_candidates.append(user_settings)
+            else:
+                summary["failed"] += 1
+                logger.warning(f"User {user.username}: Failed to process monthly donation of {amount}")
+
+        # Claim the period for every user about to be charged; a user whose
+        # row another run inserted first is left to that run.
+        to_charge = box_candidates + card_candidates
+        MonthlyDonationPeriod.objects.bulk_create(
+            [
+                MonthlyDonationPeriod(
+                    user_id=s.user_id, period=period_start.date(),
+                    amount=s.monthly_amount, claim_token=claim_token,
                 )
-                
-                if status_bool and result.get('status') == 'success':
-                    # Payment successful
-                    with transaction.atomic():
-                        # Record the successful charge
-                        Transaction.objects.create(
-                            user=user,
-                            amount=amount,
-                            transaction_type='DONATION',
-                            description=f"Monthly Donation (Auto-charged Card {card.last4}) - {now.strftime('%B %Y')}"
-                        )
-                        success = True
-                        logger.info(f"User {user.username}: Auto-charged {amount} from Card {card.last4}")
-                else:
-                    logger.error(f"User {user.username}: Failed to charge card {card.last4}. Reason: {result}")
-                
-        if not success:
-            logger.warning(f"User {user.username}: Failed to process monthly donation of {amount}")
+                for s in to_charge
+            ],
+            ignore_conflicts=True,
+        )
+        claimed = set(
+            MonthlyDonationPeriod.objects.filter(
+                period=period_start.date(),
+                claim_token=claim_token,
+                user_id__in=[s.user_id for s in to_charge],
+            ).values_list('user_id', flat=True)
+        )
+        summary["skipped"] += sum(1 for s in to_charge if s.user_id not in claimed)
+        box_candidates = [s for s in box_candidates if s.user_id in claimed]
+        card_candidates = [s for s in card_candidates if s.user_id in claimed]
+        failed_user_ids = []
+
+        # 1. Try Money Box. Each debit is a conditional UPDATE, so a balance
+        # spent since the chunk was read falls through to the card instead.
+        with transaction.atomic():
+            new_transactions = []
+            for user_settings in box_candidates:
+                user = user_settings.user
+                amount = user_settings.monthly_amount
+                try:
+                    debit_money_box(user, amount, f"Monthly Donation - {period_label}")
+                except InsufficientFunds:
+                    if user_settings.auto_charge_card:
+                        card_candidates.append(user_settings)
+                    else:
+                        summary["failed"] += 1
+                        failed_user_ids.append(user.pk)
+                        logger.warning(f"User {user.username}: Failed to process monthly donation of {amount}")
+                    continue
+                new_transactions.append(Transaction(
+                    user=user,
+                    amount=amount,
+                    transaction_type='DONATION',
+                    description=f"Monthly Donation (Auto-deducted from Money Box) - {period_label}"
+                ))
+                charged_settings_ids.append(user_settings.pk)
+                summary["box_deducted"] += 1
+                logger.info(f"User {user.username}: Auto-deducted {amount} from Money Box")
+            if new_transactions:
+                Transaction.objects.bulk_create(new_transactions)
+                DailyTransactionRollup.record(new_transactions)
+
+        # 2. Try Saved Card (if Money Box failed or disabled)
+        # Latest active card per user, one query for the whole chunk
+        cards = {}
+        if card_candidates:
+            card_qs = SavedCard.objects.filter(
+                user_id__in=[s.user_id for s in card_candidates], is_active=True
+            ).order_by('user_id', '-created_at')
+            for card in card_qs:
+                cards.setdefault(card.user_id, card)
+
+        jobs = []
+        for user_settings in card_candidates:
+            user = user_settings.user
+            card = cards.get(user.pk)
+            if not card:
+                summary["failed"] += 1
+                failed_user_ids.append(user.pk)
+                logger.warning(f"User {user.username}: Failed to process monthly donation of {user_settings.monthly_amount}")
+                continue
+            jobs.append({
+                "settings_id": user_settings.pk,
+                "user": user,
+                "card": card,
+                "amount": user_settings.monthly_amount,
+                "email": user.email,
+                "amount_kobo": int(float(user_settings.monthly_amount) * 100),
+                "authorization_code": card.authorization_code,
+                "reference": f"auto_{uuid.uuid4().hex}",
+            })
+
+        new_transactions = []
+        for job in charge_cards(paystack, jobs):
+            user, card = job["user"], job["card"]
+            latencies.append(job["latency"])
+            if job["ok"]:
+                new_transactions.append(Transaction(
+                    user=user,
+                    amount=job["amount"],
+                    transaction_type='DONATION',
+                    description=f"Monthly Donation (Auto-charged Card {card.last4}) - {period_label}",
+                    paid_from_money_box=False,
+                ))
+                charged_settings_ids.append(job["settings_id"])
+                summary["card_charged"] += 1
+                logger.info(f"User {user.username}: Auto-charged {job['amount']} from Card {card.last4}")
+            else:
+                summary["failed"] += 1
+                failed_user_ids.append(user.pk)
+                logger.error(f"User {user.username}: Failed to charge card {card.last4}. Reason: {job['result']}")
+
+        with transaction.atomic():
+            if new_transactions:
+                Transaction.objects.bulk_create(new_transactions)
+                DailyTransactionRollup.record(new_transactions)
+            # Release the claims of failed users so tomorrow's run retries them
+            if failed_user_ids:
+                MonthlyDonationPeriod.objects.filter(
+                    period=period_start.date(),
+                    claim_token=claim_token,
+                    user_id__in=failed_user_ids,
+                ).delete()
+            # Advance paid-up schedules to the next billing month
+            if paid_settings_ids:
+                RecurringDonationSchedule.objects.filter(
+                    donation_settings_id__in=paid_settings_ids
+                ).update(next_due_at=period_end)
+            if charged_settings_ids:
+                RecurringDonationSchedule.objects.filter(
+                    donation_settings_id__in=charged_settings_ids
+                ).update(next_due_at=period_end, last_charged_at=now)
+
+    elapsed = time.monotonic() - started
+    processed = summary["box_deducted"] + summary["card_charged"] + summary["failed"]
+    summary["elapsed_seconds"] = round(elapsed, 3)
+    summary["users_per_second"] = round(processed / elapsed, 2) if elapsed else 0.0
+    summary["card_p95_ms"] = round(percentile(latencies, 95) * 1000, 2)
+    logger.info("Monthly donations run: %s", summary)
+    return summary
+
+
+@shared_task
+def send_monthly_donation_reminders():
+    """
+    Emails users whose monthly donation falls due in
+    MONTHLY_REMINDER_DAYS_BEFORE days. Uses the next_due_at index, so only
+    the schedules inside that one-day window are read.
+    """
+    days_before = getattr(settings, 'MONTHLY_REMINDER_DAYS_BEFORE', 3)
+    window_start = timezone.now() + timezone.timedelta(days=days_before)
+    window_end = window_start + timezone.timedelta(days=1)
+    schedules = (
+        RecurringDonationSchedule.objects.filter(
+            next_due_at__gte=window_start,
+            next_due_at__lt=window_end,
+            donation_settings__monthly_amount__gt=0,
+        )
+        .exclude(last_reminded_for=F('next_due_at'))
+        .select_related('donation_settings__user')
+    )
+    app_name = getattr(settings, "APP_NAME", "Ishrakaat")
+    reminded = []
+    for schedule in schedules:
+        user = schedule.donation_settings.user
+        if not user.email:
+            continue
+        due_date = timezone.localtime(schedule.next_due_at).strftime('%d %B %Y')
+        send_mail(
+            subject=f"{app_name}: monthly donation due on {due_date}",
+            message=(
+                f"Assalamu alaikum {user.first_name or user.username},\n\n"
+                f"Your monthly donation of NGN {schedule.donation_settings.monthly_amount} "
+                f"is due on {due_date}. Please make sure your Money Box or saved card can cover it."
+            ),
+            from_email=None,
+            recipient_list=[user.email],
+            fail_silently=True,
+        )
+        schedule.last_reminded_for = schedule.next_due_at
+        reminded.append(schedule)
+    if reminded:
+        RecurringDonationSchedule.objects.bulk_update(reminded, ['last_reminded_for'])
+    return len(reminded)
+
+
+@shared_task
+def check_money_box_balances_task():
+    run = check_money_box_balances()
+    return {"run": run.pk, "users_checked": run.users_checked, "mismatches": run.mismatches}
+
+
+@shared_task
+def export_audit_tables_task(full=False):
+    return export_audit_tables(full=full)
 
 
 @shared_task
 def send_daily_inflow_outflow_to_google_sheet():
-    now = timezone.now()
-    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    end = start + timezone.timedelta(days=1)
-    tx = Transaction.objects.filter(created_at__gte=start, created_at__lt=end)
-    inflow_total = tx.filter(
+    today = timezone.localdate()
+    rollups = DailyTransactionRollup.objects.filter(date=today)
+    inflow_total = rollups.filter(
         transaction_type__in=['DEPOSIT', 'DONATION']
-    ).aggregate(Sum('amount'))['amount__sum'] or Decimal('0')
-    outflow_total = tx.filter(
+    ).aggregate(Sum('total'))['total__sum'] or Decimal('0')
+    outflow_total = rollups.filter(
         transaction_type='WITHDRAWAL'
-    ).aggregate(Sum('amount'))['amount__sum'] or Decimal('0')
+    ).aggregate(Sum('total'))['total__sum'] or Decimal('0')
     webhook = getattr(settings, "GOOGLE_SHEETS_WEBHOOK_URL", None)
     if not webhook:
         return
     payload = {
         "app": getattr(settings, "APP_NAME", "Ishrakaat"),
-        "date": start.date().isoformat(),
+        "date": today.isoformat(),
         "inflow": float(inflow_total),
         "outflow": float(outflow_total),
     }
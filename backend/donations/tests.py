@@ -1,6 +1,18 @@
+import csv
 from django.test import TestCase
 from django.contrib.auth import get_user_model
-from .models import DonationType, Transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.core.management import call_command
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+import importlib.util
+import tempfile
+from pathlib import Path
+from rest_framework.test import APIClient
+from .models import DonationType, Transaction, DailyTransactionRollup
+from payments.models import Payment
 
 User = get_user_model()
 
@@ -44,3 +56,214 @@ class DonationLogicTests(TestCase):
         self.assertEqual(tx.user, self.user)
         self.assertEqual(tx.amount, 5000.00)
         self.assertEqual(tx.transaction_type, 'DONATION')
+
+
+class TransactionHistoryPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='historian', first_name='History')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        for i in range(25):
+            Transaction.objects.create(
+                user=self.user,
+                amount=100 + i,
+                transaction_type='DEPOSIT',
+                description=f"Deposit {i}"
+            )
+
+    def test_cursor_pages_cover_history_once(self):
+        url = reverse('transaction-list')
+        seen = []
+        response = self.client.get(url, {'page_size': 10})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+        # Newest first
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+
+    def test_non_positive_amount_is_rejected(self):
+        url = reverse('transaction-list')
+        for amount in ('0', '-50'):
+            response = self.client.post(
+                url, {'amount': amount, 'transaction_type': 'DEPOSIT', 'description': 'x'}, format='json'
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class InflowOutflowRollupTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='stateadmin', first_name='State', is_staff=True,
+            admin_level='STATE', state='Kano'
+        )
+        kano = User.objects.create_user(username='kano', first_name='Kano', state='Kano', local_govt='Fagge')
+        lagos = User.objects.create_user(username='lagos', first_name='Lagos', state='Lagos')
+        Transaction.objects.create(user=kano, amount=1000, transaction_type='DEPOSIT', description='d')
+        Transaction.objects.create(user=kano, amount=200, transaction_type='WITHDRAWAL', description='w')
+        Transaction.objects.create(user=kano, amount=300, transaction_type='DONATION', description='x')
+        Transaction.objects.create(user=lagos, amount=5000, transaction_type='DEPOSIT', description='d')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_rollup_updated_on_write(self):
+        row = DailyTransactionRollup.objects.get(state='Kano', transaction_type='DEPOSIT')
+        self.assertEqual(row.total, 1000)
+        self.assertEqual(row.count, 1)
+
+    def test_stats_scoped_to_admin_state(self):
+        response = self.client.get(reverse('donation-inflow-outflow'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['inflow'], [1300.0])
+        self.assertEqual(response.data['outflow'], [200.0])
+
+    def test_backfill_matches_incremental(self):
+        before = set(DailyTransactionRollup.objects.values_list(
+            'date', 'transaction_type', 'state', 'local_govt', 'ward', 'total', 'count'
+        ))
+        call_command('backfill_transaction_rollups', stdout=StringIO())
+        after = set(DailyTransactionRollup.objects.values_list(
+            'date', 'transaction_type', 'state', 'local_govt', 'ward', 'total', 'count'
+        ))
+        self.assertEqual(before, after)
+
+    def test_rollup_follows_edits_and_deletes(self):
+        kano = User.objects.get(username='kano')
+        deposit = Transaction.objects.get(user=kano, transaction_type='DEPOSIT')
+        deposit.amount = 1500
+        deposit.save()
+        row = DailyTransactionRollup.objects.get(state='Kano', transaction_type='DEPOSIT')
+        self.assertEqual((row.total, row.count), (1500, 1))
+
+        deposit.transaction_type = 'DONATION'
+        deposit.save()
+        self.assertFalse(DailyTransactionRollup.objects.filter(state='Kano', transaction_type='DEPOSIT').exists())
+        row = DailyTransactionRollup.objects.get(state='Kano', transaction_type='DONATION')
+        self.assertEqual((row.total, row.count), (1800, 2))
+
+        Transaction.objects.filter(user=kano, transaction_type='WITHDRAWAL').delete()
+        self.assertFalse(DailyTransactionRollup.objects.filter(state='Kano', transaction_type='WITHDRAWAL').exists())
+
+        before = set(DailyTransactionRollup.objects.values_list(
+            'date', 'transaction_type', 'state', 'local_govt', 'ward', 'total', 'count'
+        ))
+        call_command('backfill_transaction_rollups', stdout=StringIO())
+        after = set(DailyTransactionRollup.objects.values_list(
+            'date', 'transaction_type', 'state', 'local_govt', 'ward', 'total', 'count'
+        ))
+        self.assertEqual(before, after)
+
+    def test_streaming_detail_export(self):
+        today = timezone.localdate().isoformat()
+        response = self.client.get(
+            reverse('donation-export-csv'), {'start': today, 'end': today, 'detail': 'true'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().strip().splitlines()
+        # Title, header and the three Kano transactions only
+        self.assertEqual(len(lines), 5)
+        self.assertNotIn('lagos', '\n'.join(lines))
+
+    def test_detail_export_neutralises_formulas(self):
+        kano = User.objects.get(username='kano')
+        Transaction.objects.create(
+            user=kano, amount=50, transaction_type='DONATION',
+            description='=HYPERLINK("http://evil.example","click")'
+        )
+        today = timezone.localdate().isoformat()
+        response = self.client.get(
+            reverse('donation-export-csv'), {'start': today, 'end': today, 'detail': 'true'}
+        )
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[-1][-1], '\'=HYPERLINK("http://evil.example","click")')
+
+    def test_export_rejects_bad_range(self):
+        response = self.client.get(reverse('donation-export-csv'), {'start': '2026-02-01', 'end': '2026-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+@skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow not installed')
+class AuditExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='donor', first_name='Donor')
+        Transaction.objects.create(user=self.user, amount=1000, transaction_type='DEPOSIT', description='d')
+        Transaction.objects.create(user=self.user, amount=300, transaction_type='DONATION', description='x')
+        self.output = tempfile.mkdtemp()
+
+    def _read(self, name):
+        import pyarrow.dataset as ds
+        return ds.dataset(f'{self.output}/{name}', format='parquet', partitioning='hive').to_table()
+
+    def test_incremental_export_appends_new_partitions(self):
+        call_command('export_audit_parquet', output=self.output, stdout=StringIO())
+        table = self._read('transactions')
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(
+            sorted(table.column('transaction_type').to_pylist()), ['DEPOSIT', 'DONATION']
+        )
+
+        Transaction.objects.create(user=self.user, amount=50, transaction_type='DEPOSIT', description='d2')
+        call_command('export_audit_parquet', output=self.output, stdout=StringIO())
+        self.assertEqual(self._read('transactions').num_rows, 3)
+
+        # Nothing new: no extra files and the watermark stays put
+        call_command('export_audit_parquet', output=self.output, stdout=StringIO())
+        self.assertEqual(self._read('transactions').num_rows, 3)
+
+    def test_late_committed_lower_id_is_exported_once(self):
+        first = Transaction.objects.order_by('id').first()
+        Transaction.objects.create(
+            id=first.id + 10, user=self.user, amount=70, transaction_type='DEPOSIT', description='high'
+        )
+        call_command('export_audit_parquet', output=self.output, stdout=StringIO())
+        # A lower id that only becomes visible after the higher one was exported
+        Transaction.objects.create(
+            id=first.id + 5, user=self.user, amount=60, transaction_type='DEPOSIT', description='late'
+        )
+        call_command('export_audit_parquet', output=self.output, stdout=StringIO())
+        ids = self._read('transactions').column('id').to_pylist()
+        self.assertEqual(sorted(ids), sorted(Transaction.objects.values_list('id', flat=True)))
+
+    def test_full_export_replaces_earlier_files(self):
+        call_command('export_audit_parquet', output=self.output, stdout=StringIO())
+        Transaction.objects.create(user=self.user, amount=50, transaction_type='DEPOSIT', description='d2')
+        call_command('export_audit_parquet', output=self.output, stdout=StringIO())
+        call_command('export_audit_parquet', output=self.output, full=True, stdout=StringIO())
+        self.assertEqual(self._read('transactions').num_rows, 3)
+
+    def test_payment_status_changes_are_reexported(self):
+        payment = Payment.objects.create(user=self.user, amount=500, reference='ref_audit_1')
+        call_command('export_audit_parquet', output=self.output, stdout=StringIO())
+        self.assertEqual(self._read('payments').column('status').to_pylist(), ['PENDING'])
+
+        Payment.objects.filter(pk=payment.pk).update(status='SUCCESS', verified_at=timezone.now())
+        call_command('export_audit_parquet', output=self.output, stdout=StringIO())
+        table = self._read('payments')
+        self.assertEqual(table.column('status').to_pylist(), ['SUCCESS'])
+        files = [p.name for p in Path(self.output, 'payments').rglob('*.parquet')]
+        self.assertEqual(files, [f'part-{payment.pk:012d}.parquet'])
+
+    @patch('donations.tasks.export_audit_tables_task.delay')
+    def test_endpoint_is_national_only(self, mock_delay):
+        mock_delay.return_value.id = 'task-1'
+        client = APIClient()
+        state_admin = User.objects.create_user(
+            username='stateadmin', first_name='State', is_staff=True, admin_level='STATE', state='Kano'
+        )
+        client.force_authenticate(user=state_admin)
+        self.assertEqual(client.post(reverse('donation-audit-export')).status_code, 403)
+
+        national = User.objects.create_user(
+            username='national', first_name='National', is_staff=True, admin_level='NATIONAL'
+        )
+        client.force_authenticate(user=national)
+        response = client.post(reverse('donation-audit-export'), {'full': 'true'})
+        self.assertEqual(response.status_code, 202)
+        mock_delay.assert_called_once_with(full=True)
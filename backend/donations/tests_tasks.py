@@ -1,10 +1,13 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db.models import F
 from django.utils import timezone
 from unittest.mock import patch, MagicMock
 from decimal import Decimal
-from .models import UserDonationSettings, Transaction
-from .tasks import process_monthly_donations
+from .models import UserDonationSettings, Transaction, MonthlyDonationPeriod, RecurringDonationSchedule, BalanceMismatch
+from .reconciliation import check_money_box_balances
+from .tasks import process_monthly_donations, send_monthly_donation_reminders
 from payments.models import SavedCard
 
 User = get_user_model()
@@ -85,3 +88,162 @@ class MonthlyDonationTaskTests(TestCase):
         # Money box should remain same
         self.user.refresh_from_db()
         self.assertEqual(self.user.money_box_balance, Decimal('100.00'))
+
+    @override_settings(MONTHLY_BILLING_CHUNK_SIZE=2, MONTHLY_CHARGE_RATE_PER_SEC=0)
+    @patch('donations.tasks.Paystack.charge_authorization')
+    def test_batch_card_charges_summary(self, mock_charge):
+        # Several users who can only pay by card, one of whom gets declined
+        for i in range(4):
+            user = User.objects.create_user(username=f'carduser{i}', email=f'card{i}@example.com', first_name='Card')
+            UserDonationSettings.objects.create(
+                user=user,
+                monthly_amount=Decimal('1000.00'),
+                auto_deduct_from_box=True,
+                auto_charge_card=True
+            )
+            SavedCard.objects.create(
+                user=user,
+                authorization_code=f'AUTH_{i}',
+                card_type='visa',
+                last4='1111',
+                exp_month='12',
+                exp_year='2030',
+                email=user.email
+            )
+
+        def charge(email, amount, authorization_code, reference=None):
+            if authorization_code == 'AUTH_0':
+                return False, 'Declined'
+            return True, {'status': 'success', 'reference': reference}
+
+        mock_charge.side_effect = charge
+
+        summary = process_monthly_donations()
+
+        # setUp user has neither balance nor card
+        self.assertEqual(summary['eligible'], 5)
+        self.assertEqual(summary['card_charged'], 3)
+        self.assertEqual(summary['failed'], 2)
+        self.assertIn('card_p95_ms', summary)
+        self.assertEqual(
+            Transaction.objects.filter(transaction_type='DONATION', description__contains='Auto-charged').count(),
+            3
+        )
+
+    @patch('donations.tasks.charge_cards')
+    def test_deposit_during_card_fan_out_is_kept(self, mock_charge_cards):
+        self.user.money_box_balance = Decimal('10000.00')
+        self.user.save()
+
+        def deposit_while_charging(paystack, jobs):
+            # A deposit lands while the chunk's cards are being charged
+            User.objects.filter(pk=self.user.pk).update(money_box_balance=F('money_box_balance') + 7000)
+            return []
+
+        mock_charge_cards.side_effect = deposit_while_charging
+        process_monthly_donations()
+
+        self.user.refresh_from_db()
+        # 10000 - 5000 debited before the fan-out, plus the 7000 deposit
+        self.assertEqual(self.user.money_box_balance, Decimal('12000.00'))
+
+    def test_overlapping_run_does_not_charge_twice(self):
+        self.user.money_box_balance = Decimal('20000.00')
+        self.user.save()
+        from . import tasks
+
+        real_chunks = tasks.keyset_chunks
+
+        def chunks_after_other_run_claims(queryset, size):
+            # Another run claims the user after this one read who has paid
+            period = timezone.localtime().date().replace(day=1)
+            MonthlyDonationPeriod.objects.create(
+                user=self.user, period=period, amount=Decimal('5000.00'), claim_token='other-run'
+            )
+            yield from real_chunks(queryset, size)
+
+        with patch('donations.tasks.keyset_chunks', chunks_after_other_run_claims):
+            summary = process_monthly_donations()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.money_box_balance, Decimal('20000.00'))
+        self.assertEqual(summary['skipped'], 1)
+        self.assertFalse(Transaction.objects.filter(user=self.user).exists())
+
+    def test_failed_charge_releases_claim(self):
+        # No balance and no saved card: the claim is removed so tomorrow retries
+        summary = process_monthly_donations()
+        self.assertEqual(summary['failed'], 1)
+        self.assertFalse(MonthlyDonationPeriod.objects.filter(user=self.user).exists())
+
+    def test_repeat_run_is_idempotent(self):
+        self.user.money_box_balance = Decimal('20000.00')
+        self.user.save()
+
+        process_monthly_donations()
+        summary = process_monthly_donations()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.money_box_balance, Decimal('15000.00'))
+        # The schedule moved to next month, so the second run selects nobody
+        self.assertEqual(summary['eligible'], 0)
+        self.assertEqual(MonthlyDonationPeriod.objects.filter(user=self.user).count(), 1)
+        self.settings.schedule.refresh_from_db()
+        self.assertGreater(self.settings.schedule.next_due_at, timezone.now())
+
+    def test_failed_user_stays_due(self):
+        SavedCard.objects.filter(user=self.user).delete()
+        due_at = self.settings.schedule.next_due_at
+
+        process_monthly_donations()
+
+        self.settings.schedule.refresh_from_db()
+        self.assertEqual(self.settings.schedule.next_due_at, due_at)
+
+    def test_not_due_user_is_skipped(self):
+        self.user.money_box_balance = Decimal('10000.00')
+        self.user.save()
+        RecurringDonationSchedule.objects.filter(donation_settings=self.settings).update(
+            next_due_at=timezone.now() + timezone.timedelta(days=5)
+        )
+
+        summary = process_monthly_donations()
+
+        self.assertEqual(summary['eligible'], 0)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.money_box_balance, Decimal('10000.00'))
+
+    def test_reminder_sent_once_before_due(self):
+        RecurringDonationSchedule.objects.filter(donation_settings=self.settings).update(
+            next_due_at=timezone.now() + timezone.timedelta(days=3, hours=2)
+        )
+
+        self.assertEqual(send_monthly_donation_reminders(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(send_monthly_donation_reminders(), 0)
+
+
+class BalanceCheckTests(TestCase):
+    def setUp(self):
+        self.good = User.objects.create_user(username='gooduser', first_name='Good')
+        self.bad = User.objects.create_user(username='baduser', first_name='Bad')
+        for user in (self.good, self.bad):
+            Transaction.objects.create(user=user, amount=Decimal('1000.00'), transaction_type='DEPOSIT', description='Deposit')
+            Transaction.objects.create(user=user, amount=Decimal('300.00'), transaction_type='DONATION', description='Donation')
+            # Card donation does not touch the Money Box
+            Transaction.objects.create(
+                user=user, amount=Decimal('500.00'), transaction_type='DONATION',
+                description='Zakah (Card 4242)', paid_from_money_box=False
+            )
+        User.objects.filter(pk=self.good.pk).update(money_box_balance=Decimal('700.00'))
+        User.objects.filter(pk=self.bad.pk).update(money_box_balance=Decimal('900.00'))
+
+    def test_reports_mismatches(self):
+        run = check_money_box_balances(chunk_size=1)
+
+        self.assertEqual(run.users_checked, 2)
+        self.assertEqual(run.mismatches, 1)
+        mismatch = BalanceMismatch.objects.get(run=run)
+        self.assertEqual(mismatch.user, self.bad)
+        self.assertEqual(mismatch.expected_balance, Decimal('700.00'))
+        self.assertEqual(mismatch.difference, Decimal('200.00'))
@@ -8,7 +8,12 @@ from .views import (
     zakah_quick_pay,
     WaqfInterestCreateView,
 )
-from .api import inflow_outflow_stats, inflow_outflow_csv
+from .api import (
+    inflow_outflow_stats,
+    inflow_outflow_csv,
+    transactions_export_csv,
+    audit_export,
+)
 
 router = DefaultRouter()
 router.register(r"transactions", TransactionViewSet, basename="transaction")
@@ -27,6 +32,16 @@ urlpatterns = [
         inflow_outflow_csv,
         name="donation-inflow-outflow-csv",
     ),
+    path(
+        "stats/export.csv",
+        transactions_export_csv,
+        name="donation-export-csv",
+    ),
+    path(
+        "stats/audit-export/",
+        audit_export,
+        name="donation-audit-export",
+    ),
     path(
         "welfare/family/",
         welfare_family_donation,
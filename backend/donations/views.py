@@ -20,8 +20,10 @@ from .serializers import (
     WelfareFamilyNeedDonationSerializer,
     WaqfInterestSerializer,
 )
+from .pagination import TransactionCursorPagination
 from payments.models import SavedCard
 from payments.paystack import Paystack
+from users.services import debit_money_box, InsufficientFunds
 
 
 class WaqfInterestCreateView(generics.CreateAPIView):
@@ -67,10 +69,11 @@ class UserDonationSettingsView(generics.RetrieveUpdateAPIView):
 class TransactionViewSet(viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TransactionCursorPagination
 
     def get_queryset(self):
         return Transaction.objects.filter(user=self.request.user).order_by(
-            "-created_at"
+            "-created_at", "-id"
         )
 
     def perform_create(self, serializer):
@@ -108,39 +111,45 @@ def welfare_family_donation(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    with db_transaction.atomic():
-        default_type, _ = DonationType.objects.get_or_create(
-            name="Family welfare support",
-            defaults={
-                "category": "IMPROMPTU",
-                "description": "Support for needy families (food, school, shelter, clothing).",
-                "is_mandatory": False,
-                "is_active": True,
-            },
+    try:
+        with db_transaction.atomic():
+            debit_money_box(user, amount, f"Family need - {purpose.lower()}")
+            record = _record_welfare_donation(user, purpose, amount)
+    except InsufficientFunds:
+        return Response(
+            {"detail": "Insufficient funds in Money Box."},
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
-        tx = Transaction.objects.create(
-            user=user,
-            amount=amount,
-            transaction_type="DONATION",
-            donation_type=default_type,
-            description=f"Family need - {purpose.lower()}",
-        )
+    serializer = WelfareFamilyNeedDonationSerializer(record)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        WelfareFamilyNeedDonation.objects.create(
-            user=user,
-            transaction=tx,
-            purpose=purpose,
-            amount=amount,
-        )
 
-        user.money_box_balance -= amount
-        user.save()
+def _record_welfare_donation(user, purpose, amount):
+    default_type, _ = DonationType.objects.get_or_create(
+        name="Family welfare support",
+        defaults={
+            "category": "IMPROMPTU",
+            "description": "Support for needy families (food, school, shelter, clothing).",
+            "is_mandatory": False,
+            "is_active": True,
+        },
+    )
 
-    serializer = WelfareFamilyNeedDonationSerializer(
-        WelfareFamilyNeedDonation.objects.get(pk=tx.welfare_family_records.first().pk)
+    tx = Transaction.objects.create(
+        user=user,
+        amount=amount,
+        transaction_type="DONATION",
+        donation_type=default_type,
+        description=f"Family need - {purpose.lower()}",
+    )
+
+    return WelfareFamilyNeedDonation.objects.create(
+        user=user,
+        transaction=tx,
+        purpose=purpose,
+        amount=amount,
     )
-    return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 @api_view(["POST"])
@@ -172,15 +181,20 @@ def zakah_quick_pay(request):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        with db_transaction.atomic():
-            Transaction.objects.create(
-                user=user,
-                amount=amount,
-                transaction_type="DONATION",
-                description=f"{note} (Money Box)",
+        try:
+            with db_transaction.atomic():
+                debit_money_box(user, amount, f"{note} (Money Box)")
+                Transaction.objects.create(
+                    user=user,
+                    amount=amount,
+                    transaction_type="DONATION",
+                    description=f"{note} (Money Box)",
+                )
+        except InsufficientFunds:
+            return Response(
+                {"detail": "Insufficient funds in Money Box."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            user.money_box_balance -= amount
-            user.save()
 
         return Response(
             {"detail": "Zakah paid from Money Box."},
@@ -222,6 +236,7 @@ def zakah_quick_pay(request):
                 amount=amount,
                 transaction_type="DONATION",
                 description=f"{note} (Card {card.last4})",
+                paid_from_money_box=False,
             )
 
         return Response(
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_paystackwebhookevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paystackwebhookevent',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='paystackwebhookevent',
+            name='dead_lettered_at',
+            field=models.DateTimeField(blank=True, help_text='Set when the event failed PAYSTACK_WEBHOOK_MAX_ATTEMPTS times; it is no longer retried', null=True),
+        ),
+    ]
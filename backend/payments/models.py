@@ -39,3 +39,31 @@ class SavedCard(models.Model):
         
     def __str__(self):
         return f"{self.user.username} - {self.card_type} **** {self.last4}"
+
+
+class PaystackWebhookEvent(models.Model):
+    """
+    Append-only inbox of verified Paystack webhook deliveries. Repeated
+    deliveries of the same event collapse on `event_key`.
+    """
+    event_key = models.CharField(max_length=150, unique=True)
+    event = models.CharField(max_length=50)
+    reference = models.CharField(max_length=100, blank=True)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    dead_lettered_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="Set when the event failed PAYSTACK_WEBHOOK_MAX_ATTEMPTS times; it is no longer retried",
+    )
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        if self.processed_at:
+            state = 'processed'
+        elif self.dead_lettered_at:
+            state = 'dead-lettered'
+        else:
+            state = 'pending'
+        return f"{self.event_key} ({state})"
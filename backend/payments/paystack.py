@@ -1,79 +1,194 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Returns the process-wide pooled session used for every Paystack call.
+    Connections are kept alive and reused, so repeated charges skip the
+    TCP/TLS handshake. The session is rebuilt after a fork (Celery prefork
+    workers) so children never share sockets with the parent.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+
+def _build_session():
+    # Connect errors are retried for every method (the request never left);
+    # read/status retries only apply to idempotent GETs such as verify.
+    retry = Retry(
+        total=getattr(settings, "PAYSTACK_MAX_RETRIES", 3),
+        connect=getattr(settings, "PAYSTACK_MAX_RETRIES", 3),
+        read=getattr(settings, "PAYSTACK_MAX_RETRIES", 3),
+        status=getattr(settings, "PAYSTACK_MAX_RETRIES", 3),
+        backoff_factor=getattr(settings, "PAYSTACK_RETRY_BACKOFF", 0.3),
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    pool_size = getattr(settings, "PAYSTACK_POOL_MAXSIZE", 20)
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_timeout():
+    return (
+        getattr(settings, "PAYSTACK_CONNECT_TIMEOUT", 5),
+        getattr(settings, "PAYSTACK_READ_TIMEOUT", 30),
+    )
+
+
+class PaystackStats:
+    """Per-call latency counters kept in memory for this process."""
+
+    SAMPLE_SIZE = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def record(self, name, elapsed, ok=True):
+        with self._lock:
+            entry = self._calls.get(name)
+            if entry is None:
+                entry = {
+                    "count": 0,
+                    "errors": 0,
+                    "total": 0.0,
+                    "max": 0.0,
+                    "samples": deque(maxlen=self.SAMPLE_SIZE),
+                }
+                self._calls[name] = entry
+            entry["count"] += 1
+            if not ok:
+                entry["errors"] += 1
+            entry["total"] += elapsed
+            entry["max"] = max(entry["max"], elapsed)
+            entry["samples"].append(elapsed)
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for name, entry in self._calls.items():
+                samples = sorted(entry["samples"])
+                p95 = samples[int(0.95 * (len(samples) - 1))] if samples else 0.0
+                result[name] = {
+                    "count": entry["count"],
+                    "errors": entry["errors"],
+                    "avg_ms": round(entry["total"] / entry["count"] * 1000, 2),
+                    "p95_ms": round(p95 * 1000, 2),
+                    "max_ms": round(entry["max"] * 1000, 2),
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._calls = {}
+
+
+stats = PaystackStats()
+
 
 class Paystack:
     PAYSTACK_SECRET_KEY = settings.PAYSTACK_SECRET_KEY
     BASE_URL = 'https://api.paystack.co'
 
-    def verify_payment(self, ref, *args, **kwargs):
-        path = f"/transaction/verify/{ref}"
-        
+    def _request(self, name, method, path, **kwargs):
+        """
+        Sends a request through the shared session. Returns the response, or
+        None when Paystack could not be reached within the timeout/retries.
+        """
         headers = {
             "Authorization": f"Bearer {self.PAYSTACK_SECRET_KEY}",
             "Content-Type": "application/json",
         }
-        
         url = self.BASE_URL + path
-        response = requests.get(url, headers=headers)
+        started = time.monotonic()
+        try:
+            response = get_session().request(
+                method, url, headers=headers, timeout=get_timeout(), **kwargs
+            )
+        except requests.RequestException as exc:
+            stats.record(name, time.monotonic() - started, ok=False)
+            logger.error("Paystack %s failed: %s", name, exc)
+            return None
+        stats.record(name, time.monotonic() - started, ok=response.status_code < 500)
+        return response
+
+    def verify_payment(self, ref, *args, **kwargs):
+        response = self._request("verify_payment", "GET", f"/transaction/verify/{ref}")
+        if response is None:
+            return False, "Unable to reach Paystack"
 
         if response.status_code == 200:
             response_data = response.json()
             return response_data['status'], response_data['data']
-        
+
         response_data = response.json()
         return response_data['status'], response_data['message']
 
     def create_customer(self, email, first_name, last_name, phone):
-        path = "/customer"
-        headers = {
-            "Authorization": f"Bearer {self.PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json",
-        }
         data = {
             "email": email,
             "first_name": first_name,
             "last_name": last_name,
             "phone": phone
         }
-        
-        url = self.BASE_URL + path
-        response = requests.post(url, headers=headers, json=data)
-        
+        response = self._request("create_customer", "POST", "/customer", json=data)
+        if response is None:
+            return False, "Unable to reach Paystack"
+
         if response.status_code in [200, 201]:
             response_data = response.json()
             return True, response_data['data']
-        
+
         return False, response.json().get('message', 'Failed to create customer')
 
     def create_dedicated_account(self, customer_code):
-        path = "/dedicated_account"
-        headers = {
-            "Authorization": f"Bearer {self.PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json",
-        }
         data = {
             "customer": customer_code
         }
-        
-        url = self.BASE_URL + path
-        response = requests.post(url, headers=headers, json=data)
-        
+        response = self._request(
+            "create_dedicated_account", "POST", "/dedicated_account", json=data
+        )
+        if response is None:
+            return False, "Unable to reach Paystack"
+
         if response.status_code in [200, 201]:
             response_data = response.json()
             return True, response_data['data']
-            
+
         return False, response.json().get('message', 'Failed to create dedicated account')
 
     def initialize_payment(self, email, amount, reference=None, callback_url=None):
         """
         amount should be in Kobo (Naira * 100)
         """
-        path = "/transaction/initialize"
-        headers = {
-            "Authorization": f"Bearer {self.PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json",
-        }
-        
         data = {
             "email": email,
             "amount": amount,
@@ -82,9 +197,12 @@ class Paystack:
             data['reference'] = reference
         if callback_url:
             data['callback_url'] = callback_url
-            
-        url = self.BASE_URL + path
-        response = requests.post(url, headers=headers, json=data)
+
+        response = self._request(
+            "initialize_payment", "POST", "/transaction/initialize", json=data
+        )
+        if response is None:
+            return False, "Unable to reach Paystack"
 
         if response.status_code == 200:
             response_data = response.json()
@@ -98,12 +216,6 @@ class Paystack:
         Charge a recurring payment using authorization code
         amount should be in Kobo
         """
-        path = "/transaction/charge_authorization"
-        headers = {
-            "Authorization": f"Bearer {self.PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json",
-        }
-        
         data = {
             "email": email,
             "amount": amount,
@@ -111,9 +223,12 @@ class Paystack:
         }
         if reference:
             data['reference'] = reference
-            
-        url = self.BASE_URL + path
-        response = requests.post(url, headers=headers, json=data)
+
+        response = self._request(
+            "charge_authorization", "POST", "/transaction/charge_authorization", json=data
+        )
+        if response is None:
+            return False, "Unable to reach Paystack"
 
         if response.status_code == 200:
             response_data = response.json()
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Payment, SavedCard, PaystackWebhookEvent
+from donations.models import Transaction
+from users.services import credit_money_box
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+
+def webhook_event_key(payload):
+    """Key that identifies one Paystack event across repeated deliveries."""
+    data = payload.get('data') or {}
+    ident = data.get('reference') or data.get('id')
+    if not ident:
+        # No reference or id: identify the event by its content instead, so
+        # unrelated events never collapse onto the same key
+        body = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+        ident = hashlib.sha256(body.encode()).hexdigest()
+    return f"{payload.get('event', '')}:{ident}"
+
+
+def store_webhook_event(payload):
+    """Appends the event to the inbox; duplicates are ignored. Returns True if new."""
+    data = payload.get('data') or {}
+    _, created = PaystackWebhookEvent.objects.get_or_create(
+        event_key=webhook_event_key(payload),
+        defaults={
+            'event': payload.get('event', ''),
+            'reference': data.get('reference') or '',
+            'payload': payload,
+        },
+    )
+    return created
+
+
+def apply_webhook_event(payload):
+    event = payload.get('event')
+    data = payload.get('data', {})
+    if event == 'charge.success':
+        handle_charge_success(data)
+
+
+def handle_charge_success(data):
+    """
+    Credits the Money Box for a successful charge. Safe to call more than
+    once for the same reference.
+    """
+    reference = data.get('reference')
+    amount_kobo = data.get('amount')
+    amount = Decimal(amount_kobo) / 100
+    email = data.get('customer', {}).get('email')
+
+    # Check if we processed this already
+    if Payment.objects.filter(reference=reference, status='SUCCESS').exists():
+        return
+
+    # Find User
+    try:
+        user = User.objects.get(email=email)
+    except User.DoesNotExist:
+        logger.warning("Paystack charge %s: no user with email %s", reference, email)
+        return
+
+    # Use Atomic Transaction
+    with transaction.atomic():
+        # Update or Create Payment
+        # DVA transfers create a new payment record here
+        payment, created = Payment.objects.get_or_create(
+            reference=reference,
+            defaults={
+                'user': user,
+                'amount': amount,
+                'purpose': 'DEPOSIT', # Default for DVA/Webhook
+                'status': 'PENDING'
+            }
+        )
+
+        if payment.status != 'SUCCESS':
+            payment.status = 'SUCCESS'
+            payment.verified_at = timezone.now()
+            payment.save()
+
+            # Credit User
+            credit_money_box(user, amount, f"Deposit (Ref: {reference})")
+
+            # Create Transaction
+            Transaction.objects.create(
+                user=user,
+                amount=amount,
+                transaction_type='DEPOSIT',
+                description=f"Deposit via {data.get('channel', 'paystack')} (Ref: {reference})"
+            )
+
+            # Handle Saved Card if applicable
+            auth = data.get('authorization', {})
+            if auth.get('reusable', False):
+                SavedCard.objects.get_or_create(
+                    user=user,
+                    authorization_code=auth['authorization_code'],
+                    defaults={
+                        'card_type': auth.get('card_type', 'Unknown'),
+                        'last4': auth.get('last4', '0000'),
+                        'exp_month': auth.get('exp_month', '00'),
+                        'exp_year': auth.get('exp_year', '0000'),
+                        'email': auth.get('email', user.email)
+                    }
+                )
+
+
+def process_pending_webhook_events(batch_size=200):
+    """
+    Applies inbox events in id order, `batch_size` at a time. Each event is
+    applied in its own transaction so one bad payload does not block the rest.
+    A failed event stays pending and is retried by the next sweep; after
+    PAYSTACK_WEBHOOK_MAX_ATTEMPTS failures it is dead-lettered and logged
+    as an error. Returns the number of events applied.
+    """
+    max_attempts = getattr(settings, 'PAYSTACK_WEBHOOK_MAX_ATTEMPTS', 5)
+    handled = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            # Each sweep visits an event at most once, so failures wait for the next run
+            batch = list(
+                PaystackWebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(processed_at__isnull=True, dead_lettered_at__isnull=True, id__gt=last_id)
+                .order_by('id')[:batch_size]
+            )
+            if not batch:
+                return handled
+            last_id = batch[-1].id
+            now = timezone.now()
+            for event in batch:
+                event.attempts += 1
+                try:
+                    with transaction.atomic():
+                        apply_webhook_event(event.payload)
+                except Exception as exc:
+                    event.error = str(exc)
+                    if event.attempts >= max_attempts:
+                        event.dead_lettered_at = now
+                        logger.error(
+                            "Paystack event %s dead-lettered after %s attempts: %s",
+                            event.event_key, event.attempts, exc,
+                        )
+                    else:
+                        logger.exception("Failed to apply Paystack event %s", event.event_key)
+                    continue
+                event.error = ''
+                event.processed_at = now
+                handled += 1
+            PaystackWebhookEvent.objects.bulk_update(
+                batch, ['processed_at', 'attempts', 'dead_lettered_at', 'error']
+            )
@@ -0,0 +1,11 @@
+from celery import shared_task
+from django.conf import settings
+
+from .services import process_pending_webhook_events
+
+
+@shared_task
+def process_paystack_webhook_events():
+    return process_pending_webhook_events(
+        batch_size=getattr(settings, 'PAYSTACK_WEBHOOK_BATCH_SIZE', 200)
+    )
@@ -1,4 +1,4 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from unittest.mock import patch, MagicMock
@@ -7,7 +7,10 @@ import json
 import hmac
 import hashlib
 from django.conf import settings
-from .models import Payment
+from django.db import OperationalError
+from .models import Payment, PaystackWebhookEvent
+from .services import store_webhook_event, webhook_event_key
+from .tasks import process_paystack_webhook_events
 from donations.models import Transaction
 
 User = get_user_model()
@@ -112,3 +115,89 @@ class DedicatedAccountTests(TestCase):
     def test_webhook_invalid_signature(self):
         response = self.client.post(self.webhook_url, data={}, content_type='application/json', **{'HTTP_X_PAYSTACK_SIGNATURE': 'wrong'})
         self.assertEqual(response.status_code, 400)
+
+    @override_settings(PAYSTACK_WEBHOOK_ASYNC=True)
+    @patch('payments.views.process_paystack_webhook_events.delay')
+    def test_async_webhook_acks_and_dedupes(self, mock_delay):
+        payload = {
+            "event": "charge.success",
+            "data": {
+                "reference": "ref_async_1",
+                "amount": 250000,
+                "channel": "dedicated_account",
+                "customer": {"email": self.user.email},
+            }
+        }
+        body = json.dumps(payload).encode('utf-8')
+        signature = hmac.new(
+            key=settings.PAYSTACK_SECRET_KEY.encode('utf-8'),
+            msg=body,
+            digestmod=hashlib.sha512
+        ).hexdigest()
+
+        # Paystack retries the same event; both deliveries are acked
+        for _ in range(2):
+            response = self.client.post(
+                self.webhook_url, data=body, content_type='application/json',
+                HTTP_X_PAYSTACK_SIGNATURE=signature
+            )
+            self.assertEqual(response.status_code, 200)
+
+        # Nothing applied yet, one inbox row
+        self.assertEqual(PaystackWebhookEvent.objects.count(), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.money_box_balance, Decimal('0.00'))
+
+        self.assertEqual(process_paystack_webhook_events(), 1)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.money_box_balance, Decimal('2500.00'))
+        self.assertIsNotNone(PaystackWebhookEvent.objects.get().processed_at)
+        self.assertEqual(process_paystack_webhook_events(), 0)
+
+    def _charge_event(self, reference, amount=100000):
+        return {
+            "event": "charge.success",
+            "data": {
+                "reference": reference,
+                "amount": amount,
+                "channel": "dedicated_account",
+                "customer": {"email": self.user.email},
+            }
+        }
+
+    def test_failed_event_is_retried_on_next_sweep(self):
+        store_webhook_event(self._charge_event("ref_retry_1"))
+
+        with patch('payments.services.credit_money_box', side_effect=OperationalError("database is locked")):
+            self.assertEqual(process_paystack_webhook_events(), 0)
+        event = PaystackWebhookEvent.objects.get()
+        self.assertIsNone(event.processed_at)
+        self.assertEqual(event.attempts, 1)
+        self.assertIn("locked", event.error)
+
+        self.assertEqual(process_paystack_webhook_events(), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.money_box_balance, Decimal('1000.00'))
+        event.refresh_from_db()
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(event.attempts, 2)
+
+    @override_settings(PAYSTACK_WEBHOOK_MAX_ATTEMPTS=2)
+    def test_poison_event_is_dead_lettered(self):
+        store_webhook_event({"event": "charge.success", "data": {"reference": "ref_bad", "amount": "oops"}})
+
+        for _ in range(3):
+            self.assertEqual(process_paystack_webhook_events(), 0)
+        event = PaystackWebhookEvent.objects.get()
+        self.assertEqual(event.attempts, 2)
+        self.assertIsNotNone(event.dead_lettered_at)
+        self.assertIsNone(event.processed_at)
+
+    def test_events_without_reference_get_distinct_keys(self):
+        first = {"event": "transfer.failed", "data": {"amount": 100}}
+        second = {"event": "transfer.failed", "data": {"amount": 200}}
+        self.assertNotEqual(webhook_event_key(first), webhook_event_key(second))
+        self.assertTrue(store_webhook_event(first))
+        self.assertTrue(store_webhook_event(second))
+        self.assertFalse(store_webhook_event(dict(first)))
@@ -0,0 +1,38 @@
+from django.test import TestCase
+from unittest.mock import patch, MagicMock
+import requests
+
+from . import paystack
+from .paystack import Paystack, get_session
+
+
+class PaystackSessionTests(TestCase):
+    def setUp(self):
+        paystack.stats.reset()
+
+    def test_session_is_shared(self):
+        self.assertIs(get_session(), get_session())
+
+    @patch('payments.paystack.get_session')
+    def test_request_uses_timeout_and_records_stats(self, mock_get_session):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {'status': True, 'data': {'status': 'success'}}
+        mock_get_session.return_value.request.return_value = response
+
+        status_bool, data = Paystack().verify_payment('ref_123')
+
+        self.assertTrue(status_bool)
+        self.assertEqual(data['status'], 'success')
+        _, kwargs = mock_get_session.return_value.request.call_args
+        self.assertEqual(kwargs['timeout'], paystack.get_timeout())
+        self.assertEqual(paystack.stats.snapshot()['verify_payment']['count'], 1)
+
+    @patch('payments.paystack.get_session')
+    def test_network_failure_returns_false(self, mock_get_session):
+        mock_get_session.return_value.request.side_effect = requests.ConnectTimeout()
+
+        status_bool, message = Paystack().charge_authorization('a@b.com', 100, 'AUTH_1')
+
+        self.assertFalse(status_bool)
+        self.assertIn('Paystack', message)
+        self.assertEqual(paystack.stats.snapshot()['charge_authorization']['errors'], 1)
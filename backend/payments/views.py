@@ -5,20 +5,23 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.db import transaction
-from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import get_user_model
-from decimal import Decimal
 import uuid
 import hmac
 import hashlib
 import json
+import logging
 
 from .models import Payment, SavedCard
 from .paystack import Paystack
+from .services import apply_webhook_event, store_webhook_event
+from .tasks import process_paystack_webhook_events
 from donations.models import Transaction
+from users.services import credit_money_box
 
+logger = logging.getLogger(__name__)
 User = get_user_model()
 
 class CreateVirtualAccountView(APIView):
@@ -48,7 +51,7 @@ class CreateVirtualAccountView(APIView):
             )
             if success:
                 user.paystack_customer_code = data['customer_code']
-                user.save()
+                user.save(update_fields=['paystack_customer_code'])
             else:
                 return Response({"error": "Failed to create Paystack customer"}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -61,7 +64,7 @@ class CreateVirtualAccountView(APIView):
             bank = data.get('bank', {})
             user.virtual_account_number = data.get('account_number')
             user.virtual_bank_name = bank.get('name', 'Paystack-Titan')
-            user.save()
+            user.save(update_fields=['virtual_account_number', 'virtual_bank_name'])
             
             return Response({
                 "message": "Virtual account created successfully",
@@ -99,75 +102,24 @@ class PaystackWebhookView(APIView):
             payload = json.loads(request.body)
         except json.JSONDecodeError:
             return Response(status=status.HTTP_400_BAD_REQUEST)
-            
-        event = payload.get('event')
-        data = payload.get('data', {})
-        
-        if event == 'charge.success':
-            reference = data.get('reference')
-            amount_kobo = data.get('amount')
-            amount = Decimal(amount_kobo) / 100
-            email = data.get('customer', {}).get('email')
-            
-            # Check if we processed this already
-            if Payment.objects.filter(reference=reference, status='SUCCESS').exists():
-                return Response(status=status.HTTP_200_OK)
-                
-            # Find User
-            try:
-                user = User.objects.get(email=email)
-            except User.DoesNotExist:
-                # Log error or ignore
-                return Response(status=status.HTTP_200_OK)
-            
-            # Use Atomic Transaction
-            with transaction.atomic():
-                # Update or Create Payment
-                # DVA transfers create a new payment record here
-                payment, created = Payment.objects.get_or_create(
-                    reference=reference,
-                    defaults={
-                        'user': user,
-                        'amount': amount,
-                        'purpose': 'DEPOSIT', # Default for DVA/Webhook
-                        'status': 'PENDING'
-                    }
-                )
-                
-                if payment.status != 'SUCCESS':
-                    payment.status = 'SUCCESS'
-                    payment.verified_at = timezone.now()
-                    payment.save()
-                    
-                    # Credit User
-                    user.money_box_balance = Decimal(str(user.money_box_balance)) + amount
-                    user.save()
-                    
-                    # Create Transaction
-                    Transaction.objects.create(
-                        user=user,
-                        amount=amount,
-                        transaction_type='DEPOSIT',
-                        description=f"Deposit via {data.get('channel', 'paystack')} (Ref: {reference})"
-                    )
-                    
-                    # Handle Saved Card if applicable
-                    auth = data.get('authorization', {})
-                    if auth.get('reusable', False):
-                         SavedCard.objects.get_or_create(
-                            user=user,
-                            authorization_code=auth['authorization_code'],
-                            defaults={
-                                'card_type': auth.get('card_type', 'Unknown'),
-                                'last4': auth.get('last4', '0000'),
-                                'exp_month': auth.get('exp_month', '00'),
-                                'exp_year': auth.get('exp_year', '0000'),
-                                'email': auth.get('email', user.email)
-                            }
-                        )
-        
+
+        if getattr(settings, 'PAYSTACK_WEBHOOK_ASYNC', False):
+            # Fast-ack: record in the inbox and let a worker apply it
+            if store_webhook_event(payload):
+                transaction.on_commit(self._schedule_processing)
+            return Response(status=status.HTTP_200_OK)
+
+        apply_webhook_event(payload)
         return Response(status=status.HTTP_200_OK)
 
+    @staticmethod
+    def _schedule_processing():
+        try:
+            process_paystack_webhook_events.delay()
+        except Exception as exc:
+            # The periodic sweep picks the event up if the broker is unavailable
+            logger.warning("Could not enqueue Paystack webhook processing: %s", exc)
+
 class InitializePaymentView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -225,8 +177,7 @@ class VerifyPaymentView(APIView):
 
                 # 2. Handle Logic based on Purpose
                 if payment.purpose == 'DEPOSIT':
-                    request.user.money_box_balance = Decimal(str(request.user.money_box_balance)) + payment.amount
-                    request.user.save()
+                    credit_money_box(request.user, payment.amount, f"Deposit (Ref: {reference})")
                     
                     Transaction.objects.create(
                         user=request.user,
@@ -1,13 +1,36 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import AdminChatMessage
+from django.contrib.auth.forms import UserChangeForm
+from django.db import transaction
+
+from donations.models import Transaction
+from .models import AdminChatMessage, MoneyBoxHawl, MoneyBoxLedgerEntry, MoneyBoxSnapshot
+from .services import InsufficientFunds, credit_money_box, debit_money_box
 
 User = get_user_model()
 
 
+class UserAdminChangeForm(UserChangeForm):
+    money_box_adjustment = forms.DecimalField(
+        required=False,
+        max_digits=12,
+        decimal_places=2,
+        help_text="Amount to add to (positive) or take from (negative) the Money Box",
+    )
+    adjustment_note = forms.CharField(required=False, max_length=200)
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get("money_box_adjustment") and not cleaned.get("adjustment_note"):
+            self.add_error("adjustment_note", "Give a reason for the adjustment.")
+        return cleaned
+
+
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
+    form = UserAdminChangeForm
     list_display = (
         "id",
         "username",
@@ -39,8 +62,10 @@ class UserAdmin(BaseUserAdmin):
         "state",
         "local_govt",
         "ward",
-        "money_box_balance",
     )
+    # The balance only changes through credit_money_box / debit_money_box,
+    # which keep the ledger, hawl tracking and transactions in step
+    readonly_fields = ("money_box_balance",)
     ordering = ("-date_joined",)
 
     fieldsets = BaseUserAdmin.fieldsets + (
@@ -55,15 +80,47 @@ class UserAdmin(BaseUserAdmin):
                     "admin_level",
                     "is_approved_by_admin",
                     "registration_number",
-                    "money_box_balance",
                     "paystack_customer_code",
                     "virtual_account_number",
                     "virtual_bank_name",
                 )
             },
         ),
+        (
+            "Money Box",
+            {"fields": ("money_box_balance", "money_box_adjustment", "adjustment_note")},
+        ),
     )
 
+    def save_model(self, request, obj, form, change):
+        if change:
+            # Never write back the balance the form was loaded with
+            obj.save(update_fields=[
+                f.name for f in obj._meta.concrete_fields
+                if not f.primary_key and f.name != "money_box_balance"
+            ])
+        else:
+            super().save_model(request, obj, form, change)
+        amount = form.cleaned_data.get("money_box_adjustment")
+        if not change or not amount:
+            return
+        description = f"Admin adjustment by {request.user.username}: {form.cleaned_data['adjustment_note']}"
+        try:
+            with transaction.atomic():
+                if amount > 0:
+                    credit_money_box(obj, amount, description)
+                    transaction_type = "DEPOSIT"
+                else:
+                    debit_money_box(obj, -amount, description)
+                    transaction_type = "WITHDRAWAL"
+                Transaction.objects.create(
+                    user=obj, amount=abs(amount), transaction_type=transaction_type, description=description
+                )
+        except InsufficientFunds:
+            self.message_user(
+                request, "Money Box adjustment not applied: insufficient funds.", messages.ERROR
+            )
+
 
 @admin.register(AdminChatMessage)
 class AdminChatMessageAdmin(admin.ModelAdmin):
@@ -78,3 +135,24 @@ class AdminChatMessageAdmin(admin.ModelAdmin):
         "created_at",
     )
     list_filter = ("scope", "message_type", "state", "local_govt")
+
+
+@admin.register(MoneyBoxLedgerEntry)
+class MoneyBoxLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "kind", "amount", "balance_after", "description", "created_at")
+    list_filter = ("kind",)
+    search_fields = ("user__username", "description")
+
+
+@admin.register(MoneyBoxSnapshot)
+class MoneyBoxSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "balance", "last_entry_id", "taken_at")
+    search_fields = ("user__username",)
+
+
+@admin.register(MoneyBoxHawl)
+class MoneyBoxHawlAdmin(admin.ModelAdmin):
+    list_display = ("user", "started_on", "min_balance", "anniversary_on", "last_completed_on", "last_zakah_due")
+    list_filter = ("anniversary_on", "last_completed_on")
+    search_fields = ("user__username", "user__registration_number")
+    raw_id_fields = ("user",)
@@ -0,0 +1,63 @@
+# Generated by Django 6.0 on 2026-10-17 14:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_opening_entries(apps, schema_editor):
+    # Existing balances predate the ledger; seed each chain with one entry
+    User = apps.get_model('users', 'User')
+    MoneyBoxLedgerEntry = apps.get_model('users', 'MoneyBoxLedgerEntry')
+    MoneyBoxLedgerEntry.objects.bulk_create(
+        [
+            MoneyBoxLedgerEntry(
+                user_id=pk,
+                kind='OPENING',
+                amount=balance,
+                balance_after=balance,
+                description='Opening balance',
+            )
+            for pk, balance in User.objects.exclude(money_box_balance=0).values_list('pk', 'money_box_balance')
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_user_profile_pic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MoneyBoxLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('CREDIT', 'Credit'), ('DEBIT', 'Debit'), ('OPENING', 'Opening balance')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'id'], name='ledger_user_id_idx'), models.Index(fields=['user', 'created_at'], name='ledger_user_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MoneyBoxSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_entry_id', models.BigIntegerField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('taken_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'taken_at'], name='snapshot_user_taken_idx')],
+            },
+        ),
+        migrations.RunPython(create_opening_entries, migrations.RunPython.noop),
+    ]
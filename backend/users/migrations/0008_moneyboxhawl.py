@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-17 17:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_moneyboxledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MoneyBoxHawl',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_on', models.DateField(blank=True, null=True)),
+                ('min_balance', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('anniversary_on', models.DateField(blank=True, db_index=True, null=True)),
+                ('last_completed_on', models.DateField(blank=True, null=True)),
+                ('last_zakah_due', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='hawl', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -34,6 +34,12 @@ class User(AbstractUser):
         max_length=20, choices=ADMIN_LEVEL_CHOICES, default="NONE"
     )
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Admin scopes filter on a prefix of (state, local_govt, ward)
+            models.Index(fields=["state", "local_govt", "ward"], name="user_region_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.registration_number:
             prefix = self.first_name[:5] if self.first_name else "USER"
@@ -92,3 +98,81 @@ class AdminChatMessage(models.Model):
 
     def __str__(self):
         return f"{self.sender.username}: {self.content[:40]}"
+
+
+class MoneyBoxLedgerEntry(models.Model):
+    """
+    Append-only record of every Money Box movement. `amount` is signed
+    (credits positive, debits negative) and `balance_after` is the balance
+    the same UPDATE returned, so the chain can be audited row by row.
+    """
+
+    CREDIT = "CREDIT"
+    DEBIT = "DEBIT"
+    OPENING = "OPENING"
+
+    KIND_CHOICES = [
+        (CREDIT, "Credit"),
+        (DEBIT, "Debit"),
+        (OPENING, "Opening balance"),
+    ]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="ledger_entries"
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2)
+    description = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "id"], name="ledger_user_id_idx"),
+            models.Index(fields=["user", "created_at"], name="ledger_user_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}: {self.amount} -> {self.balance_after}"
+
+
+class MoneyBoxSnapshot(models.Model):
+    """Balance of a user's Money Box after ledger entry `last_entry_id`."""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="balance_snapshots"
+    )
+    last_entry_id = models.BigIntegerField()
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    taken_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "taken_at"], name="snapshot_user_taken_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}: {self.balance} @ {self.taken_at:%Y-%m-%d}"
+
+
+class MoneyBoxHawl(models.Model):
+    """
+    Running hawl (lunar year) state of a user's Money Box, updated with
+    every balance change. `started_on` is when the balance last rose to the
+    Nisab, `min_balance` the lowest balance since then and `anniversary_on`
+    the day one Hijri year later when zakah falls due. A drop below the
+    Nisab clears the three fields.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="hawl")
+    started_on = models.DateField(null=True, blank=True)
+    min_balance = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    anniversary_on = models.DateField(null=True, blank=True, db_index=True)
+    last_completed_on = models.DateField(null=True, blank=True)
+    last_zakah_due = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        if not self.started_on:
+            return f"{self.user.username}: below Nisab"
+        return f"{self.user.username}: {self.started_on} -> {self.anniversary_on}"
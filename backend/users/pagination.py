@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class AdminUserCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the admin user directory. Orderings are limited
+    to unique (or effectively unique) indexed columns so every page is an
+    index range scan, however deep.
+    """
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = "id"
@@ -40,6 +40,39 @@ class UserSerializer(serializers.ModelSerializer):
             "admin_level",
         ]
 
+    def update(self, instance, validated_data):
+        # Only write the edited columns so a profile update never overwrites
+        # a Money Box balance changed by a concurrent request.
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
+
+class UserListSerializer(serializers.ModelSerializer):
+    """The columns the admin user directory shows; AdminUserListView loads only these."""
+
+    class Meta:
+        model = User
+        fields = [
+            "id",
+            "profile_pic",
+            "profile_picture",
+            "username",
+            "email",
+            "first_name",
+            "last_name",
+            "country",
+            "state",
+            "local_govt",
+            "ward",
+            "registration_number",
+            "is_approved_by_admin",
+            "is_staff",
+            "admin_level",
+        ]
+        read_only_fields = fields
+
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -0,0 +1,310 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max, Sum
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from zakah import hijri
+from zakah.models import ZakahNisab
+from .models import MoneyBoxHawl, MoneyBoxLedgerEntry, MoneyBoxSnapshot
+
+User = get_user_model()
+
+CENT = Decimal("0.01")
+ZAKAH_RATE = Decimal("0.025")
+HAWL_THRESHOLD_CACHE_KEY = "users:hawl-nisab"
+
+
+class InsufficientFunds(Exception):
+    """Raised when a Money Box debit would take the balance below zero."""
+
+
+def _balance_update(user_id, operator, amount, guard):
+    table = connection.ops.quote_name(User._meta.db_table)
+    column = connection.ops.quote_name(
+        User._meta.get_field("money_box_balance").column
+    )
+    pk = connection.ops.quote_name(User._meta.pk.column)
+    sql = (
+        f"UPDATE {table} SET {column} = {column} {operator} %s "
+        f"WHERE {pk} = %s"
+    )
+    params = [amount, user_id]
+    if guard:
+        sql += f" AND {column} >= %s"
+        params.append(amount)
+    sql += f" RETURNING {column}"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    return Decimal(str(row[0])).quantize(CENT)
+
+
+def _validate_amount(amount):
+    amount = Decimal(str(amount))
+    if amount <= 0:
+        raise ValueError("Amount must be greater than zero.")
+    return amount
+
+
+def credit_money_box(user, amount, description=""):
+    """
+    Adds `amount` to the user's Money Box in a single UPDATE ... RETURNING
+    and returns the new balance. Only the balance column is written, so
+    concurrent credits and debits never overwrite each other. The movement
+    is appended to the ledger in the same database transaction.
+    """
+    amount = _validate_amount(amount)
+    with transaction.atomic():
+        new_balance = _balance_update(user.pk, "+", amount, guard=False)
+        if new_balance is None:
+            raise User.DoesNotExist(f"User {user.pk} not found")
+        MoneyBoxLedgerEntry.objects.create(
+            user_id=user.pk,
+            kind=MoneyBoxLedgerEntry.CREDIT,
+            amount=amount,
+            balance_after=new_balance,
+            description=description[:255],
+        )
+        update_hawl(user.pk, new_balance)
+    user.money_box_balance = new_balance
+    return new_balance
+
+
+def debit_money_box(user, amount, description=""):
+    """
+    Subtracts `amount` only if the stored balance covers it
+    (`balance = balance - x WHERE balance >= x`) and returns the new
+    balance. Raises InsufficientFunds when the guard fails.
+    """
+    amount = _validate_amount(amount)
+    with transaction.atomic():
+        new_balance = _balance_update(user.pk, "-", amount, guard=True)
+        if new_balance is None:
+            raise InsufficientFunds("Insufficient funds in Money Box.")
+        MoneyBoxLedgerEntry.objects.create(
+            user_id=user.pk,
+            kind=MoneyBoxLedgerEntry.DEBIT,
+            amount=-amount,
+            balance_after=new_balance,
+            description=description[:255],
+        )
+        update_hawl(user.pk, new_balance)
+    user.money_box_balance = new_balance
+    return new_balance
+
+
+def balance_as_of(user, moment):
+    """
+    Money Box balance at `moment`: the latest snapshot taken by then plus
+    the ledger entries recorded after it.
+    """
+    snapshot = (
+        MoneyBoxSnapshot.objects.filter(user=user, taken_at__lte=moment)
+        .order_by("-taken_at", "-id")
+        .first()
+    )
+    tail = MoneyBoxLedgerEntry.objects.filter(user=user, created_at__lte=moment)
+    opening = Decimal("0.00")
+    if snapshot:
+        tail = tail.filter(id__gt=snapshot.last_entry_id)
+        opening = snapshot.balance
+    movement = tail.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
+    return opening + movement
+
+
+def statement(user, start, end):
+    """Opening balance at `start` and the ledger entries in [start, end)."""
+    entries = MoneyBoxLedgerEntry.objects.filter(
+        user=user, created_at__gte=start, created_at__lt=end
+    ).order_by("id")
+    return {
+        "opening_balance": balance_as_of(user, start),
+        "entries": list(entries),
+    }
+
+
+def audit_ledger(user):
+    """
+    Checks the stored balance against the ledger: the last entry's
+    `balance_after` and the snapshot-plus-tail sum must both match it.
+    """
+    user.refresh_from_db(fields=["money_box_balance"])
+    last = MoneyBoxLedgerEntry.objects.filter(user=user).order_by("-id").first()
+    last_balance = last.balance_after if last else Decimal("0.00")
+    snapshot = (
+        MoneyBoxSnapshot.objects.filter(user=user).order_by("-last_entry_id").first()
+    )
+    tail = MoneyBoxLedgerEntry.objects.filter(user=user)
+    replayed = Decimal("0.00")
+    if snapshot:
+        tail = tail.filter(id__gt=snapshot.last_entry_id)
+        replayed = snapshot.balance
+    replayed += tail.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
+    stored = user.money_box_balance
+    return {
+        "balance": stored,
+        "ledger_balance": last_balance,
+        "replayed_balance": replayed,
+        "ok": stored == last_balance == replayed,
+    }
+
+
+def take_balance_snapshots(chunk_size=1000):
+    """
+    Writes one snapshot for every user with ledger entries since the newest
+    snapshot. Returns the number of snapshots written.
+    """
+    watermark = (
+        MoneyBoxSnapshot.objects.aggregate(last=Max("last_entry_id"))["last"] or 0
+    )
+    latest_ids = list(
+        MoneyBoxLedgerEntry.objects.filter(id__gt=watermark)
+        .values("user_id")
+        .annotate(last_id=Max("id"))
+        .values_list("last_id", flat=True)
+    )
+    written = 0
+    for start in range(0, len(latest_ids), chunk_size):
+        ids = latest_ids[start:start + chunk_size]
+        entries = MoneyBoxLedgerEntry.objects.filter(id__in=ids).values_list(
+            "id", "user_id", "balance_after"
+        )
+        MoneyBoxSnapshot.objects.bulk_create(
+            [
+                MoneyBoxSnapshot(user_id=user_id, last_entry_id=entry_id, balance=balance)
+                for entry_id, user_id, balance in entries
+            ]
+        )
+        written += len(ids)
+    return written
+
+
+def hawl_threshold():
+    """
+    The Nisab in NGN used for hawl tracking (HAWL_NISAB_STANDARD: gold,
+    silver or the lower of the two), cached for ten minutes. None until
+    rates have been fetched.
+    """
+    threshold = cache.get(HAWL_THRESHOLD_CACHE_KEY)
+    if threshold is None:
+        nisab = ZakahNisab.objects.first()
+        if nisab is None:
+            return None
+        standard = getattr(settings, "HAWL_NISAB_STANDARD", "lower")
+        if standard == "gold":
+            threshold = nisab.nisab_gold_ngn
+        elif standard == "silver":
+            threshold = nisab.nisab_silver_ngn
+        else:
+            threshold = min(nisab.nisab_gold_ngn, nisab.nisab_silver_ngn)
+        threshold = Decimal(str(threshold))
+        cache.set(HAWL_THRESHOLD_CACHE_KEY, threshold, 600)
+    return threshold
+
+
+def hawl_anniversary(start):
+    """Same Hijri day one year after `start` (the last day of the month if it is shorter)."""
+    offset = hijri.nigeria_offset()
+    start_hijri = hijri.to_hijri(start, offset)
+    year = start_hijri.year + 1
+    day = min(start_hijri.day, hijri.month_length(year, start_hijri.month))
+    return hijri.to_gregorian(year, start_hijri.month, day, offset)
+
+
+def update_hawl(user_id, balance, today=None):
+    """
+    Folds a new Money Box balance into the user's hawl state: at or above
+    the Nisab it starts a hawl or lowers the running minimum; below it the
+    hawl is broken. Usually a single UPDATE.
+    """
+    threshold = hawl_threshold()
+    if threshold is None:
+        return
+    now = timezone.now()
+    active = MoneyBoxHawl.objects.filter(user_id=user_id, started_on__isnull=False)
+    if balance < threshold:
+        active.update(started_on=None, min_balance=None, anniversary_on=None, updated_at=now)
+        return
+    if active.update(min_balance=Least("min_balance", balance), updated_at=now):
+        return
+    today = today or timezone.localdate()
+    MoneyBoxHawl.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            "started_on": today,
+            "min_balance": balance,
+            "anniversary_on": hawl_anniversary(today),
+        },
+    )
+
+
+def process_hawls(today=None):
+    """
+    Daily hawl pass. Re-checks balances against today's Nisab (which moves
+    with prices), starts or breaks hawls accordingly, then lists every
+    member whose hawl completed by `today` with 2.5% of the current balance
+    due and starts their next hawl. Works from MoneyBoxHawl and the current
+    balances only; no transaction history is read.
+    """
+    threshold = hawl_threshold()
+    if threshold is None:
+        return {"broken": 0, "started": 0, "completed": []}
+    today = today or timezone.localdate()
+    now = timezone.now()
+
+    broken = MoneyBoxHawl.objects.filter(
+        started_on__isnull=False, user__money_box_balance__lt=threshold
+    ).update(started_on=None, min_balance=None, anniversary_on=None, updated_at=now)
+
+    starting = list(
+        User.objects.filter(money_box_balance__gte=threshold)
+        .exclude(hawl__started_on__isnull=False)
+        .values_list("id", "money_box_balance")
+    )
+    anniversary = hawl_anniversary(today)
+    MoneyBoxHawl.objects.bulk_create(
+        [
+            MoneyBoxHawl(user_id=user_id, started_on=today, min_balance=balance, anniversary_on=anniversary)
+            for user_id, balance in starting
+        ],
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=["started_on", "min_balance", "anniversary_on", "updated_at"],
+        batch_size=1000,
+    )
+
+    completed = []
+    due = list(
+        MoneyBoxHawl.objects.filter(started_on__isnull=False, anniversary_on__lte=today)
+        .select_related("user")
+        .only("id", "anniversary_on", "user__id", "user__username", "user__money_box_balance")
+    )
+    for hawl in due:
+        balance = hawl.user.money_box_balance
+        zakah_due = (balance * ZAKAH_RATE).quantize(CENT)
+        completed.append({
+            "user_id": hawl.user.id,
+            "username": hawl.user.username,
+            "hawl_completed_on": hawl.anniversary_on,
+            "balance": balance,
+            "zakah_due": zakah_due,
+        })
+        hawl.last_completed_on = hawl.anniversary_on
+        hawl.last_zakah_due = zakah_due
+        hawl.started_on = hawl.anniversary_on
+        hawl.anniversary_on = hawl_anniversary(hawl.anniversary_on)
+        hawl.min_balance = balance
+        hawl.updated_at = now
+    MoneyBoxHawl.objects.bulk_update(
+        due,
+        ["last_completed_on", "last_zakah_due", "started_on", "anniversary_on", "min_balance", "updated_at"],
+        batch_size=1000,
+    )
+    return {"broken": broken, "started": len(starting), "completed": completed}
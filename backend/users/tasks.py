@@ -0,0 +1,28 @@
+import logging
+
+from celery import shared_task
+
+from .services import process_hawls, take_balance_snapshots
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def snapshot_money_box_balances():
+    return take_balance_snapshots()
+
+
+@shared_task
+def process_completed_hawls():
+    result = process_hawls()
+    for item in result["completed"]:
+        logger.info(
+            "Hawl completed for %s on %s: zakah due %s",
+            item["username"], item["hawl_completed_on"], item["zakah_due"],
+        )
+    return {
+        "broken": result["broken"],
+        "started": result["started"],
+        "completed": len(result["completed"]),
+        "zakah_due": str(sum((item["zakah_due"] for item in result["completed"]), 0)),
+    }
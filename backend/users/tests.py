@@ -1,6 +1,25 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from decimal import Decimal
+from django.utils import timezone
+from datetime import date
+from django.core.cache import cache
+from unittest.mock import patch
+from rest_framework.test import APIClient
+from zakah.models import ZakahNisab
+from donations.models import Transaction
+from .models import MoneyBoxHawl, MoneyBoxLedgerEntry
+from .pagination import AdminUserCursorPagination
+from .services import (
+    credit_money_box,
+    debit_money_box,
+    InsufficientFunds,
+    balance_as_of,
+    audit_ledger,
+    take_balance_snapshots,
+    hawl_anniversary,
+    process_hawls,
+)
 
 User = get_user_model()
 
@@ -31,3 +50,199 @@ class UserRegistrationTests(TestCase):
         user2 = User.objects.create_user(username='u2', first_name='Ahmed')
         
         self.assertNotEqual(user1.registration_number, user2.registration_number)
+
+
+class MoneyBoxServiceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='boxuser', first_name='Box')
+
+    def test_credit_and_debit_return_new_balance(self):
+        self.assertEqual(credit_money_box(self.user, Decimal('1500.50')), Decimal('1500.50'))
+        self.assertEqual(debit_money_box(self.user, Decimal('500.25')), Decimal('1000.25'))
+        self.assertEqual(self.user.money_box_balance, Decimal('1000.25'))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.money_box_balance, Decimal('1000.25'))
+
+    def test_debit_guard(self):
+        credit_money_box(self.user, Decimal('100'))
+        with self.assertRaises(InsufficientFunds):
+            debit_money_box(self.user, Decimal('100.01'))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.money_box_balance, Decimal('100.00'))
+
+    def test_stale_instance_does_not_lose_updates(self):
+        stale = User.objects.get(pk=self.user.pk)
+        credit_money_box(self.user, Decimal('300'))
+        credit_money_box(stale, Decimal('200'))
+        self.assertEqual(stale.money_box_balance, Decimal('500.00'))
+
+    def test_ledger_records_each_movement(self):
+        credit_money_box(self.user, Decimal('1000'), 'Deposit')
+        debit_money_box(self.user, Decimal('250'), 'Donation')
+
+        entries = list(MoneyBoxLedgerEntry.objects.filter(user=self.user).order_by('id'))
+        self.assertEqual([e.amount for e in entries], [Decimal('1000.00'), Decimal('-250.00')])
+        self.assertEqual(entries[-1].balance_after, Decimal('750.00'))
+        self.assertTrue(audit_ledger(self.user)['ok'])
+
+    def test_snapshot_plus_tail(self):
+        credit_money_box(self.user, Decimal('1000'))
+        self.assertEqual(take_balance_snapshots(), 1)
+        debit_money_box(self.user, Decimal('400'))
+
+        self.assertEqual(balance_as_of(self.user, timezone.now()), Decimal('600.00'))
+        self.assertTrue(audit_ledger(self.user)['ok'])
+        # Only users with new entries get another snapshot
+        self.assertEqual(take_balance_snapshots(), 1)
+        self.assertEqual(take_balance_snapshots(), 0)
+
+
+class HawlTrackingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ZakahNisab.objects.create(
+            gold_price_usd=2000, silver_price_usd=25, usd_ngn_rate=1000,
+            nisab_gold_ngn=Decimal("5000000.00"), nisab_silver_ngn=Decimal("500000.00")
+        )
+        self.user = User.objects.create_user(username="saver", first_name="Saver")
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_balance_changes_update_hawl(self):
+        credit_money_box(self.user, "400000")
+        self.assertFalse(MoneyBoxHawl.objects.filter(user=self.user).exists())
+
+        credit_money_box(self.user, "200000")
+        hawl = MoneyBoxHawl.objects.get(user=self.user)
+        self.assertEqual(hawl.started_on, timezone.localdate())
+        self.assertEqual(hawl.anniversary_on, hawl_anniversary(hawl.started_on))
+        self.assertEqual(hawl.min_balance, Decimal("600000.00"))
+
+        debit_money_box(self.user, "50000")
+        hawl.refresh_from_db()
+        self.assertEqual(hawl.min_balance, Decimal("550000.00"))
+
+        debit_money_box(self.user, "100000")
+        hawl.refresh_from_db()
+        self.assertIsNone(hawl.started_on)
+
+    def test_anniversary_is_one_hijri_year(self):
+        # 1 Ramadan 1447 -> 1 Ramadan 1448
+        self.assertEqual(hawl_anniversary(date(2026, 2, 18)), date(2027, 2, 8))
+
+    def test_daily_pass_lists_completed_hawls(self):
+        credit_money_box(self.user, "1000000")
+        MoneyBoxHawl.objects.filter(user=self.user).update(
+            started_on=date(2025, 1, 1), anniversary_on=date(2025, 12, 21)
+        )
+        poor = User.objects.create_user(username="poor", first_name="Poor")
+        MoneyBoxHawl.objects.create(user=poor, started_on=date(2025, 6, 1), anniversary_on=date(2026, 5, 21))
+
+        result = process_hawls(today=date(2026, 1, 1))
+
+        self.assertEqual(result["broken"], 1)
+        self.assertEqual(len(result["completed"]), 1)
+        self.assertEqual(result["completed"][0]["zakah_due"], Decimal("25000.00"))
+        hawl = MoneyBoxHawl.objects.get(user=self.user)
+        self.assertEqual(hawl.last_completed_on, date(2025, 12, 21))
+        self.assertEqual(hawl.started_on, date(2025, 12, 21))
+        self.assertEqual(hawl.anniversary_on, hawl_anniversary(date(2025, 12, 21)))
+
+
+class AdminUserDirectoryTests(TestCase):
+    url = "/auth/admin/users/"
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="kanoadmin", first_name="Kano", admin_level="STATE", state="Kano"
+        )
+        for i in range(5):
+            User.objects.create_user(
+                username=f"member{i}", first_name=f"Member{i}", state="Kano", local_govt="Fagge"
+            )
+        User.objects.create_user(username="lagosian", first_name="Lagos", state="Lagos")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_paginated_by_default_and_scoped_to_region(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        rows = response.data["results"]
+        self.assertEqual(len(rows), 6)
+        self.assertIsNone(response.data["next"])
+        self.assertNotIn("money_box_balance", rows[0])
+        self.assertNotIn("lagosian", [row["username"] for row in rows])
+
+    def test_page_size_is_capped(self):
+        with patch.object(AdminUserCursorPagination, "max_page_size", 4):
+            response = self.client.get(self.url, {"page_size": 10000})
+        self.assertEqual(len(response.data["results"]), 4)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_cursor_pages_search_and_ordering(self):
+        seen = []
+        response = self.client.get(self.url, {"page_size": 2, "ordering": "-username"})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row["username"] for row in response.data["results"])
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(len(seen), 6)
+
+        response = self.client.get(self.url, {"search": "member3"})
+        self.assertEqual([row["username"] for row in response.data["results"]], ["member3"])
+
+    def test_national_admin_can_narrow(self):
+        self.admin.admin_level = "NATIONAL"
+        self.admin.save(update_fields=["admin_level"])
+        response = self.client.get(self.url, {"state": "Lagos"})
+        self.assertEqual([row["username"] for row in response.data["results"]], ["lagosian"])
+
+    def test_status_and_role_filters(self):
+        User.objects.filter(username="member1").update(is_approved_by_admin=True)
+        response = self.client.get(self.url, {"approved": "true"})
+        self.assertEqual([row["username"] for row in response.data["results"]], ["member1"])
+        response = self.client.get(self.url, {"admins": "true"})
+        self.assertEqual([row["username"] for row in response.data["results"]], ["kanoadmin"])
+        response = self.client.get(self.url, {"admins": "false", "approved": "false"})
+        self.assertEqual(len(response.data["results"]), 4)
+
+
+class UserAdminMoneyBoxTests(TestCase):
+    def setUp(self):
+        self.superuser = User.objects.create_superuser(username="root", email="root@example.com", password="pw")
+        self.member = User.objects.create_user(username="member", first_name="Member", email="m@example.com")
+        credit_money_box(self.member, Decimal("100.00"))
+        self.client.force_login(self.superuser)
+        self.url = f"/admin/users/user/{self.member.pk}/change/"
+
+    def _post(self, **extra):
+        data = {
+            "username": "member",
+            "email": "m@example.com",
+            "country": "Nigeria",
+            "admin_level": "NONE",
+            "date_joined_0": "2026-01-01",
+            "date_joined_1": "00:00:00",
+            "is_active": "on",
+            "registration_number": self.member.registration_number,
+        }
+        data.update(extra)
+        return self.client.post(self.url, data)
+
+    def test_balance_is_read_only_and_adjustments_use_the_ledger(self):
+        response = self._post(money_box_balance="999999", money_box_adjustment="-40", adjustment_note="refund")
+        self.assertEqual(response.status_code, 302)
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.money_box_balance, Decimal("60.00"))
+        self.assertEqual(
+            MoneyBoxLedgerEntry.objects.filter(user=self.member).order_by("-id").first().amount,
+            Decimal("-40.00"),
+        )
+        self.assertTrue(audit_ledger(self.member)["ok"])
+        self.assertTrue(
+            Transaction.objects.filter(user=self.member, transaction_type="WITHDRAWAL", amount=Decimal("40.00")).exists()
+        )
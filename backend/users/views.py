@@ -1,4 +1,4 @@
-from rest_framework import generics, permissions, status
+from rest_framework import filters, generics, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
@@ -9,10 +9,12 @@ from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from .serializers import (
     RegisterSerializer,
     UserSerializer,
+    UserListSerializer,
     ApprovedUserTokenObtainPairSerializer,
     AdminChatMessageSerializer,
 )
 from .models import AdminChatMessage
+from .pagination import AdminUserCursorPagination
 
 User = get_user_model()
 
@@ -36,25 +38,49 @@ class ProfileView(generics.RetrieveUpdateAPIView):
 
 
 class AdminUserListView(generics.ListAPIView):
-    serializer_class = UserSerializer
+    """
+    Users in the admin's region. `?search=` matches the start of the
+    username or name, or an exact registration number or email;
+    `?ordering=` is id or username (either direction); national admins
+    can narrow with `?state=&local_govt=&ward=`, and anyone with
+    `?approved=true|false` and `?admins=true|false`. Results come in cursor
+    pages (`page_size` up to 200; follow `next`).
+    """
+    serializer_class = UserListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AdminUserCursorPagination
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ["^username", "^first_name", "^last_name", "=registration_number", "=email"]
+    ordering_fields = ["id", "username"]
+    ordering = ["id"]
 
     def get_queryset(self):
         admin = self.request.user
         is_admin_level = getattr(admin, "admin_level", "NONE") != "NONE"
         if not (is_admin_level or admin.is_staff or admin.is_superuser):
             raise PermissionDenied("You are not an admin user.")
-        qs = User.objects.all().order_by("id")
-        if admin.admin_level == "NATIONAL":
-            return qs
+        qs = User.objects.only(*UserListSerializer.Meta.fields)
         if admin.admin_level == "STATE":
-            return qs.filter(state=admin.state)
-        if admin.admin_level == "LOCAL_GOVT":
-            return qs.filter(state=admin.state, local_govt=admin.local_govt)
-        if admin.admin_level == "WARD":
-            return qs.filter(
+            qs = qs.filter(state=admin.state)
+        elif admin.admin_level == "LOCAL_GOVT":
+            qs = qs.filter(state=admin.state, local_govt=admin.local_govt)
+        elif admin.admin_level == "WARD":
+            qs = qs.filter(
                 state=admin.state, local_govt=admin.local_govt, ward=admin.ward
             )
+        # Narrowing inside the scope; the scope's own filters still apply
+        for field in ("state", "local_govt", "ward"):
+            value = self.request.query_params.get(field)
+            if value:
+                qs = qs.filter(**{field: value})
+        approved = self.request.query_params.get("approved")
+        if approved in ("true", "false"):
+            qs = qs.filter(is_approved_by_admin=approved == "true")
+        admins = self.request.query_params.get("admins")
+        if admins == "true":
+            qs = qs.exclude(admin_level="NONE")
+        elif admins == "false":
+            qs = qs.filter(admin_level="NONE")
         return qs
 
 
@@ -73,7 +99,7 @@ class AdminApproveUserView(APIView):
                 {"error": "User not found"}, status=status.HTTP_404_NOT_FOUND
             )
         user.is_approved_by_admin = True
-        user.save()
+        user.save(update_fields=["is_approved_by_admin"])
         return Response({"status": "approved"})
 
 
@@ -185,7 +211,7 @@ class AdminPromoteUserView(APIView):
 
         user.admin_level = level
         user.is_staff = True
-        user.save()
+        user.save(update_fields=["admin_level", "is_staff"])
         return Response({"status": "promoted", "admin_level": user.admin_level})
 
 
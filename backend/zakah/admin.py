@@ -1,3 +1,9 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import NisabPricePoint
+
+
+@admin.register(NisabPricePoint)
+class NisabPricePointAdmin(admin.ModelAdmin):
+    list_display = ("recorded_at", "gold_price_usd", "silver_price_usd", "usd_ngn_rate", "nisab_gold_ngn")
+    date_hierarchy = "recorded_at"
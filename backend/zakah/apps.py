@@ -1,5 +1,16 @@
+import logging
+
 from django.apps import AppConfig
 
+logger = logging.getLogger(__name__)
+
 
 class ZakahConfig(AppConfig):
     name = 'zakah'
+
+    def ready(self):
+        from .checks import check_nisab_lock_cache
+
+        # Workers and WSGI servers never run system checks, so say it at startup too
+        for message in check_nisab_lock_cache(None):
+            logger.warning("%s %s", message.msg, message.hint)
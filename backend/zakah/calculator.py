@@ -0,0 +1,75 @@
+"""
+Zakah on wealth for one or many portfolios at once.
+
+A portfolio is a dict of NGN amounts and metal weights (see ASSET_FIELDS).
+Each field is turned into a float64 column, so a batch of any size is a
+handful of array operations against the current Nisab prices. Amounts are
+rounded to kobo on the way out.
+"""
+from decimal import Decimal
+
+import numpy as np
+
+GRAMS_PER_OUNCE = Decimal("31.1035")
+ZAKAH_RATE = 0.025
+
+ASSET_FIELDS = ("cash", "money_box", "gold_grams", "silver_grams", "trade_goods", "debts")
+STANDARDS = ("lower", "gold", "silver")
+
+
+class Prices:
+    """NGN prices per gram and the Nisab thresholds taken from a ZakahNisab row."""
+
+    def __init__(self, nisab):
+        usd_ngn = Decimal(str(nisab.usd_ngn_rate))
+        self.gold_per_gram = float(Decimal(str(nisab.gold_price_usd)) / GRAMS_PER_OUNCE * usd_ngn)
+        self.silver_per_gram = float(Decimal(str(nisab.silver_price_usd)) / GRAMS_PER_OUNCE * usd_ngn)
+        self.nisab_gold = float(nisab.nisab_gold_ngn)
+        self.nisab_silver = float(nisab.nisab_silver_ngn)
+
+    def threshold(self, standard):
+        if standard == "gold":
+            return self.nisab_gold
+        if standard == "silver":
+            return self.nisab_silver
+        return min(self.nisab_gold, self.nisab_silver)
+
+
+def to_columns(portfolios):
+    """
+    Converts a list of portfolio dicts to one float64 array per field.
+    Missing fields count as 0; negative or non-numeric values raise ValueError.
+    """
+    columns = {}
+    for field in ASSET_FIELDS:
+        column = np.fromiter(
+            (p.get(field) or 0 for p in portfolios), dtype=np.float64, count=len(portfolios)
+        )
+        if not np.isfinite(column).all() or (column < 0).any():
+            raise ValueError(f"{field} must be a non-negative number")
+        columns[field] = column
+    return columns
+
+
+def calculate(columns, prices, standard="lower"):
+    """Returns (net_wealth, zakah_due, liable) arrays for the portfolio columns."""
+    net = (
+        columns["cash"]
+        + columns["money_box"]
+        + columns["gold_grams"] * prices.gold_per_gram
+        + columns["silver_grams"] * prices.silver_per_gram
+        + columns["trade_goods"]
+        - columns["debts"]
+    )
+    liable = net >= prices.threshold(standard)
+    due = np.where(liable, net * ZAKAH_RATE, 0.0)
+    return np.round(net, 2), np.round(due, 2), liable
+
+
+def summarize(net, due, liable):
+    return {
+        "portfolios": int(net.size),
+        "liable": int(liable.sum()),
+        "total_net_wealth": round(float(net.sum()), 2),
+        "total_zakah_due": round(float(due.sum()), 2),
+    }
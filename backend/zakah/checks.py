@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Cache backends whose keys are only visible to the process that wrote them
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_nisab_lock_cache(app_configs, **kwargs):
+    """
+    The Nisab refresh lock is a cache.add on the default cache. With a
+    process-local backend every web and worker process gets its own lock,
+    so a stale row can queue one refresh per process.
+    """
+    if settings.DEBUG:
+        return []
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            "The default cache is not shared between processes, so the Nisab "
+            "refresh lock only holds within one process.",
+            hint="Set CACHE_URL to a Redis instance every web and worker process can reach.",
+            obj=backend,
+            id="zakah.W001",
+        )
+    ]
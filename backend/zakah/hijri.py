@@ -0,0 +1,143 @@
+"""
+Tabular (arithmetic) Islamic calendar.
+
+Uses the common civil epoch (1 Muharram 1 AH = 16 July 622 Julian) and the
+30-year cycle with leap years 2, 5, 7, 10, 13, 16, 18, 21, 24, 26 and 29.
+Odd months have 30 days, even months 29, and Dhul Hijjah 30 in leap years.
+The tabular date can differ from a moon-sighted one by a day or two; pass
+`offset` (days added to the Hijri date, so -1 starts every month a day
+later) to shift it, e.g. HIJRI_NIGERIA_OFFSET_DAYS for Nigeria.
+"""
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.conf import settings
+
+EPOCH_JDN = 1948440
+ORDINAL_TO_JDN = 1721425
+
+MONTHS = (
+    ("Muharram", "محرم"),
+    ("Safar", "صفر"),
+    ("Rabi' al-Awwal", "ربيع الأول"),
+    ("Rabi' al-Thani", "ربيع الآخر"),
+    ("Jumada al-Ula", "جمادى الأولى"),
+    ("Jumada al-Akhirah", "جمادى الآخرة"),
+    ("Rajab", "رجب"),
+    ("Sha'ban", "شعبان"),
+    ("Ramadan", "رمضان"),
+    ("Shawwal", "شوال"),
+    ("Dhul Qa'dah", "ذو القعدة"),
+    ("Dhul Hijjah", "ذو الحجة"),
+)
+
+# (month, day, name)
+HOLIDAYS = (
+    (1, 1, "Islamic New Year"),
+    (1, 10, "Ashura"),
+    (3, 12, "Mawlid an-Nabi"),
+    (7, 27, "Isra and Mi'raj"),
+    (9, 1, "Start of Ramadan"),
+    (9, 27, "Laylat al-Qadr"),
+    (10, 1, "Eid al-Fitr"),
+    (12, 9, "Day of Arafah"),
+    (12, 10, "Eid al-Adha"),
+)
+
+
+class HijriDate(namedtuple("HijriDate", "year month day")):
+    __slots__ = ()
+
+    @property
+    def month_name(self):
+        return MONTHS[self.month - 1][0]
+
+    @property
+    def arabic_month_name(self):
+        return MONTHS[self.month - 1][1]
+
+    def __str__(self):
+        return f"{self.day} {self.month_name} {self.year} AH"
+
+    def arabic(self):
+        return f"{self.day} {self.arabic_month_name} {self.year} هـ"
+
+
+def nigeria_offset():
+    return getattr(settings, "HIJRI_NIGERIA_OFFSET_DAYS", 0)
+
+
+def is_leap_year(year):
+    return (14 + 11 * year) % 30 < 11
+
+
+def month_length(year, month):
+    if month == 12 and is_leap_year(year):
+        return 30
+    return 30 if month % 2 else 29
+
+
+def _to_jdn(year, month, day):
+    return (
+        day
+        + (59 * (month - 1) + 1) // 2
+        + (year - 1) * 354
+        + (3 + 11 * year) // 30
+        + EPOCH_JDN - 1
+    )
+
+
+def to_gregorian(year, month, day, offset=0):
+    """Gregorian date of a Hijri date (in the calendar shifted by `offset` days)."""
+    if not 1 <= month <= 12 or not 1 <= day <= month_length(year, month):
+        raise ValueError(f"Invalid Hijri date {year}-{month}-{day}")
+    return date.fromordinal(_to_jdn(year, month, day) - ORDINAL_TO_JDN) - timedelta(days=offset)
+
+
+def to_hijri(day, offset=0):
+    """Hijri date of Gregorian `day`; a positive `offset` moves the Hijri calendar ahead."""
+    jdn = (day + timedelta(days=offset)).toordinal() + ORDINAL_TO_JDN
+    year = (30 * (jdn - EPOCH_JDN) + 10646) // 10631
+    month = min(12, (2 * (jdn - 29 - _to_jdn(year, 1, 1)) + 58) // 59 + 1)
+    return HijriDate(year, month, jdn - _to_jdn(year, month, 1) + 1)
+
+
+def convert_range(start, end, offset=0):
+    """Yields (gregorian, hijri) for every day in [start, end], one conversion per month boundary."""
+    current = start
+    hijri = to_hijri(current, offset)
+    while current <= end:
+        yield current, hijri
+        current += timedelta(days=1)
+        if hijri.day < month_length(hijri.year, hijri.month):
+            hijri = HijriDate(hijri.year, hijri.month, hijri.day + 1)
+        else:
+            hijri = to_hijri(current, offset)
+
+
+def month_grid(year, month, offset=0):
+    """Every day of a Hijri month with its Gregorian date and weekday (Monday=0)."""
+    first = to_gregorian(year, month, 1, offset)
+    return [
+        {
+            "hijri_day": n + 1,
+            "gregorian": first + timedelta(days=n),
+            "weekday": (first + timedelta(days=n)).weekday(),
+        }
+        for n in range(month_length(year, month))
+    ]
+
+
+def upcoming_holidays(start, count=5, offset=0):
+    """The next `count` holidays on or after Gregorian `start`."""
+    year = to_hijri(start, offset).year
+    found = []
+    while len(found) < count:
+        for month, day, name in HOLIDAYS:
+            gregorian = to_gregorian(year, month, day, offset)
+            if gregorian >= start:
+                found.append({"name": name, "hijri": HijriDate(year, month, day), "gregorian": gregorian})
+                if len(found) == count:
+                    break
+        year += 1
+    return found
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zakah', '0003_dashboardislamiccard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zakahnisab',
+            name='fallback_sources',
+            field=models.JSONField(blank=True, default=list, help_text='Price sources that failed and used a fallback value on the last refresh'),
+        ),
+    ]
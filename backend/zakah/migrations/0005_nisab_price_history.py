@@ -0,0 +1,83 @@
+# Generated by Django 6.0 on 2026-10-17 16:20
+
+from datetime import timedelta
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_history(apps, schema_editor):
+    # Start the history with the current rates
+    ZakahNisab = apps.get_model('zakah', 'ZakahNisab')
+    NisabPricePoint = apps.get_model('zakah', 'NisabPricePoint')
+    NisabPriceBucket = apps.get_model('zakah', 'NisabPriceBucket')
+    fields = ('gold_price_usd', 'silver_price_usd', 'usd_ngn_rate', 'nisab_gold_ngn', 'nisab_silver_ngn')
+    for nisab in ZakahNisab.objects.all():
+        values = {field: getattr(nisab, field) for field in fields}
+        NisabPricePoint.objects.create(recorded_at=nisab.last_updated, **values)
+        day = timezone.localdate(nisab.last_updated)
+        starts = {
+            'daily': day,
+            'weekly': day - timedelta(days=day.weekday()),
+            'monthly': day.replace(day=1),
+        }
+        for resolution, period_start in starts.items():
+            NisabPriceBucket.objects.get_or_create(
+                resolution=resolution,
+                period_start=period_start,
+                defaults=dict(
+                    values,
+                    gold_high_usd=nisab.gold_price_usd,
+                    gold_low_usd=nisab.gold_price_usd,
+                    samples=1,
+                    last_recorded_at=nisab.last_updated,
+                ),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zakah', '0004_nisab_fallback_sources'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NisabPricePoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recorded_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('gold_price_usd', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('silver_price_usd', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('usd_ngn_rate', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('nisab_gold_ngn', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('nisab_silver_ngn', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('fallback_sources', models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                'ordering': ['-recorded_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NisabPriceBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly'), ('monthly', 'Monthly')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('gold_price_usd', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('silver_price_usd', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('usd_ngn_rate', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('nisab_gold_ngn', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('nisab_silver_ngn', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('gold_high_usd', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('gold_low_usd', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('last_recorded_at', models.DateTimeField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('resolution', 'period_start'), name='unique_nisab_price_bucket')],
+            },
+        ),
+        migrations.RunPython(seed_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-17 16:45
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def drop_duplicate_titles(apps, schema_editor):
+    # Keep the newest card per title before making the title unique
+    DashboardIslamicCard = apps.get_model('zakah', 'DashboardIslamicCard')
+    keep = DashboardIslamicCard.objects.values('title').annotate(last=Max('id')).values_list('last', flat=True)
+    DashboardIslamicCard.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zakah', '0005_nisab_price_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapedPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(unique=True)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('content_hash', models.CharField(blank=True, max_length=64)),
+                ('checked_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='dashboardislamiccard',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='Hash of the displayed fields, to skip unchanged writes', max_length=64),
+        ),
+        migrations.RunPython(drop_duplicate_titles, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='dashboardislamiccard',
+            name='title',
+            field=models.CharField(max_length=128, unique=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-17 17:05
+
+from django.db import migrations
+
+
+def remove_crops(apps, schema_editor):
+    # Used to be deleted on every Nisab refresh
+    ZakahReference = apps.get_model('zakah', 'ZakahReference')
+    ZakahReference.objects.filter(key='crops').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zakah', '0006_scraped_pages'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_crops, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-17 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zakah', '0007_remove_crops_reference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zakahnisab',
+            name='fx_rates',
+            field=models.JSONField(blank=True, default=dict, help_text='Units of each currency per USD, as strings'),
+        ),
+        migrations.AddField(
+            model_name='zakahnisab',
+            name='nisab_by_currency',
+            field=models.JSONField(blank=True, default=dict, help_text='Gold and silver Nisab per currency, precomputed at refresh'),
+        ),
+    ]
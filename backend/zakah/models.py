@@ -1,4 +1,10 @@
+from datetime import timedelta
+
 from django.db import models
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from core.db import upsert
 
 
 class ZakahNisab(models.Model):
@@ -7,6 +13,9 @@ class ZakahNisab(models.Model):
     usd_ngn_rate = models.DecimalField(max_digits=10, decimal_places=2, help_text="Exchange rate USD to NGN")
     nisab_gold_ngn = models.DecimalField(max_digits=15, decimal_places=2)
     nisab_silver_ngn = models.DecimalField(max_digits=15, decimal_places=2)
+    fallback_sources = models.JSONField(default=list, blank=True, help_text="Price sources that failed and used a fallback value on the last refresh")
+    fx_rates = models.JSONField(default=dict, blank=True, help_text="Units of each currency per USD, as strings")
+    nisab_by_currency = models.JSONField(default=dict, blank=True, help_text="Gold and silver Nisab per currency, precomputed at refresh")
     last_updated = models.DateTimeField(auto_now=True)
 
     def __str__(self):
@@ -25,12 +34,13 @@ class ZakahReference(models.Model):
 
 
 class DashboardIslamicCard(models.Model):
-    title = models.CharField(max_length=128)
+    title = models.CharField(max_length=128, unique=True)
     arabic_title = models.CharField(max_length=128, blank=True)
     content = models.TextField()
     arabic_content = models.TextField(blank=True)
     icon_name = models.CharField(max_length=64, blank=True) # For frontend icons
     order = models.IntegerField(default=0)
+    content_hash = models.CharField(max_length=64, blank=True, help_text="Hash of the displayed fields, to skip unchanged writes")
     last_updated = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -38,3 +48,101 @@ class DashboardIslamicCard(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class ScrapedPage(models.Model):
+    """Validators and body hash of the last processed download of a scraped page."""
+    url = models.URLField(unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
+    checked_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.url
+
+
+class NisabPricePoint(models.Model):
+    """One row per Nisab refresh; ZakahNisab only holds the latest."""
+    recorded_at = models.DateTimeField(default=timezone.now, db_index=True)
+    gold_price_usd = models.DecimalField(max_digits=10, decimal_places=2)
+    silver_price_usd = models.DecimalField(max_digits=10, decimal_places=2)
+    usd_ngn_rate = models.DecimalField(max_digits=10, decimal_places=2)
+    nisab_gold_ngn = models.DecimalField(max_digits=15, decimal_places=2)
+    nisab_silver_ngn = models.DecimalField(max_digits=15, decimal_places=2)
+    fallback_sources = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ["-recorded_at"]
+
+    def __str__(self):
+        return f"Nisab at {self.recorded_at:%Y-%m-%d %H:%M}: {self.nisab_gold_ngn} NGN"
+
+
+class NisabPriceBucket(models.Model):
+    """
+    Daily, weekly and monthly summaries of NisabPricePoint, updated as each
+    point is written, so history charts never scan the raw points. Each
+    bucket keeps the last (closing) value of every series plus the gold
+    price range.
+    """
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+    RESOLUTIONS = (
+        (DAILY, "Daily"),
+        (WEEKLY, "Weekly"),
+        (MONTHLY, "Monthly"),
+    )
+    CLOSE_FIELDS = ("gold_price_usd", "silver_price_usd", "usd_ngn_rate", "nisab_gold_ngn", "nisab_silver_ngn")
+
+    resolution = models.CharField(max_length=10, choices=RESOLUTIONS)
+    period_start = models.DateField()
+    gold_price_usd = models.DecimalField(max_digits=10, decimal_places=2)
+    silver_price_usd = models.DecimalField(max_digits=10, decimal_places=2)
+    usd_ngn_rate = models.DecimalField(max_digits=10, decimal_places=2)
+    nisab_gold_ngn = models.DecimalField(max_digits=15, decimal_places=2)
+    nisab_silver_ngn = models.DecimalField(max_digits=15, decimal_places=2)
+    gold_high_usd = models.DecimalField(max_digits=10, decimal_places=2)
+    gold_low_usd = models.DecimalField(max_digits=10, decimal_places=2)
+    samples = models.PositiveIntegerField(default=0)
+    last_recorded_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["resolution", "period_start"], name="unique_nisab_price_bucket"),
+        ]
+
+    def __str__(self):
+        return f"{self.resolution} {self.period_start}: {self.nisab_gold_ngn} NGN"
+
+    @staticmethod
+    def period_start_for(resolution, day):
+        if resolution == NisabPriceBucket.WEEKLY:
+            return day - timedelta(days=day.weekday())
+        if resolution == NisabPriceBucket.MONTHLY:
+            return day.replace(day=1)
+        return day
+
+    @classmethod
+    def record(cls, point):
+        """Folds a new price point into its daily, weekly and monthly buckets."""
+        day = timezone.localdate(point.recorded_at)
+        closes = {field: getattr(point, field) for field in cls.CLOSE_FIELDS}
+        for resolution, _ in cls.RESOLUTIONS:
+            key = {"resolution": resolution, "period_start": cls.period_start_for(resolution, day)}
+            changes = dict(
+                closes,
+                gold_high_usd=Greatest("gold_high_usd", point.gold_price_usd),
+                gold_low_usd=Least("gold_low_usd", point.gold_price_usd),
+                samples=models.F("samples") + 1,
+                last_recorded_at=point.recorded_at,
+            )
+            create_values = dict(
+                closes,
+                gold_high_usd=point.gold_price_usd,
+                gold_low_usd=point.gold_price_usd,
+                samples=1,
+                last_recorded_at=point.recorded_at,
+            )
+            upsert(cls, key, changes, create_values)
@@ -0,0 +1,288 @@
+import threading
+import time
+from collections import deque
+from decimal import Decimal, InvalidOperation
+
+import requests
+from django.conf import settings
+
+GOLD = "gold"
+SILVER = "silver"
+FX = "fx"  # the whole table of currency units per USD
+QUOTES = (FX, GOLD, SILVER)
+
+
+class PriceUnavailable(Exception):
+    """Raised when no source could provide a quote."""
+
+
+def to_decimal(value):
+    """A quote as Decimal, or a {currency: Decimal} table for FX quotes."""
+    if isinstance(value, dict):
+        return {code: Decimal(str(rate)) for code, rate in value.items()}
+    return Decimal(str(value))
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_after` seconds. After that one trial call is let through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=3, reset_after=300):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class PriceSource:
+    """
+    One place a quote can come from. Subclasses implement `_fetch`; `fetch`
+    adds the circuit breaker, a short-lived response cache and latency
+    counters around it.
+    """
+
+    SAMPLE_SIZE = 200
+
+    def __init__(self, name, quote, cache_ttl=None, breaker=None):
+        self.name = name
+        self.quote = quote
+        self.cache_ttl = cache_ttl if cache_ttl is not None else getattr(settings, "ZAKAH_PRICE_CACHE_SECONDS", 300)
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=getattr(settings, "ZAKAH_BREAKER_FAILURES", 3),
+            reset_after=getattr(settings, "ZAKAH_BREAKER_RESET_SECONDS", 300),
+        )
+        self._lock = threading.Lock()
+        self._cached = None
+        self._cached_at = None
+        self._samples = deque(maxlen=self.SAMPLE_SIZE)
+        self.calls = 0
+        self.errors = 0
+        self.skipped = 0
+
+    def _fetch(self, timeout):
+        raise NotImplementedError
+
+    def fetch(self, timeout):
+        with self._lock:
+            if self._cached is not None and time.monotonic() - self._cached_at < self.cache_ttl:
+                return self._cached
+        if not self.breaker.allow():
+            with self._lock:
+                self.skipped += 1
+            raise PriceUnavailable(f"{self.name}: circuit open")
+
+        started = time.monotonic()
+        try:
+            value = self._fetch(timeout)
+        except (requests.RequestException, ValueError, KeyError, IndexError, TypeError, InvalidOperation) as exc:
+            self._record(time.monotonic() - started, ok=False)
+            self.breaker.record_failure()
+            raise PriceUnavailable(f"{self.name}: {exc}") from exc
+        self._record(time.monotonic() - started, ok=True)
+        self.breaker.record_success()
+        with self._lock:
+            self._cached = value
+            self._cached_at = time.monotonic()
+        return value
+
+    def _record(self, elapsed, ok):
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+            self._samples.append(elapsed)
+
+    def reset(self):
+        with self._lock:
+            self._cached = None
+            self._cached_at = None
+            self._samples.clear()
+            self.calls = self.errors = self.skipped = 0
+        self.breaker.record_success()
+
+    def stats(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            return {
+                "quote": self.quote,
+                "calls": self.calls,
+                "errors": self.errors,
+                "skipped": self.skipped,
+                "breaker": self.breaker.state,
+                "avg_ms": round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0,
+                "p95_ms": round(samples[int(0.95 * (len(samples) - 1))] * 1000, 2) if samples else 0.0,
+            }
+
+
+class JsonHttpSource(PriceSource):
+    """GETs `url` and picks the quote out of the JSON body with `extract`."""
+
+    def __init__(self, name, quote, url, extract, **kwargs):
+        super().__init__(name, quote, **kwargs)
+        self.url = url
+        self.extract = extract
+
+    def _fetch(self, timeout):
+        resp = requests.get(self.url, timeout=timeout)
+        if resp.status_code != 200:
+            raise ValueError(f"HTTP {resp.status_code}")
+        return to_decimal(self.extract(resp.json()))
+
+
+class FixtureSource(PriceSource):
+    """Returns a fixed value, optionally after `latency` seconds. For tests and benchmarks."""
+
+    def __init__(self, name, quote, value, latency=0, **kwargs):
+        kwargs.setdefault("cache_ttl", 0)
+        super().__init__(name, quote, **kwargs)
+        self.value = to_decimal(value)
+        self.latency = latency
+
+    def _fetch(self, timeout):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.value
+
+
+class PriceProvider:
+    """Ranked sources per quote; the first source that answers wins."""
+
+    def __init__(self, sources):
+        self.sources = {}
+        for source in sources:
+            self.sources.setdefault(source.quote, []).append(source)
+
+    def get(self, quote, timeout):
+        """Returns (value, source name) or raises PriceUnavailable with every source's error."""
+        errors = []
+        for source in self.sources.get(quote, []):
+            try:
+                return source.fetch(timeout), source.name
+            except PriceUnavailable as exc:
+                errors.append(str(exc))
+        raise PriceUnavailable("; ".join(errors) or f"no sources for {quote}")
+
+    def reset(self):
+        for sources in self.sources.values():
+            for source in sources:
+                source.reset()
+
+    def stats(self):
+        return {
+            source.name: source.stats()
+            for sources in self.sources.values()
+            for source in sources
+        }
+
+
+def live_sources():
+    return [
+        JsonHttpSource(
+            "exchangerate-api", FX,
+            "https://api.exchangerate-api.com/v4/latest/USD",
+            lambda data: data["rates"],
+        ),
+        JsonHttpSource(
+            "open-er-api", FX,
+            "https://open.er-api.com/v6/latest/USD",
+            lambda data: data["rates"],
+        ),
+        JsonHttpSource(
+            "gold-api-xau", GOLD,
+            "https://api.gold-api.com/price/XAU",
+            lambda data: data["price"],
+        ),
+        JsonHttpSource(
+            "goldprice-xau", GOLD,
+            "https://data-asg.goldprice.org/dbXRates/USD",
+            lambda data: data["items"][0]["xauPrice"],
+        ),
+        JsonHttpSource(
+            "gold-api-xag", SILVER,
+            "https://api.gold-api.com/price/XAG",
+            lambda data: data["price"],
+        ),
+        JsonHttpSource(
+            "goldprice-xag", SILVER,
+            "https://data-asg.goldprice.org/dbXRates/USD",
+            lambda data: data["items"][0]["xagPrice"],
+        ),
+    ]
+
+
+def fixture_sources(latency=0):
+    return [
+        FixtureSource(
+            "fixture-fx", FX,
+            {"USD": "1", "NGN": "1500", "GBP": "0.79", "EUR": "0.92", "SAR": "3.75"},
+            latency=latency,
+        ),
+        FixtureSource("fixture-xau", GOLD, "2300", latency=latency),
+        FixtureSource("fixture-xag", SILVER, "28", latency=latency),
+    ]
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """
+    The process-wide provider. ZAKAH_PRICE_SOURCES selects `live` (the
+    public APIs) or `fixture` (fixed offline values).
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            if getattr(settings, "ZAKAH_PRICE_SOURCES", "live") == "fixture":
+                _provider = PriceProvider(fixture_sources())
+            else:
+                _provider = PriceProvider(live_sources())
+        return _provider
+
+
+def set_provider(provider):
+    """Replaces the process-wide provider (None rebuilds it from settings)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
@@ -0,0 +1,124 @@
+"""
+Zakah schedules for livestock and crops.
+
+Each schedule is compiled once, at import, into a sorted list of interval
+lower bounds, so a herd size or harvest weight is looked up with one
+bisect. Herds above the last tabulated interval follow the usual per-40/50
+(camels), per-30/40 (cattle) and per-100 (sheep and goats) rules.
+"""
+from bisect import bisect_right
+
+from django.conf import settings
+
+ANIMAL_LABELS = {
+    "sheep": "Sheep or goat (1 year old)",
+    "bint_makhad": "Bint Makhad (1-year-old female camel)",
+    "bint_labun": "Bint Labun (2-year-old female camel)",
+    "hiqqah": "Hiqqah (3-year-old female camel)",
+    "jadhaah": "Jadha'ah (4-year-old female camel)",
+    "tabi": "Tabi' (1-year-old calf)",
+    "musinnah": "Musinnah (2-year-old cow)",
+}
+
+# (lowest herd size of the interval, due as ((animal, count), ...))
+CAMEL_TABLE = (
+    (0, ()),
+    (5, (("sheep", 1),)),
+    (10, (("sheep", 2),)),
+    (15, (("sheep", 3),)),
+    (20, (("sheep", 4),)),
+    (25, (("bint_makhad", 1),)),
+    (36, (("bint_labun", 1),)),
+    (46, (("hiqqah", 1),)),
+    (61, (("jadhaah", 1),)),
+    (76, (("bint_labun", 2),)),
+    (91, (("hiqqah", 2),)),
+)
+CATTLE_TABLE = (
+    (0, ()),
+    (30, (("tabi", 1),)),
+    (40, (("musinnah", 1),)),
+)
+SHEEP_TABLE = (
+    (0, ()),
+    (40, (("sheep", 1),)),
+    (121, (("sheep", 2),)),
+    (201, (("sheep", 3),)),
+)
+
+# Crop rates by irrigation: rain-fed 10%, irrigated 5%, mixed 7.5%
+CROP_RATES = {
+    "rain": 0.10,
+    "irrigated": 0.05,
+    "mixed": 0.075,
+}
+
+
+def _split(count, small, large, small_animal, large_animal):
+    """Covers `count` (rounded down to 10) with the most `large` groups, the rest in `small` groups."""
+    count -= count % 10
+    for large_groups in range(count // large, -1, -1):
+        rest = count - large_groups * large
+        if rest % small == 0:
+            due = []
+            if rest:
+                due.append((small_animal, rest // small))
+            if large_groups:
+                due.append((large_animal, large_groups))
+            return tuple(due)
+    return ()
+
+
+class Schedule:
+    def __init__(self, table, beyond=None):
+        self.bounds = [low for low, _ in table]
+        self.dues = [due for _, due in table]
+        self.beyond = beyond
+
+    def lookup(self, count):
+        if count < 0:
+            raise ValueError("count must not be negative")
+        if self.beyond and count >= self.beyond[0]:
+            return self.beyond[1](count)
+        return self.dues[bisect_right(self.bounds, count) - 1]
+
+
+LIVESTOCK = {
+    "camels": Schedule(
+        CAMEL_TABLE, beyond=(121, lambda n: _split(n, 40, 50, "bint_labun", "hiqqah"))
+    ),
+    "cattle": Schedule(
+        CATTLE_TABLE, beyond=(60, lambda n: _split(n, 30, 40, "tabi", "musinnah"))
+    ),
+    "sheep_goats": Schedule(
+        SHEEP_TABLE, beyond=(400, lambda n: (("sheep", n // 100),))
+    ),
+}
+
+
+def livestock_due(animal, count):
+    """The animals due on a herd, as a list of {animal, label, count}."""
+    schedule = LIVESTOCK.get(animal)
+    if schedule is None:
+        raise ValueError(f"animal must be one of {', '.join(LIVESTOCK)}")
+    return [
+        {"animal": name, "label": ANIMAL_LABELS[name], "count": n}
+        for name, n in schedule.lookup(int(count))
+    ]
+
+
+def crop_nisab_kg():
+    return getattr(settings, "CROP_NISAB_KG", 653)
+
+
+def crop_due(kg, irrigation="rain"):
+    """Kilograms due on a harvest; nothing below the 5 wasq Nisab."""
+    rate = CROP_RATES.get(irrigation)
+    if rate is None:
+        raise ValueError(f"irrigation must be one of {', '.join(CROP_RATES)}")
+    kg = float(kg)
+    if kg < 0:
+        raise ValueError("kg must not be negative")
+    if kg < crop_nisab_kg():
+        return 0.0
+    return round(kg * rate, 2)
@@ -1,8 +1,147 @@
+import hashlib
+import json
+import logging
 import requests
-from bs4 import BeautifulSoup
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from bs4 import BeautifulSoup, SoupStrainer
+from datetime import timedelta
 from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
-from .models import ZakahNisab, ZakahReference, DashboardIslamicCard
+from . import hijri, providers
+from .models import (
+    ZakahNisab,
+    ZakahReference,
+    DashboardIslamicCard,
+    NisabPricePoint,
+    NisabPriceBucket,
+    ScrapedPage,
+)
+
+logger = logging.getLogger(__name__)
+
+NISAB_REFRESH_LOCK_KEY = "zakah:nisab-refresh"
+
+
+def nisab_is_stale(nisab):
+    max_age = timedelta(hours=getattr(settings, "NISAB_STALE_AFTER_HOURS", 12))
+    return nisab is None or timezone.now() - nisab.last_updated > max_age
+
+
+def acquire_nisab_refresh_lock():
+    """Takes the single-flight refresh lock; returns its token, or None if already held."""
+    token = uuid.uuid4().hex
+    timeout = getattr(settings, "NISAB_REFRESH_LOCK_SECONDS", 120)
+    if not cache.add(NISAB_REFRESH_LOCK_KEY, token, timeout):
+        return None
+    return token
+
+
+def request_nisab_refresh():
+    """
+    Queues one background refresh of the Nisab rates. The lock is taken with
+    an atomic cache.add, so however many requests see a stale row only the
+    first one enqueues the task; the task releases it when done, and the
+    timeout frees it if the worker dies. Returns True if a task was queued.
+    """
+    token = acquire_nisab_refresh_lock()
+    if token is None:
+        return False
+    from .tasks import refresh_nisab_rates
+
+    try:
+        refresh_nisab_rates.delay(lock_token=token)
+    except Exception:
+        logger.exception("Could not queue Nisab refresh")
+        release_nisab_refresh_lock(token)
+        return False
+    return True
+
+
+def release_nisab_refresh_lock(token):
+    """Releases the lock only if `token` still holds it."""
+    if cache.get(NISAB_REFRESH_LOCK_KEY) == token:
+        cache.delete(NISAB_REFRESH_LOCK_KEY)
+
+
+# quote -> (default when every source fails and there is no stored value, ZakahNisab field)
+PRICE_FALLBACKS = {
+    providers.FX: ({"USD": Decimal("1"), "NGN": Decimal("1600")}, "fx_rates"),
+    providers.GOLD: (Decimal("2000"), "gold_price_usd"),
+    providers.SILVER: (Decimal("25"), "silver_price_usd"),
+}
+
+GRAMS_PER_OUNCE = Decimal("31.1035")
+NISAB_GOLD_GRAMS = Decimal("85")
+NISAB_SILVER_GRAMS = Decimal("595")
+
+
+def _fallback_price(quote, previous):
+    default, field = PRICE_FALLBACKS[quote]
+    stored = getattr(previous, field, None)
+    if quote == providers.FX:
+        # Rows written before the FX table existed only have the NGN rate
+        if not stored and previous is not None and previous.usd_ngn_rate:
+            stored = {"USD": 1, "NGN": previous.usd_ngn_rate}
+        return providers.to_decimal(stored) if stored else dict(default)
+    return stored or default
+
+
+def fetch_prices(previous=None, provider=None):
+    """
+    Asks the price provider for every quote concurrently and waits at most
+    NISAB_FETCH_DEADLINE_SECONDS for all of them. A quote that fails or
+    misses the deadline falls back to its value on `previous` (the last
+    stored row) or to its hard-coded default. Returns (prices, fallbacks).
+    """
+    provider = provider or providers.get_provider()
+    deadline = getattr(settings, "NISAB_FETCH_DEADLINE_SECONDS", 12)
+    timeout = min(getattr(settings, "NISAB_SOURCE_TIMEOUT_SECONDS", 10), deadline)
+    pool = ThreadPoolExecutor(max_workers=len(providers.QUOTES))
+    futures = {
+        quote: pool.submit(provider.get, quote, timeout)
+        for quote in providers.QUOTES
+    }
+    wait(futures.values(), timeout=deadline)
+    # Do not wait for stragglers; their results are ignored
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    prices = {}
+    fallbacks = []
+    for quote, future in futures.items():
+        if not future.done():
+            logger.warning("Price quote %s missed the %ss deadline, using fallback", quote, deadline)
+        else:
+            try:
+                value, _ = future.result()
+                if quote == providers.FX and "NGN" not in value:
+                    raise providers.PriceUnavailable("FX table has no NGN rate")
+                prices[quote] = value
+                continue
+            except providers.PriceUnavailable as exc:
+                logger.warning("Price quote %s unavailable, using fallback: %s", quote, exc)
+        prices[quote] = _fallback_price(quote, previous)
+        fallbacks.append(quote)
+    return prices, fallbacks
+
+
+def nisab_table(gold_price_usd_oz, silver_price_usd_oz, fx_rates):
+    """
+    Gold and silver Nisab in every currency of `fx_rates` (units per USD),
+    as {code: {"gold": "...", "silver": "..."}} strings rounded to 2 places.
+    """
+    nisab_gold_usd = gold_price_usd_oz / GRAMS_PER_OUNCE * NISAB_GOLD_GRAMS
+    nisab_silver_usd = silver_price_usd_oz / GRAMS_PER_OUNCE * NISAB_SILVER_GRAMS
+    cent = Decimal("0.01")
+    return {
+        code: {
+            "gold": str((nisab_gold_usd * rate).quantize(cent)),
+            "silver": str((nisab_silver_usd * rate).quantize(cent)),
+        }
+        for code, rate in sorted(fx_rates.items())
+    }
 
 
 def fetch_and_update_nisab():
@@ -11,45 +150,18 @@ def fetch_and_update_nisab():
     Uses 20 Dinars (approx 85g) as the standard for gold Nisab.
     """
     try:
-        # 1. Get USD/NGN Exchange Rate (Stable free API)
-        rate_resp = requests.get("https://api.exchangerate-api.com/v4/latest/USD", timeout=10)
-        rate_data = rate_resp.json()
-        usd_ngn_rate = Decimal(str(rate_data.get("rates", {}).get("NGN", "1600")))
-
-        # 2. Get Gold Price per Ounce in USD (Stable free API)
-        # Fallback to a reasonable default if API fails
-        try:
-            gold_resp = requests.get("https://api.gold-api.com/price/XAU", timeout=10)
-            if gold_resp.status_code == 200:
-                gold_data = gold_resp.json()
-                gold_price_usd_oz = Decimal(str(gold_data.get("price", "2000")))
-            else:
-                gold_price_usd_oz = Decimal("2000")
-        except:
-            gold_price_usd_oz = Decimal("2000")
-
-        # 3. Calculations
+        prices, fallbacks = fetch_prices(previous=ZakahNisab.objects.first())
+        fx_rates = prices[providers.FX]
+        usd_ngn_rate = fx_rates["NGN"]
+        gold_price_usd_oz = prices[providers.GOLD]
+        silver_price_usd_oz = prices[providers.SILVER]
+
         # 1 Ounce = 31.1035 Grams
-        gold_price_per_gram_usd = gold_price_usd_oz / Decimal("31.1035")
-        gold_price_per_gram_ngn = gold_price_per_gram_usd * usd_ngn_rate
-        
-        # Nisab Gold = 85 grams of gold
-        nisab_gold_ngn = gold_price_per_gram_ngn * Decimal("85")
-        
-        # Nisab Silver = 595 grams of silver
-        # Usually Silver is ~1/80 of Gold price, but let's use a safe ratio or fetch
-        nisab_silver_ngn = nisab_gold_ngn / Decimal("10") # Fallback ratio if silver fetch fails
-        
-        try:
-            silver_resp = requests.get("https://api.gold-api.com/price/XAG", timeout=10)
-            if silver_resp.status_code == 200:
-                silver_price_usd_oz = Decimal(str(silver_resp.json().get("price", "25")))
-                silver_price_per_gram_ngn = (silver_price_usd_oz / Decimal("31.1035")) * usd_ngn_rate
-                nisab_silver_ngn = silver_price_per_gram_ngn * Decimal("595")
-            else:
-                silver_price_usd_oz = Decimal("25")
-        except:
-            silver_price_usd_oz = Decimal("25")
+        # Nisab Gold = 85 grams of gold, Nisab Silver = 595 grams of silver
+        gold_price_per_gram_ngn = (gold_price_usd_oz / GRAMS_PER_OUNCE) * usd_ngn_rate
+        nisab_gold_ngn = gold_price_per_gram_ngn * NISAB_GOLD_GRAMS
+        silver_price_per_gram_ngn = (silver_price_usd_oz / GRAMS_PER_OUNCE) * usd_ngn_rate
+        nisab_silver_ngn = silver_price_per_gram_ngn * NISAB_SILVER_GRAMS
 
         defaults = {
             "gold_price_usd": gold_price_usd_oz,
@@ -57,9 +169,13 @@ def fetch_and_update_nisab():
             "usd_ngn_rate": usd_ngn_rate,
             "nisab_gold_ngn": nisab_gold_ngn,
             "nisab_silver_ngn": nisab_silver_ngn,
+            "fallback_sources": fallbacks,
+            "fx_rates": {code: str(rate) for code, rate in sorted(fx_rates.items())},
+            "nisab_by_currency": nisab_table(gold_price_usd_oz, silver_price_usd_oz, fx_rates),
         }
         
         nisab_obj, created = ZakahNisab.objects.update_or_create(id=1, defaults=defaults)
+        record_nisab_point(nisab_obj)
         
         # After updating Nisab, we can update references based on Islamic ratios
         update_references_from_nisab(nisab_obj)
@@ -70,64 +186,71 @@ def fetch_and_update_nisab():
         return nisab_obj
 
     except Exception as exc:
-        print(f"Error in fetch_and_update_nisab: {exc}")
+        logger.exception("Error in fetch_and_update_nisab: %s", exc)
         return None
 
+def record_nisab_point(nisab_obj):
+    """Appends the refreshed rates to the price history and its buckets."""
+    point = NisabPricePoint.objects.create(
+        recorded_at=nisab_obj.last_updated,
+        gold_price_usd=nisab_obj.gold_price_usd,
+        silver_price_usd=nisab_obj.silver_price_usd,
+        usd_ngn_rate=nisab_obj.usd_ngn_rate,
+        nisab_gold_ngn=nisab_obj.nisab_gold_ngn,
+        nisab_silver_ngn=nisab_obj.nisab_silver_ngn,
+        fallback_sources=nisab_obj.fallback_sources,
+    )
+    NisabPriceBucket.record(point)
+    return point
+
+
+def nisab_as_of(moment):
+    """The last price point recorded at or before `moment`, or None."""
+    return NisabPricePoint.objects.filter(recorded_at__lte=moment).order_by("-recorded_at").first()
+
+
+# key -> (title, value in gold dinars). The gold Nisab is 20 dinars, so each
+# amount is nisab_gold_ngn * dinars / 20. Adding a reference is one line here.
+REFERENCE_SOURCE_URL = "https://www.dailynisab.org/"  # Reference site for the logic
+REFERENCE_RATIOS = {
+    "dowry": ("Minimum Dowry (Rub'u Dinar)", Decimal("0.25")),
+    "murderer_fine": ("Blood Money (Diyyah - 1000 Dinars)", Decimal("1000")),
+    "hadd_theft": ("Nisab for Theft", Decimal("0.25")),  # Same as Rub'u Dinar
+}
+NISAB_DINARS = Decimal("20")
+
+
+def compute_references(nisab_gold_ngn, ratios=None):
+    """Derives every reference amount from the gold Nisab; returns unsaved ZakahReference rows."""
+    ratios = REFERENCE_RATIOS if ratios is None else ratios
+    now = timezone.now()
+    return [
+        ZakahReference(
+            key=key,
+            title=title,
+            amount_ngn=(nisab_gold_ngn * dinars / NISAB_DINARS).quantize(Decimal("0.01")),
+            source_url=REFERENCE_SOURCE_URL,
+            last_updated=now,
+        )
+        for key, (title, dinars) in ratios.items()
+    ]
+
+
 def update_references_from_nisab(nisab_obj):
     """
-    Calculates Dowry and Blood Money based on the Nisab Gold value.
-    Nisab (20 Dinars), Dowry (0.25 Dinars), Blood Money (1000 Dinars).
+    Writes every REFERENCE_RATIOS entry from the Nisab Gold value in one
+    bulk upsert keyed on `key`, however many references there are.
     """
     if not nisab_obj or nisab_obj.nisab_gold_ngn <= 0:
         return
 
-    nisab_val = nisab_obj.nisab_gold_ngn
-    
-    # Ratios
-    # Dowry = (0.25 / 20) * Nisab = 0.0125 * Nisab
-    dowry_val = nisab_val * Decimal("0.0125")
-    
-    # Blood Money = (1000 / 20) * Nisab = 50 * Nisab
-    blood_money_val = nisab_val * Decimal("50")
-
-    source_url = "https://www.dailynisab.org/" # Reference site for the logic
-
-    # Update Dowry
-    ZakahReference.objects.update_or_create(
-        key="dowry",
-        defaults={
-            "title": "Minimum Dowry (Rub'u Dinar)",
-            "amount_ngn": dowry_val,
-            "source_url": source_url,
-            "last_updated": timezone.now(),
-        },
+    ZakahReference.objects.bulk_create(
+        compute_references(Decimal(str(nisab_obj.nisab_gold_ngn))),
+        update_conflicts=True,
+        unique_fields=["key"],
+        update_fields=["title", "amount_ngn", "source_url", "last_updated"],
     )
 
-    # Update Blood Money
-    ZakahReference.objects.update_or_create(
-        key="murderer_fine",
-        defaults={
-            "title": "Blood Money (Diyyah - 1000 Dinars)",
-            "amount_ngn": blood_money_val,
-            "source_url": source_url,
-            "last_updated": timezone.now(),
-        },
-    )
-    
-    # Update Nisab for Theft (Hadd)
-    ref, created = ZakahReference.objects.update_or_create(
-        key="hadd_theft",
-        defaults={
-            "title": "Nisab for Theft",
-            "amount_ngn": dowry_val, # Same as Rub'u Dinar
-            "source_url": source_url,
-            "last_updated": timezone.now(),
-        },
-    )
-
-    # Remove the crops entry if it exists
-    ZakahReference.objects.filter(key="crops").delete()
-
 def fetch_additional_references():
     """
     This is now handled by update_references_from_nisab.
@@ -136,44 +259,138 @@ def fetch_additional_references():
     fetch_and_update_nisab()
     scrape_and_update_islamic_cards()
 
+CARD_FIELDS = ("arabic_title", "content", "arabic_content", "icon_name", "order")
+DAILY_NISAB_HOME = "https://www.dailynisab.org/"
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+
+def _card_hash(data):
+    return hashlib.sha256(
+        json.dumps([data["title"]] + [data[field] for field in CARD_FIELDS], ensure_ascii=False).encode()
+    ).hexdigest()
+
+
+def upsert_cards(cards_data):
+    """
+    Writes only the cards whose content hash changed, in one bulk upsert
+    keyed on the title. Returns the number of cards written.
+    """
+    hashes = {data["title"]: _card_hash(data) for data in cards_data}
+    existing = dict(
+        DashboardIslamicCard.objects.filter(title__in=hashes).values_list("title", "content_hash")
+    )
+    changed = [
+        DashboardIslamicCard(content_hash=hashes[data["title"]], **data)
+        for data in cards_data
+        if existing.get(data["title"]) != hashes[data["title"]]
+    ]
+    if changed:
+        DashboardIslamicCard.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=["title"],
+            update_fields=[*CARD_FIELDS, "content_hash", "last_updated"],
+        )
+    return len(changed)
+
+
+def fetch_if_changed(url, force=False, timeout=20):
+    """
+    Conditional GET using the ETag / Last-Modified stored for `url`.
+    Returns (page, html), where html is None when the server answered 304
+    or the body hashes the same as last time; in the latter case any new
+    validators are saved here. Otherwise call `page.save()` once the body
+    has been processed so the new validators and hash are kept.
+    """
+    page, _ = ScrapedPage.objects.get_or_create(url=url)
+    headers = {}
+    if not force:
+        if page.etag:
+            headers["If-None-Match"] = page.etag
+        if page.last_modified:
+            headers["If-Modified-Since"] = page.last_modified
+    resp = requests.get(url, headers=headers, timeout=timeout)
+    if resp.status_code == 304:
+        return page, None
+    resp.raise_for_status()
+    body_hash = hashlib.sha256(resp.content).hexdigest()
+    etag = resp.headers.get("ETag", "")
+    last_modified = resp.headers.get("Last-Modified", "")
+    if body_hash == page.content_hash and not force:
+        if (etag, last_modified) != (page.etag, page.last_modified):
+            page.etag, page.last_modified = etag, last_modified
+            page.save(update_fields=["etag", "last_modified"])
+        return page, None
+    page.etag, page.last_modified = etag, last_modified
+    page.content_hash = body_hash
+    return page, resp.content
+
+
+def _scrape_hijri_dates(html):
+    # Only the two calendar elements are parsed out of the homepage
+    soup = BeautifulSoup(
+        html, HTML_PARSER, parse_only=SoupStrainer(id=["hijri-date", "nigeria-hijri-date"])
+    )
+
+    hijri_date = "N/A"
+    hijri_elem = soup.find(id="hijri-date")
+    if hijri_elem:
+        hijri_date = hijri_elem.get_text(strip=True)
+
+    nigeria_hijri = "N/A"
+    nigeria_elem = soup.find(id="nigeria-hijri-date")
+    if nigeria_elem:
+        nigeria_hijri = nigeria_elem.get_text(strip=True)
+    return hijri_date, nigeria_hijri
+
+
+def calendar_card():
+    """The Islamic Calendar card computed by the local Hijri engine."""
+    today = timezone.localdate()
+    world = hijri.to_hijri(today)
+    nigeria = hijri.to_hijri(today, hijri.nigeria_offset())
+    return {
+        "title": "Islamic Calendar",
+        "arabic_title": "التقويم الهجري",
+        "content": f"World: {world}\nNigeria: {nigeria}",
+        "arabic_content": nigeria.arabic(),
+        "icon_name": "calendar",
+        "order": 1
+    }
+
+
 def scrape_and_update_islamic_cards():
     """
-    Scrapes Daily Nisab for Islamic Calendar and Inheritance info to populate 6 dashboard cards.
+    Builds the 6 dashboard cards. The calendar comes from the local Hijri
+    engine, or from dailynisab.org when HIJRI_SOURCE is "dailynisab" (only
+    downloaded and parsed when the page changed). Only changed cards are written.
     """
     try:
-        # 1. Scrape Homepage for Calendar
-        home_url = "https://www.dailynisab.org/"
-        # Increased timeout to 20s
-        resp = requests.get(home_url, timeout=20)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        hijri_date = "N/A"
-        hijri_elem = soup.find(id="hijri-date")
-        if hijri_elem:
-            hijri_date = hijri_elem.get_text(strip=True)
-            
-        nigeria_hijri = "N/A"
-        nigeria_elem = soup.find(id="nigeria-hijri-date")
-        if nigeria_elem:
-            nigeria_hijri = nigeria_elem.get_text(strip=True)
-
-        # 2. Scrape Inheritance Page for Heirs/Principles
-        inh_url = "https://www.dailynisab.org/inheritance"
-        inh_resp = requests.get(inh_url, timeout=20)
-        inh_soup = BeautifulSoup(inh_resp.text, 'html.parser')
-        
+        page = None
+        if getattr(settings, "HIJRI_SOURCE", "local") == "dailynisab":
+            force = not DashboardIslamicCard.objects.exists()
+            page, html = fetch_if_changed(DAILY_NISAB_HOME, force=force)
+            if html is None:
+                return True
+            hijri_date, nigeria_hijri = _scrape_hijri_dates(html)
+            calendar = {
+                "title": "Islamic Calendar",
+                "arabic_title": "التقويم الهجري",
+                "content": f"World: {hijri_date}\nNigeria: {nigeria_hijri}",
+                "arabic_content": hijri_date,
+                "icon_name": "calendar",
+                "order": 1
+            }
+        else:
+            calendar = calendar_card()
+
         # We'll create 6 cards in total
-        cards_data = []
-        
-        # Card 1: Islamic Calendar
-        cards_data.append({
-            "title": "Islamic Calendar",
-            "arabic_title": "التقويم الهجري",
-            "content": f"World: {hijri_date}\nNigeria: {nigeria_hijri}",
-            "arabic_content": hijri_date,
-            "icon_name": "calendar",
-            "order": 1
-        })
+        cards_data = [calendar]
 
         # Define common inheritance groups based on Maliki Fiqh usually shown
         inheritance_groups = [
@@ -198,45 +415,24 @@ def scrape_and_update_islamic_cards():
                 "order": group["order"]
             })
 
-        # Update or create the cards
-        for data in cards_data:
-            DashboardIslamicCard.objects.update_or_create(
-                title=data["title"],
-                defaults={
-                    "arabic_title": data["arabic_title"],
-                    "content": data["content"],
-                    "arabic_content": data["arabic_content"],
-                    "icon_name": data["icon_name"],
-                    "order": data["order"],
-                }
-            )
-            
+        upsert_cards(cards_data)
+        if page is not None:
+            page.save()
         return True
     except Exception as e:
-        print(f"Error scraping Islamic cards: {e}")
+        logger.warning("Error scraping Islamic cards: %s", e)
         # FALLBACK: If scraping fails, create basic cards so dashboard isn't empty
         create_fallback_cards()
         return False
 
 def create_fallback_cards():
     """Creates cards with default values if scraper fails."""
-    today = timezone.now()
     fallback_data = [
-        {"title": "Islamic Calendar", "arabic_title": "التقويم الهجري", "content": "Fetch from Daily Nisab for latest Hijri date.", "arabic_content": "", "icon": "calendar", "order": 1},
-        {"title": "Inheritance (Parents)", "arabic_title": "الأبوان", "content": "Essential heirs: Father (أب), Mother (أم)", "arabic_content": "أب | أم", "icon": "users", "order": 2},
-        {"title": "Inheritance (Children)", "arabic_title": "الفروع", "content": "Essential heirs: Son (ابن), Daughter (بنت)", "arabic_content": "ابن | بنت", "icon": "arrow-down", "order": 3},
-        {"title": "Inheritance (Spouses)", "arabic_title": "الزوجان", "content": "Essential heirs: Husband (زوج), Wife (زوجة)", "arabic_content": "زوج | زوجة", "icon": "heart", "order": 4},
-        {"title": "Inheritance (Grandparents)", "arabic_title": "الأجداد", "content": "Essential heirs: Grandfather (جد), Grandmother (جدة)", "arabic_content": "جد | جدة", "icon": "award", "order": 5},
-        {"title": "Inheritance (Fara'id)", "arabic_title": "علم الفرائض", "content": "Distribution based on divine law in Surah An-Nisa.", "arabic_content": "سورة النساء", "icon": "book", "order": 6},
+        calendar_card(),
+        {"title": "Inheritance (Parents)", "arabic_title": "الأبوان", "content": "Essential heirs: Father (أب), Mother (أم)", "arabic_content": "أب | أم", "icon_name": "users", "order": 2},
+        {"title": "Inheritance (Children)", "arabic_title": "الفروع", "content": "Essential heirs: Son (ابن), Daughter (بنت)", "arabic_content": "ابن | بنت", "icon_name": "arrow-down", "order": 3},
+        {"title": "Inheritance (Spouses)", "arabic_title": "الزوجان", "content": "Essential heirs: Husband (زوج), Wife (زوجة)", "arabic_content": "زوج | زوجة", "icon_name": "heart", "order": 4},
+        {"title": "Inheritance (Grandparents)", "arabic_title": "الأجداد", "content": "Essential heirs: Grandfather (جد), Grandmother (جدة)", "arabic_content": "جد | جدة", "icon_name": "award", "order": 5},
+        {"title": "Inheritance (Fara'id)", "arabic_title": "علم الفرائض", "content": "Distribution based on divine law in Surah An-Nisa.", "arabic_content": "سورة النساء", "icon_name": "book", "order": 6},
     ]
-    for data in fallback_data:
-        DashboardIslamicCard.objects.update_or_create(
-            title=data["title"],
-            defaults={
-                "arabic_title": data["arabic_title"],
-                "content": data["content"],
-                "arabic_content": data["arabic_content"],
-                "icon_name": data["icon"],
-                "order": data["order"],
-            }
-        )
+    upsert_cards(fallback_data)
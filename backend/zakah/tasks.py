@@ -1,8 +1,35 @@
+import logging
+
 from celery import shared_task
-from .services import fetch_additional_references
+from .services import (
+    acquire_nisab_refresh_lock,
+    fetch_additional_references,
+    fetch_and_update_nisab,
+    release_nisab_refresh_lock,
+)
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
 def fetch_additional_references_task():
     fetch_additional_references()
 
+
+@shared_task
+def refresh_nisab_rates(lock_token=None):
+    """
+    Refreshes the Nisab rates under the single-flight lock. Queued refreshes
+    pass the token request_nisab_refresh took; the beat run takes the lock
+    itself and skips if another refresh holds it.
+    """
+    if lock_token is None:
+        lock_token = acquire_nisab_refresh_lock()
+        if lock_token is None:
+            logger.info("Nisab refresh already running, skipping")
+            return None
+    try:
+        nisab = fetch_and_update_nisab()
+    finally:
+        release_nisab_refresh_lock(lock_token)
+    return nisab.last_updated.isoformat() if nisab else None
@@ -1,14 +1,27 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
+import requests
 from decimal import Decimal
-from .models import ZakahNisab
-from .services import fetch_and_update_nisab
+from datetime import date, datetime, timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from users.models import User
+from .models import ZakahNisab, ZakahReference, NisabPricePoint, NisabPriceBucket, DashboardIslamicCard
+from .services import (
+    fetch_and_update_nisab,
+    fetch_prices,
+    record_nisab_point,
+    scrape_and_update_islamic_cards,
+    update_references_from_nisab,
+)
+from . import checks, hijri, providers, schedules
 
 class ZakahTests(TestCase):
     def setUp(self):
+        providers.set_provider(None)
         self.client = APIClient()
         self.nisab_url = reverse('nisab_rates')
 
@@ -47,6 +60,29 @@ class ZakahTests(TestCase):
         expected_gold = Decimal('85') * (Decimal('2000') / Decimal('31.1035')) * Decimal('1000')
         # Allow some precision diff
         self.assertAlmostEqual(nisab.nisab_gold_ngn, expected_gold, delta=Decimal('1.0'))
+        self.assertEqual(nisab.fallback_sources, [])
+
+    @patch('zakah.services.scrape_and_update_islamic_cards')
+    @patch('zakah.services.requests.get')
+    def test_failed_source_falls_back_to_last_value(self, mock_get, mock_scrape):
+        ZakahNisab.objects.create(
+            id=1, gold_price_usd=2100, silver_price_usd=26, usd_ngn_rate=1500,
+            nisab_gold_ngn=0, nisab_silver_ngn=0
+        )
+
+        def side_effect(url, timeout=10):
+            if 'price/XAU' in url:
+                raise requests.ConnectTimeout()
+            response = MagicMock(status_code=200)
+            response.json.return_value = {'price': 30.0, 'rates': {'NGN': 1000.0}}
+            return response
+
+        mock_get.side_effect = side_effect
+        nisab = fetch_and_update_nisab()
+
+        self.assertEqual(nisab.fallback_sources, ['gold'])
+        self.assertEqual(nisab.gold_price_usd, Decimal('2100'))
+        self.assertEqual(nisab.usd_ngn_rate, Decimal('1000'))
 
     def test_nisab_view(self):
         # Create dummy data
@@ -62,3 +98,410 @@ class ZakahTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['currency'], 'NGN')
         self.assertEqual(float(response.data['gold_price_usd_oz']), 2000.0)
+
+
+class NisabRefreshTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.nisab_url = reverse('nisab_rates')
+        self.nisab = ZakahNisab.objects.create(
+            gold_price_usd=2000,
+            silver_price_usd=25,
+            usd_ngn_rate=1000,
+            nisab_gold_ngn=5465622.84,
+            nisab_silver_ngn=478241.99
+        )
+
+    def _age(self, hours):
+        ZakahNisab.objects.filter(pk=self.nisab.pk).update(
+            last_updated=timezone.now() - timedelta(hours=hours)
+        )
+
+    @patch('zakah.tasks.refresh_nisab_rates.delay')
+    @patch('zakah.services.requests.get')
+    def test_stale_row_served_and_refreshed_once(self, mock_get, mock_delay):
+        self._age(13)
+        first = self.client.get(self.nisab_url)
+        second = self.client.get(self.nisab_url)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertTrue(first.data['stale'])
+        self.assertEqual(float(second.data['gold_price_usd_oz']), 2000.0)
+        mock_delay.assert_called_once()
+        mock_get.assert_not_called()
+
+    @patch('zakah.tasks.refresh_nisab_rates.delay')
+    def test_forced_refresh_is_staff_only(self, mock_delay):
+        self.client.get(self.nisab_url, {'refresh': 'true'})
+        mock_delay.assert_not_called()
+
+        staff = User.objects.create_user(username='staff', first_name='Staff', is_staff=True)
+        self.client.force_authenticate(user=staff)
+        self.client.get(self.nisab_url, {'refresh': 'true'})
+        mock_delay.assert_called_once()
+
+    @patch('zakah.tasks.fetch_and_update_nisab')
+    def test_task_releases_lock(self, mock_fetch):
+        from .services import request_nisab_refresh
+        from .tasks import refresh_nisab_rates
+
+        mock_fetch.return_value = None
+        with patch('zakah.tasks.refresh_nisab_rates.delay') as mock_delay:
+            self.assertTrue(request_nisab_refresh())
+            self.assertFalse(request_nisab_refresh())
+
+        # A beat run while the queued refresh holds the lock skips and leaves it held
+        refresh_nisab_rates()
+        mock_fetch.assert_not_called()
+        with patch('zakah.tasks.refresh_nisab_rates.delay'):
+            self.assertFalse(request_nisab_refresh())
+
+        refresh_nisab_rates(**mock_delay.call_args.kwargs)
+        mock_fetch.assert_called_once()
+        with patch('zakah.tasks.refresh_nisab_rates.delay'):
+            self.assertTrue(request_nisab_refresh())
+
+
+class PriceProviderTests(TestCase):
+    def test_fixture_provider(self):
+        prices, fallbacks = fetch_prices(provider=providers.PriceProvider(providers.fixture_sources()))
+        self.assertEqual(fallbacks, [])
+        self.assertEqual(prices[providers.GOLD], Decimal('2300'))
+
+    def test_ranked_sources_and_breaker(self):
+        class Down(providers.PriceSource):
+            def _fetch(self, timeout):
+                raise requests.ConnectTimeout()
+
+        down = Down('down', providers.GOLD, breaker=providers.CircuitBreaker(failure_threshold=2, reset_after=60))
+        backup = providers.FixtureSource('backup', providers.GOLD, '2100')
+        provider = providers.PriceProvider([down, backup])
+
+        for _ in range(3):
+            self.assertEqual(provider.get(providers.GOLD, timeout=1), (Decimal('2100'), 'backup'))
+
+        stats = provider.stats()
+        # Two failures open the breaker; the third refresh skips the source
+        self.assertEqual(stats['down']['errors'], 2)
+        self.assertEqual(stats['down']['skipped'], 1)
+        self.assertEqual(stats['down']['breaker'], 'open')
+
+    def test_all_sources_down_falls_back(self):
+        provider = providers.PriceProvider([])
+        prices, fallbacks = fetch_prices(provider=provider)
+        self.assertEqual(sorted(fallbacks), sorted(providers.QUOTES))
+        self.assertEqual(prices[providers.FX]['NGN'], Decimal('1600'))
+
+    def test_fx_table_without_ngn_falls_back(self):
+        provider = providers.PriceProvider(
+            [providers.FixtureSource('fx', providers.FX, {'USD': '1', 'GBP': '0.8'})]
+        )
+        previous = ZakahNisab(usd_ngn_rate=1450)
+        prices, fallbacks = fetch_prices(previous=previous, provider=provider)
+        self.assertIn(providers.FX, fallbacks)
+        self.assertEqual(prices[providers.FX], {'USD': Decimal('1'), 'NGN': Decimal('1450')})
+
+
+class NisabCurrencyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('nisab_rates')
+
+    @override_settings(ZAKAH_PRICE_SOURCES='fixture')
+    @patch('zakah.services.scrape_and_update_islamic_cards')
+    def test_refresh_precomputes_every_currency(self, mock_scrape):
+        providers.set_provider(None)
+        self.addCleanup(providers.set_provider, None)
+        nisab = fetch_and_update_nisab()
+
+        self.assertEqual(nisab.usd_ngn_rate, Decimal('1500'))
+        self.assertEqual(set(nisab.nisab_by_currency), {'USD', 'NGN', 'GBP', 'EUR', 'SAR'})
+        expected = (Decimal('2300') / Decimal('31.1035') * 85 * Decimal('0.79')).quantize(Decimal('0.01'))
+        self.assertEqual(nisab.nisab_by_currency['GBP']['gold'], str(expected))
+
+        response = self.client.get(self.url, {'currency': 'gbp'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['currency'], 'GBP')
+        self.assertEqual(response.data['nisab_gold'], expected)
+        self.assertEqual(response.data['usd_rate'], Decimal('0.79'))
+        # Same fields and types as the NGN answer
+        ngn = self.client.get(self.url)
+        self.assertEqual(set(response.data), set(ngn.data))
+        for field in ('nisab_gold', 'nisab_silver', 'usd_rate', 'usd_ngn_rate'):
+            self.assertIsInstance(response.data[field], Decimal)
+            self.assertIsInstance(ngn.data[field], Decimal)
+        self.assertNotEqual(response['ETag'], ngn['ETag'])
+
+        # The table is read once per refresh, not per request
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'currency': 'EUR'})
+
+        self.assertEqual(self.client.get(self.url, {'currency': 'XYZ'}).status_code, 400)
+
+
+class NisabHistoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.nisab = ZakahNisab.objects.create(
+            gold_price_usd=2000, silver_price_usd=25, usd_ngn_rate=1000,
+            nisab_gold_ngn=5465622.84, nisab_silver_ngn=478241.99
+        )
+
+    def _record(self, moment, gold):
+        self.nisab.last_updated = moment
+        self.nisab.gold_price_usd = Decimal(gold)
+        return record_nisab_point(self.nisab)
+
+    def test_points_fold_into_buckets(self):
+        monday = timezone.make_aware(datetime(2026, 3, 2, 9, 0))
+        self._record(monday, '2000')
+        self._record(monday + timedelta(hours=6), '2100')
+        self._record(monday + timedelta(days=2), '1950')
+
+        self.assertEqual(NisabPricePoint.objects.count(), 3)
+        daily = NisabPriceBucket.objects.get(resolution='daily', period_start=monday.date())
+        self.assertEqual(daily.samples, 2)
+        self.assertEqual(daily.gold_price_usd, Decimal('2100'))
+        weekly = NisabPriceBucket.objects.get(resolution='weekly', period_start=monday.date())
+        self.assertEqual(weekly.samples, 3)
+        self.assertEqual(weekly.gold_high_usd, Decimal('2100'))
+        self.assertEqual(weekly.gold_low_usd, Decimal('1950'))
+        self.assertEqual(weekly.gold_price_usd, Decimal('1950'))
+
+        response = self.client.get(
+            reverse('nisab_history'), {'resolution': 'weekly', 'start': '2026-03-04', 'end': '2026-03-31'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['points']), 1)
+        self.assertEqual(response.data['points'][0]['samples'], 3)
+
+    def test_nisab_as_of(self):
+        self._record(timezone.make_aware(datetime(2026, 1, 10, 12, 0)), '1800')
+        self._record(timezone.make_aware(datetime(2026, 2, 10, 12, 0)), '1900')
+
+        response = self.client.get(reverse('nisab_as_of'), {'date': '2026-02-01'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(float(response.data['gold_price_usd_oz']), 1800.0)
+        self.assertEqual(self.client.get(reverse('nisab_as_of'), {'date': '2025-12-31'}).status_code, 404)
+        self.assertEqual(self.client.get(reverse('nisab_history'), {'resolution': 'hourly'}).status_code, 400)
+
+
+class ConditionalCachingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.nisab = ZakahNisab.objects.create(
+            gold_price_usd=2000, silver_price_usd=25, usd_ngn_rate=1000,
+            nisab_gold_ngn=5465622.84, nisab_silver_ngn=478241.99
+        )
+
+    def test_nisab_etag_round_trip(self):
+        url = reverse('nisab_rates')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('stale-while-revalidate', response['Cache-Control'])
+        self.assertIn('Last-Modified', response)
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+        self.nisab.gold_price_usd = 2100
+        self.nisab.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+
+    @patch('zakah.views.scrape_and_update_islamic_cards')
+    def test_cards_if_modified_since(self, mock_scrape):
+        DashboardIslamicCard.objects.create(title='Islamic Calendar', content='x', order=1)
+        url = reverse('islamic_cards')
+        response = self.client.get(url)
+        cached = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        mock_scrape.assert_not_called()
+
+
+@override_settings(HIJRI_SOURCE='dailynisab')
+class CardScraperTests(TestCase):
+    HTML = (
+        b'<html><body><div id="hijri-date">1 Ramadan 1447</div>'
+        b'<div id="nigeria-hijri-date">2 Ramadan 1447</div></body></html>'
+    )
+
+    def _response(self, status_code=200, body=HTML, etag='"v1"'):
+        response = MagicMock(status_code=status_code, content=body, headers={'ETag': etag})
+        return response
+
+    @patch('zakah.services.requests.get')
+    def test_unchanged_page_skips_writes(self, mock_get):
+        mock_get.return_value = self._response()
+        self.assertTrue(scrape_and_update_islamic_cards())
+        calendar = DashboardIslamicCard.objects.get(title='Islamic Calendar')
+        self.assertIn('2 Ramadan 1447', calendar.content)
+        self.assertEqual(DashboardIslamicCard.objects.count(), 6)
+
+        mock_get.return_value = self._response(status_code=304)
+        with self.assertNumQueries(2):
+            self.assertTrue(scrape_and_update_islamic_cards())
+        _, kwargs = mock_get.call_args
+        self.assertEqual(kwargs['headers']['If-None-Match'], '"v1"')
+
+        # Same body without validators: hashed and skipped
+        mock_get.return_value = self._response(etag='')
+        self.assertTrue(scrape_and_update_islamic_cards())
+        self.assertEqual(DashboardIslamicCard.objects.get(title='Islamic Calendar').last_updated, calendar.last_updated)
+
+    @patch('zakah.services.requests.get')
+    def test_same_body_keeps_new_validators(self, mock_get):
+        mock_get.return_value = self._response()
+        scrape_and_update_islamic_cards()
+
+        # 200 with the same body but a new ETag: nothing to parse, validators still saved
+        mock_get.return_value = self._response(etag='"v2"')
+        self.assertTrue(scrape_and_update_islamic_cards())
+
+        mock_get.return_value = self._response(status_code=304)
+        self.assertTrue(scrape_and_update_islamic_cards())
+        _, kwargs = mock_get.call_args
+        self.assertEqual(kwargs['headers']['If-None-Match'], '"v2"')
+
+    @patch('zakah.services.requests.get')
+    def test_only_changed_cards_written(self, mock_get):
+        mock_get.return_value = self._response()
+        scrape_and_update_islamic_cards()
+        parents = DashboardIslamicCard.objects.get(title='The Parents')
+
+        mock_get.return_value = self._response(body=self.HTML.replace(b'2 Ramadan', b'3 Ramadan'), etag='"v2"')
+        scrape_and_update_islamic_cards()
+        self.assertIn('3 Ramadan', DashboardIslamicCard.objects.get(title='Islamic Calendar').content)
+        self.assertEqual(DashboardIslamicCard.objects.get(title='The Parents').last_updated, parents.last_updated)
+
+
+class HijriCalendarTests(TestCase):
+    def test_known_dates_round_trip(self):
+        self.assertEqual(hijri.to_hijri(date(2026, 2, 18)), (1447, 9, 1))
+        self.assertEqual(hijri.to_gregorian(1447, 10, 1), date(2026, 3, 20))
+        self.assertEqual(hijri.to_hijri(date(2026, 2, 18), offset=-1), (1447, 8, 29))
+        self.assertEqual(hijri.to_gregorian(1447, 9, 1, offset=-1), date(2026, 2, 19))
+        start = date(2020, 1, 1)
+        for gregorian, hijri_date in hijri.convert_range(start, date(2022, 12, 31)):
+            self.assertEqual(hijri.to_gregorian(*hijri_date), gregorian)
+
+    @override_settings(HIJRI_NIGERIA_OFFSET_DAYS=0)
+    def test_endpoints(self):
+        client = APIClient()
+        response = client.get(reverse('hijri_convert'), {'start': '2026-02-17', 'end': '2026-02-18'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([d['day'] for d in response.data['days']], [29, 1])
+
+        response = client.get(reverse('hijri_month'), {'year': 1447, 'month': 9})
+        self.assertEqual(len(response.data['days']), 30)
+        self.assertEqual(response.data['days'][0]['gregorian'], date(2026, 2, 18))
+        self.assertEqual(client.get(reverse('hijri_month'), {'month': 13}).status_code, 400)
+
+        response = client.get(reverse('hijri_holidays'), {'count': 3})
+        self.assertEqual(len(response.data['holidays']), 3)
+
+    @patch('zakah.services.requests.get')
+    def test_calendar_card_is_local(self, mock_get):
+        self.assertTrue(scrape_and_update_islamic_cards())
+        mock_get.assert_not_called()
+        card = DashboardIslamicCard.objects.get(title='Islamic Calendar')
+        self.assertIn('AH', card.content)
+
+
+class ReferenceUpsertTests(TestCase):
+    def test_references_written_in_one_statement(self):
+        nisab = ZakahNisab.objects.create(
+            gold_price_usd=2000, silver_price_usd=25, usd_ngn_rate=1000,
+            nisab_gold_ngn=Decimal('4000000.00'), nisab_silver_ngn=478241.99
+        )
+        with self.assertNumQueries(1):
+            update_references_from_nisab(nisab)
+        self.assertEqual(ZakahReference.objects.get(key='dowry').amount_ngn, Decimal('50000.00'))
+        self.assertEqual(ZakahReference.objects.get(key='murderer_fine').amount_ngn, Decimal('200000000.00'))
+
+        nisab.nisab_gold_ngn = Decimal('8000000.00')
+        with self.assertNumQueries(1):
+            update_references_from_nisab(nisab)
+        self.assertEqual(ZakahReference.objects.count(), 3)
+        self.assertEqual(ZakahReference.objects.get(key='hadd_theft').amount_ngn, Decimal('100000.00'))
+
+
+class ZakahCalculatorTests(TestCase):
+    def setUp(self):
+        ZakahNisab.objects.create(
+            gold_price_usd=Decimal('3110.35'), silver_price_usd=Decimal('31.10'), usd_ngn_rate=1000,
+            nisab_gold_ngn=Decimal('8500000.00'), nisab_silver_ngn=Decimal('595000.00')
+        )
+        self.user = User.objects.create_user(username='member', first_name='Member', money_box_balance=100000)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('zakah_calculate')
+
+    def test_single_portfolio_uses_money_box(self):
+        response = self.client.post(self.url, {'cash': 1000000, 'debts': 100000}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['net_wealth'], 1000000.0)
+        self.assertEqual(response.data['zakah_due'], 25000.0)
+        self.assertTrue(response.data['liable'])
+
+        response = self.client.post(self.url, {'cash': 1000000, 'standard': 'gold'}, format='json')
+        self.assertFalse(response.data['liable'])
+        self.assertEqual(response.data['zakah_due'], 0.0)
+
+    def test_batch_is_staff_only_and_vectorized(self):
+        portfolios = [{'gold_grams': 100}, {'silver_grams': 100}, {'cash': 'abc'}]
+        self.assertEqual(self.client.post(self.url, {'portfolios': portfolios}, format='json').status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.post(self.url, {'portfolios': portfolios}, format='json').status_code, 400)
+
+        response = self.client.post(self.url, {'portfolios': portfolios[:2]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 100 g of gold at 100,000 NGN/g; 100 g of silver is under the Nisab
+        self.assertEqual(response.data['results'][0]['zakah_due'], 250000.0)
+        self.assertFalse(response.data['results'][1]['liable'])
+        self.assertEqual(response.data['summary']['liable'], 1)
+
+
+class LivestockCropZakahTests(TestCase):
+    def test_schedule_boundaries(self):
+        self.assertEqual(schedules.livestock_due('camels', 24), [
+            {'animal': 'sheep', 'label': schedules.ANIMAL_LABELS['sheep'], 'count': 4}
+        ])
+        self.assertEqual(schedules.LIVESTOCK['camels'].lookup(25), (('bint_makhad', 1),))
+        self.assertEqual(schedules.LIVESTOCK['camels'].lookup(130), (('bint_labun', 2), ('hiqqah', 1)))
+        self.assertEqual(schedules.LIVESTOCK['cattle'].lookup(70), (('tabi', 1), ('musinnah', 1)))
+        self.assertEqual(schedules.LIVESTOCK['sheep_goats'].lookup(39), ())
+        self.assertEqual(schedules.LIVESTOCK['sheep_goats'].lookup(550), (('sheep', 5),))
+        self.assertEqual(schedules.crop_due(600), 0.0)
+        self.assertEqual(schedules.crop_due(1000, 'irrigated'), 50.0)
+
+    def test_batch_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='farmer', first_name='Farmer'))
+        url = reverse('zakah_livestock_crops')
+        response = client.post(url, {
+            'herds': [{'animal': 'cattle', 'count': 45}] * 1000,
+            'harvests': [{'kg': 2000, 'irrigation': 'mixed'}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['herds']), 1000)
+        self.assertEqual(response.data['herds'][0]['due'][0]['animal'], 'musinnah')
+        self.assertEqual(response.data['harvests'][0]['due_kg'], 150.0)
+
+        bad = client.post(url, {'herds': [{'animal': 'horses', 'count': 3}]}, format='json')
+        self.assertEqual(bad.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NisabLockCacheCheckTests(TestCase):
+    @override_settings(DEBUG=False, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_warns_when_cache_is_process_local(self):
+        self.assertEqual([m.id for m in checks.check_nisab_lock_cache(None)], ['zakah.W001'])
+
+    @override_settings(DEBUG=False, CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/1'}})
+    def test_shared_cache_passes(self):
+        self.assertEqual(checks.check_nisab_lock_cache(None), [])
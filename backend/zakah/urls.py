@@ -1,8 +1,26 @@
 from django.urls import path
-from .views import NisabView, ZakahReferenceView, IslamicDashboardCardsView
+from .views import (
+    NisabView,
+    NisabHistoryView,
+    NisabAsOfView,
+    ZakahReferenceView,
+    IslamicDashboardCardsView,
+    HijriConvertView,
+    HijriMonthView,
+    HijriHolidaysView,
+    ZakahCalculatorView,
+    LivestockCropZakahView,
+)
 
 urlpatterns = [
     path("nisab/", NisabView.as_view(), name="nisab_rates"),
+    path("nisab/history/", NisabHistoryView.as_view(), name="nisab_history"),
+    path("nisab/as-of/", NisabAsOfView.as_view(), name="nisab_as_of"),
     path("references/", ZakahReferenceView.as_view(), name="zakah_references"),
     path("cards/", IslamicDashboardCardsView.as_view(), name="islamic_cards"),
+    path("hijri/", HijriConvertView.as_view(), name="hijri_convert"),
+    path("hijri/month/", HijriMonthView.as_view(), name="hijri_month"),
+    path("hijri/holidays/", HijriHolidaysView.as_view(), name="hijri_holidays"),
+    path("calculate/", ZakahCalculatorView.as_view(), name="zakah_calculate"),
+    path("calculate/livestock-crops/", LivestockCropZakahView.as_view(), name="zakah_livestock_crops"),
 ]
@@ -2,86 +2,261 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from .models import ZakahNisab, ZakahReference, DashboardIslamicCard
-from .services import fetch_and_update_nisab, scrape_and_update_islamic_cards
+from .models import ZakahNisab, ZakahReference, DashboardIslamicCard, NisabPriceBucket
+from . import calculator, hijri, schedules
+from .services import nisab_as_of, nisab_is_stale, request_nisab_refresh, scrape_and_update_islamic_cards
+from django.conf import settings
+from django.db.models import Count, Max
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import hashlib
 
 
 from rest_framework import permissions
 
+
+def _validators(last_modified, *parts):
+    """Strong ETag from the newest `last_updated` plus anything else that shapes the body."""
+    key = "|".join([last_modified.isoformat(), *map(str, parts)])
+    return '"%s"' % hashlib.sha1(key.encode()).hexdigest()[:32]
+
+
+def _conditional(request, last_modified, etag, build):
+    """
+    Answers 304 when the client's If-None-Match / If-Modified-Since still
+    match, without calling `build`; otherwise returns `build()`. Both carry
+    the validators and a Cache-Control that lets clients serve stale
+    copies while they revalidate.
+    """
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp())
+    )
+    if response is None:
+        response = build()
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=getattr(settings, "ZAKAH_CACHE_MAX_AGE", 300),
+        stale_while_revalidate=getattr(settings, "ZAKAH_CACHE_STALE_WHILE_REVALIDATE", 3600),
+    )
+    return response
+
+# The per-currency Nisab table of the stored row as (pk, last_updated, table),
+# where table is {"rates": ..., "nisab": ...}. Reloaded only when the row
+# changes; the tuple is built first and swapped in with one assignment, so
+# concurrent requests never see a half-built table.
+_currency_table = (None, None, None)
+
+
+def _nisab_for_currency(nisab):
+    global _currency_table
+    pk, last_updated, table = _currency_table
+    if (pk, last_updated) != (nisab.pk, nisab.last_updated):
+        row = ZakahNisab.objects.filter(pk=nisab.pk).values("fx_rates", "nisab_by_currency").first() or {}
+        # JSON keeps the amounts as strings; convert once per refresh so
+        # responses carry Decimals like the NGN fields do
+        table = {
+            "rates": {code: Decimal(rate) for code, rate in (row.get("fx_rates") or {}).items()},
+            "nisab": {
+                code: {metal: Decimal(amount) for metal, amount in values.items()}
+                for code, values in (row.get("nisab_by_currency") or {}).items()
+            },
+        }
+        _currency_table = (nisab.pk, nisab.last_updated, table)
+    return table
+
+
 class NisabView(APIView):
+    """
+    Current Nisab, in NGN by default. `?currency=GBP` (any code in the last
+    FX table) answers from the values precomputed at refresh.
+    """
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
-        nisab = ZakahNisab.objects.first()
-
-        should_refresh = False
-        if not nisab:
-            should_refresh = True
-        elif timezone.now() - nisab.last_updated > timedelta(hours=12):
-            should_refresh = True
-
-        if request.query_params.get("refresh") == "true":
-            should_refresh = True
+        currency = request.query_params.get("currency", "NGN").upper()
+        nisab = ZakahNisab.objects.defer("fx_rates", "nisab_by_currency").first()
 
-        if should_refresh:
-            try:
-                nisab = fetch_and_update_nisab()
-            except Exception as e:
-                nisab = None
+        # Always answer from the stored row; a stale or missing row (or a
+        # staff-only ?refresh=true) queues a single background refresh.
+        stale = nisab_is_stale(nisab)
+        forced = request.query_params.get("refresh") == "true" and request.user.is_staff
+        if stale or forced:
+            request_nisab_refresh()
 
         if not nisab:
             # If still no nisab, return a 200 with empty/zero values instead of 503
             # to prevent frontend "Request failed" crash
             return Response({
-                "currency": "NGN",
+                "currency": currency,
                 "gold_price_usd_oz": 0,
                 "silver_price_usd_oz": 0,
                 "usd_ngn_rate": 0,
+                "usd_rate": 0,
                 "nisab_gold": 0,
                 "nisab_silver": 0,
                 "last_updated": timezone.now(),
-                "warning": "Rates currently unavailable"
+                "warning": "Rates currently unavailable",
             }, status=status.HTTP_200_OK)
 
-        data = {
+        if currency == "NGN":
+            def build():
+                return Response({
+                    "currency": "NGN",
+                    "gold_price_usd_oz": nisab.gold_price_usd,
+                    "silver_price_usd_oz": nisab.silver_price_usd,
+                    "usd_ngn_rate": nisab.usd_ngn_rate,
+                    "usd_rate": nisab.usd_ngn_rate,
+                    "nisab_gold": nisab.nisab_gold_ngn,
+                    "nisab_silver": nisab.nisab_silver_ngn,
+                    "last_updated": nisab.last_updated,
+                    "fallback_sources": nisab.fallback_sources,
+                    "stale": stale,
+                }, status=status.HTTP_200_OK)
+        else:
+            table = _nisab_for_currency(nisab)
+            values = table["nisab"].get(currency)
+            if values is None:
+                return Response(
+                    {"detail": f"Unsupported currency {currency}."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            def build():
+                return Response({
+                    "currency": currency,
+                    "gold_price_usd_oz": nisab.gold_price_usd,
+                    "silver_price_usd_oz": nisab.silver_price_usd,
+                    "usd_ngn_rate": nisab.usd_ngn_rate,
+                    "usd_rate": table["rates"][currency],
+                    "nisab_gold": values["gold"],
+                    "nisab_silver": values["silver"],
+                    "last_updated": nisab.last_updated,
+                    "fallback_sources": nisab.fallback_sources,
+                    "stale": stale,
+                }, status=status.HTTP_200_OK)
+
+        etag = _validators(nisab.last_updated, "nisab", currency, stale)
+        return _conditional(request, nisab.last_updated, etag, build)
+
+
+class NisabHistoryView(APIView):
+    """
+    Price and Nisab history from the precomputed buckets:
+    `?resolution=daily|weekly|monthly&start=YYYY-MM-DD&end=YYYY-MM-DD`
+    (default: daily for the last 90 days).
+    """
+    permission_classes = [permissions.AllowAny]
+    MAX_POINTS = 1000
+
+    def get(self, request):
+        resolution = request.query_params.get("resolution", NisabPriceBucket.DAILY)
+        if resolution not in dict(NisabPriceBucket.RESOLUTIONS):
+            return Response(
+                {"detail": "resolution must be daily, weekly or monthly."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            end = date.fromisoformat(request.query_params.get("end") or timezone.localdate().isoformat())
+            start = date.fromisoformat(request.query_params.get("start") or (end - timedelta(days=90)).isoformat())
+        except ValueError:
+            return Response(
+                {"detail": "Dates must be in YYYY-MM-DD format."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        buckets = NisabPriceBucket.objects.filter(
+            resolution=resolution,
+            period_start__gte=NisabPriceBucket.period_start_for(resolution, start),
+            period_start__lte=end,
+        ).order_by("period_start")[:self.MAX_POINTS]
+        points = [
+            {
+                "period_start": bucket.period_start,
+                "gold_price_usd_oz": bucket.gold_price_usd,
+                "gold_high_usd_oz": bucket.gold_high_usd,
+                "gold_low_usd_oz": bucket.gold_low_usd,
+                "silver_price_usd_oz": bucket.silver_price_usd,
+                "usd_ngn_rate": bucket.usd_ngn_rate,
+                "nisab_gold": bucket.nisab_gold_ngn,
+                "nisab_silver": bucket.nisab_silver_ngn,
+                "samples": bucket.samples,
+            }
+            for bucket in buckets
+        ]
+        return Response(
+            {"currency": "NGN", "resolution": resolution, "points": points},
+            status=status.HTTP_200_OK,
+        )
+
+
+class NisabAsOfView(APIView):
+    """The Nisab in force at the end of `?date=YYYY-MM-DD`."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        try:
+            day = date.fromisoformat(request.query_params.get("date", ""))
+        except ValueError:
+            return Response(
+                {"detail": "date is required in YYYY-MM-DD format."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        moment = timezone.make_aware(datetime.combine(day, time.max))
+        point = nisab_as_of(moment)
+        if point is None:
+            return Response(
+                {"detail": "No Nisab recorded on or before this date."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response({
             "currency": "NGN",
-            "gold_price_usd_oz": nisab.gold_price_usd,
-            "silver_price_usd_oz": nisab.silver_price_usd,
-            "usd_ngn_rate": nisab.usd_ngn_rate,
-            "nisab_gold": nisab.nisab_gold_ngn,
-            "nisab_silver": nisab.nisab_silver_ngn,
-            "last_updated": nisab.last_updated,
-        }
-        return Response(data, status=status.HTTP_200_OK)
+            "date": day,
+            "recorded_at": point.recorded_at,
+            "gold_price_usd_oz": point.gold_price_usd,
+            "silver_price_usd_oz": point.silver_price_usd,
+            "usd_ngn_rate": point.usd_ngn_rate,
+            "nisab_gold": point.nisab_gold_ngn,
+            "nisab_silver": point.nisab_silver_ngn,
+        }, status=status.HTTP_200_OK)
 
 
 class ZakahReferenceView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
-        # Check if we have the essential references, otherwise trigger a refresh
+        # References are derived from the Nisab; if they are missing, queue a
+        # background refresh and serve what we have
         if not ZakahReference.objects.filter(key="hadd_theft").exists():
-            try:
-                fetch_and_update_nisab()
-            except:
-                pass
+            request_nisab_refresh()
 
         # Explicitly exclude 'crops' and ensure we only show valid references
         qs = ZakahReference.objects.exclude(key="crops").order_by("key")
-        items = []
-        for ref in qs:
-            items.append(
-                {
-                    "key": ref.key,
-                    "title": ref.title,
-                    "amount_ngn": ref.amount_ngn,
-                    "source_url": ref.source_url,
-                    "last_updated": ref.last_updated,
-                }
-            )
-        return Response({"items": items}, status=status.HTTP_200_OK)
+
+        def build():
+            items = []
+            for ref in qs:
+                items.append(
+                    {
+                        "key": ref.key,
+                        "title": ref.title,
+                        "amount_ngn": ref.amount_ngn,
+                        "source_url": ref.source_url,
+                        "last_updated": ref.last_updated,
+                    }
+                )
+            return Response({"items": items}, status=status.HTTP_200_OK)
+
+        summary = qs.aggregate(last=Max("last_updated"), count=Count("id"))
+        if summary["last"] is None:
+            return build()
+        etag = _validators(summary["last"], "references", summary["count"])
+        return _conditional(request, summary["last"], etag, build)
 
 
 class IslamicDashboardCardsView(APIView):
@@ -89,22 +264,222 @@ class IslamicDashboardCardsView(APIView):
 
     def get(self, request):
         cards = DashboardIslamicCard.objects.all().order_by("order")
-        
+        summary = cards.aggregate(last=Max("last_updated"), count=Count("id"))
+
         # Trigger refresh if no cards exist
-        if not cards.exists():
+        if not summary["count"]:
             scrape_and_update_islamic_cards()
-            cards = DashboardIslamicCard.objects.all().order_by("order")
-            
-        data = []
-        for card in cards:
-            data.append({
-                "title": card.title,
-                "arabic_title": card.arabic_title,
-                "content": card.content,
-                "arabic_content": card.arabic_content,
-                "icon_name": card.icon_name,
-                "order": card.order,
-                "last_updated": card.last_updated
-            })
-            
-        return Response({"cards": data}, status=status.HTTP_200_OK)
+            summary = cards.aggregate(last=Max("last_updated"), count=Count("id"))
+
+        def build():
+            data = []
+            for card in cards:
+                data.append({
+                    "title": card.title,
+                    "arabic_title": card.arabic_title,
+                    "content": card.content,
+                    "arabic_content": card.arabic_content,
+                    "icon_name": card.icon_name,
+                    "order": card.order,
+                    "last_updated": card.last_updated
+                })
+            return Response({"cards": data}, status=status.HTTP_200_OK)
+
+        if summary["last"] is None:
+            return build()
+        etag = _validators(summary["last"], "cards", summary["count"])
+        return _conditional(request, summary["last"], etag, build)
+
+
+def _hijri_offset(request):
+    """`?region=world` uses the tabular calendar as is; the default is Nigeria's offset."""
+    return 0 if request.query_params.get("region") == "world" else hijri.nigeria_offset()
+
+
+class HijriConvertView(APIView):
+    """Gregorian to Hijri for every day in `?start=YYYY-MM-DD&end=YYYY-MM-DD` (default: today)."""
+    permission_classes = [permissions.AllowAny]
+    MAX_DAYS = 3660
+
+    def get(self, request):
+        try:
+            start = date.fromisoformat(request.query_params.get("start") or timezone.localdate().isoformat())
+            end = date.fromisoformat(request.query_params.get("end") or start.isoformat())
+        except ValueError:
+            return Response(
+                {"detail": "Dates must be in YYYY-MM-DD format."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if start > end or (end - start).days >= self.MAX_DAYS:
+            return Response(
+                {"detail": f"start must be on or before end, at most {self.MAX_DAYS} days apart."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        days = [
+            {
+                "gregorian": gregorian,
+                "hijri": str(hijri_date),
+                "year": hijri_date.year,
+                "month": hijri_date.month,
+                "day": hijri_date.day,
+            }
+            for gregorian, hijri_date in hijri.convert_range(start, end, _hijri_offset(request))
+        ]
+        return Response({"days": days}, status=status.HTTP_200_OK)
+
+
+class HijriMonthView(APIView):
+    """Month grid for `?year=&month=` (default: the current Hijri month)."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        offset = _hijri_offset(request)
+        today = hijri.to_hijri(timezone.localdate(), offset)
+        try:
+            year = int(request.query_params.get("year", today.year))
+            month = int(request.query_params.get("month", today.month))
+            days = hijri.month_grid(year, month, offset)
+        except ValueError:
+            return Response(
+                {"detail": "year and month must form a valid Hijri month."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({
+            "year": year,
+            "month": month,
+            "month_name": hijri.MONTHS[month - 1][0],
+            "arabic_month_name": hijri.MONTHS[month - 1][1],
+            "days": days,
+        }, status=status.HTTP_200_OK)
+
+
+class HijriHolidaysView(APIView):
+    """The next `?count=` (default 5, max 30) Islamic holidays."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        try:
+            count = min(max(int(request.query_params.get("count", 5)), 1), 30)
+        except ValueError:
+            count = 5
+        holidays = hijri.upcoming_holidays(timezone.localdate(), count, _hijri_offset(request))
+        return Response({
+            "holidays": [
+                {"name": item["name"], "hijri": str(item["hijri"]), "gregorian": item["gregorian"]}
+                for item in holidays
+            ]
+        }, status=status.HTTP_200_OK)
+
+
+class ZakahCalculatorView(APIView):
+    """
+    Zakah on wealth against the current Nisab. POST one portfolio
+    (`cash`, `money_box`, `gold_grams`, `silver_grams`, `trade_goods`,
+    `debts`) or, for staff, `{"portfolios": [...], "summary_only": true}`.
+    `standard` picks the gold, silver or lower (default) Nisab.
+    """
+
+    def post(self, request):
+        nisab = ZakahNisab.objects.first()
+        if not nisab:
+            return Response(
+                {"detail": "Rates currently unavailable"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        standard = request.data.get("standard", "lower")
+        if standard not in calculator.STANDARDS:
+            return Response(
+                {"detail": "standard must be lower, gold or silver."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        batch = "portfolios" in request.data
+        if batch:
+            if not request.user.is_staff:
+                return Response(
+                    {"detail": "Batch calculations are for admins only."},
+                    status=status.HTTP_403_FORBIDDEN,
+                )
+            portfolios = request.data["portfolios"]
+            max_batch = getattr(settings, "ZAKAH_CALCULATOR_MAX_BATCH", 200000)
+            if not isinstance(portfolios, list) or not 0 < len(portfolios) <= max_batch:
+                return Response(
+                    {"detail": f"portfolios must be a list of 1 to {max_batch} items."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        else:
+            portfolio = request.data.dict() if hasattr(request.data, "dict") else dict(request.data)
+            if portfolio.get("money_box") is None:
+                portfolio["money_box"] = request.user.money_box_balance
+            portfolios = [portfolio]
+
+        try:
+            columns = calculator.to_columns(portfolios)
+        except (TypeError, ValueError, AttributeError) as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        prices = calculator.Prices(nisab)
+        net, due, liable = calculator.calculate(columns, prices, standard)
+
+        data = {
+            "currency": "NGN",
+            "standard": standard,
+            "nisab": prices.threshold(standard),
+            "nisab_last_updated": nisab.last_updated,
+        }
+        if not batch:
+            data.update(net_wealth=float(net[0]), zakah_due=float(due[0]), liable=bool(liable[0]))
+            return Response(data, status=status.HTTP_200_OK)
+
+        data["summary"] = calculator.summarize(net, due, liable)
+        if not request.data.get("summary_only"):
+            data["results"] = [
+                {"net_wealth": n, "zakah_due": d, "liable": l}
+                for n, d, l in zip(net.tolist(), due.tolist(), liable.tolist())
+            ]
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class LivestockCropZakahView(APIView):
+    """
+    Batch zakah on herds and harvests:
+    `{"herds": [{"animal": "camels|cattle|sheep_goats", "count": 130}],
+      "harvests": [{"kg": 1200, "irrigation": "rain|irrigated|mixed"}]}`.
+    Results come back in request order.
+    """
+
+    def post(self, request):
+        herds = request.data.get("herds") or []
+        harvests = request.data.get("harvests") or []
+        max_batch = getattr(settings, "ZAKAH_CALCULATOR_MAX_BATCH", 200000)
+        if not isinstance(herds, list) or not isinstance(harvests, list) or len(herds) + len(harvests) > max_batch:
+            return Response(
+                {"detail": f"herds and harvests must be lists with at most {max_batch} items in total."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            herd_results = [
+                {
+                    "animal": herd["animal"],
+                    "count": herd["count"],
+                    "due": schedules.livestock_due(herd["animal"], herd["count"]),
+                }
+                for herd in herds
+            ]
+            harvest_results = [
+                {
+                    "kg": harvest["kg"],
+                    "irrigation": harvest.get("irrigation", "rain"),
+                    "due_kg": schedules.crop_due(harvest["kg"], harvest.get("irrigation", "rain")),
+                }
+                for harvest in harvests
+            ]
+        except (KeyError, TypeError, ValueError) as exc:
+            return Response(
+                {"detail": f"Invalid herd or harvest: {exc}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({
+            "crop_nisab_kg": schedules.crop_nisab_kg(),
+            "herds": herd_results,
+            "harvests": harvest_results,
+        }, status=status.HTTP_200_OK)
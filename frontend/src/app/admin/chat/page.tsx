@@ -1,8 +1,9 @@
 "use client";
 
-import { useEffect, useState } from "react";
+import { useEffect, useState, FormEvent } from "react";
 import Link from "next/link";
 import { apiGet, apiPost } from "@/lib/api";
+import { fetchAdminUsers, fetchMoreAdminUsers } from "@/lib/adminUsers";
 
 interface UserSummary {
   id: number;
@@ -41,6 +42,9 @@ export default function AdminChatPage() {
   const [users, setUsers] = useState<UserSummary[]>([]);
   const [loadingUsers, setLoadingUsers] = useState(true);
   const [userError, setUserError] = useState("");
+  const [userSearch, setUserSearch] = useState("");
+  const [nextUsersPage, setNextUsersPage] = useState<string | null>(null);
+  const [loadingMoreUsers, setLoadingMoreUsers] = useState(false);
 
   const [selectedUserId, setSelectedUserId] = useState<number | null>(null);
   const [selectedRecipientIds, setSelectedRecipientIds] = useState<number[]>([]);
@@ -54,15 +58,16 @@ export default function AdminChatPage() {
   useEffect(() => {
     const load = async () => {
       try {
-        const [profile, usersList] = await Promise.all([
+        const [profile, page] = await Promise.all([
           apiGet("/auth/me/", true),
-          apiGet("/auth/admin/users/", true),
+          fetchAdminUsers<UserSummary>(),
         ]);
         setMe(profile);
-        setUsers(usersList);
-        if (usersList.length > 0) {
-          setSelectedUserId(usersList[0].id);
-          setSelectedRecipientIds([usersList[0].id]);
+        setUsers(page.results);
+        setNextUsersPage(page.next);
+        if (page.results.length > 0) {
+          setSelectedUserId(page.results[0].id);
+          setSelectedRecipientIds([page.results[0].id]);
         }
       } catch {
         setUserError("Could not load admin chat data. Ensure you are signed in as admin.");
@@ -73,6 +78,31 @@ export default function AdminChatPage() {
     load();
   }, []);
 
+  async function searchUsers(e: FormEvent) {
+    e.preventDefault();
+    try {
+      setUserError("");
+      const page = await fetchAdminUsers<UserSummary>({ search: userSearch });
+      setUsers(page.results);
+      setNextUsersPage(page.next);
+    } catch {
+      setUserError("Could not search users.");
+    }
+  }
+
+  async function loadMoreUsers() {
+    if (!nextUsersPage) return;
+    setLoadingMoreUsers(true);
+    try {
+      const page = await fetchMoreAdminUsers<UserSummary>(nextUsersPage);
+      setUsers((prev) => [...prev, ...page.results]);
+      setNextUsersPage(page.next);
+    } catch {
+    } finally {
+      setLoadingMoreUsers(false);
+    }
+  }
+
   useEffect(() => {
     const loadMessages = async () => {
       if (!selectedUserId) {
@@ -204,6 +234,15 @@ export default function AdminChatPage() {
                 Users
               </p>
             </div>
+            <form onSubmit={searchUsers} className="mb-2">
+              <input
+                type="text"
+                value={userSearch}
+                onChange={(e) => setUserSearch(e.target.value)}
+                placeholder="Search by username, name, email or reg no..."
+                className="w-full rounded-full border border-slate-800 bg-slate-900/60 px-3 py-1.5 text-xs text-slate-100 placeholder:text-slate-500 focus:border-emerald-500 focus:outline-none"
+              />
+            </form>
             {loadingUsers ? (
               <p className="text-sm text-slate-300">
                 Loading users...
@@ -211,7 +250,9 @@ export default function AdminChatPage() {
             ) : userError ? (
               <p className="text-sm text-rose-400">{userError}</p>
             ) : users.length === 0 ? (
-              <p className="text-sm text-slate-300">No users yet.</p>
+              <p className="text-sm text-slate-300">
+                {userSearch.trim() ? "No users match this search." : "No users yet."}
+              </p>
             ) : (
               <>
                 <p className="mb-1 text-xs text-slate-500">
@@ -265,6 +306,16 @@ export default function AdminChatPage() {
                       </button>
                     );
                   })}
+                  {nextUsersPage && (
+                    <button
+                      type="button"
+                      disabled={loadingMoreUsers}
+                      onClick={loadMoreUsers}
+                      className="w-full rounded-full border border-slate-700 px-3 py-1.5 text-xs text-slate-200 active:scale-[0.97] disabled:opacity-60"
+                    >
+                      {loadingMoreUsers ? "Loading..." : "Load more users"}
+                    </button>
+                  )}
                 </div>
               </>
             )}
@@ -3,6 +3,7 @@
 import { useEffect, useState, FormEvent } from "react";
 import Link from "next/link";
 import { apiGet, apiPost, apiGetBlob } from "@/lib/api";
+import { fetchAdminUsers, fetchMoreAdminUsers } from "@/lib/adminUsers";
 
 interface UserSummary {
   id: number;
@@ -30,6 +31,8 @@ export default function AdminDashboardPage() {
   const [users, setUsers] = useState<UserSummary[]>(null as any);
   const [loadingUsers, setLoadingUsers] = useState(true);
   const [userError, setUserError] = useState("");
+  const [nextUsersPage, setNextUsersPage] = useState<string | null>(null);
+  const [loadingMoreUsers, setLoadingMoreUsers] = useState(false);
 
   const [promotingId, setPromotingId] = useState<number | null>(null);
   const [approvingId, setApprovingId] = useState<number | null>(null);
@@ -49,6 +52,12 @@ export default function AdminDashboardPage() {
   const [roleFilter, setRoleFilter] = useState<
     "ALL" | "ADMINS" | "NON_ADMINS"
   >("ALL");
+  const [ordering, setOrdering] = useState<"id" | "-id" | "username">("id");
+  const [region, setRegion] = useState<{
+    state?: string;
+    local_govt?: string;
+    ward?: string;
+  }>({});
   const [creatingUser, setCreatingUser] = useState(false);
   const [newUsername, setNewUsername] = useState("");
   const [newPassword, setNewPassword] = useState("");
@@ -66,18 +75,45 @@ export default function AdminDashboardPage() {
       try {
         const profile = await apiGet("/auth/me/", true);
         setMe(profile);
-
-        const usersList = await apiGet("/auth/admin/users/", true);
-        setUsers(usersList);
       } catch {
         setUserError("Could not load admin data. Ensure you are signed in as admin.");
-      } finally {
-        setLoadingUsers(false);
       }
     };
     load();
   }, []);
 
+  // Search, filters and ordering run on the server; refetch the first page
+  // whenever they change (typing is debounced)
+  useEffect(() => {
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const page = await fetchAdminUsers<UserSummary>({
+          search,
+          ordering,
+          ...region,
+          approved:
+            statusFilter === "ALL" ? undefined : statusFilter === "APPROVED",
+          admins: roleFilter === "ALL" ? undefined : roleFilter === "ADMINS",
+        });
+        if (cancelled) return;
+        setUsers(page.results);
+        setNextUsersPage(page.next);
+        setUserError("");
+      } catch {
+        if (!cancelled) {
+          setUserError("Could not load admin data. Ensure you are signed in as admin.");
+        }
+      } finally {
+        if (!cancelled) setLoadingUsers(false);
+      }
+    }, search ? 300 : 0);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [search, ordering, region, statusFilter, roleFilter]);
+
   useEffect(() => {
     const loadStats = async () => {
       if (!me) return;
@@ -131,6 +167,19 @@ export default function AdminDashboardPage() {
     }
   }
 
+  async function loadMoreUsers() {
+    if (!nextUsersPage) return;
+    setLoadingMoreUsers(true);
+    try {
+      const page = await fetchMoreAdminUsers<UserSummary>(nextUsersPage);
+      setUsers((prev) => [...(prev ?? []), ...page.results]);
+      setNextUsersPage(page.next);
+    } catch {
+    } finally {
+      setLoadingMoreUsers(false);
+    }
+  }
+
   async function downloadCsv() {
     if (!me) return;
     setDownloadingCsv(true);
@@ -221,13 +270,12 @@ export default function AdminDashboardPage() {
       ? "Ward admin"
       : "Not an admin";
 
-  const totalUsers = users ? users.length : 0;
-  const pendingUsers = users
-    ? users.filter((u) => !u.is_approved_by_admin).length
-    : 0;
-  const adminUsers = users
-    ? users.filter((u) => u.admin_level !== "NONE").length
-    : 0;
+  const loadedUsers = users ? users.length : 0;
+  const filtersActive =
+    !!search.trim() ||
+    statusFilter !== "ALL" ||
+    roleFilter !== "ALL" ||
+    !!region.state;
 
   const hasStatsValues =
     !!stats &&
@@ -239,43 +287,6 @@ export default function AdminDashboardPage() {
     (me.admin_level === "STATE" || me.admin_level === "NATIONAL") &&
     hasStatsValues;
 
-  const filteredUsers =
-    users?.filter((u) => {
-      if (statusFilter === "APPROVED" && !u.is_approved_by_admin) {
-        return false;
-      }
-      if (statusFilter === "PENDING" && u.is_approved_by_admin) {
-        return false;
-      }
-      if (roleFilter === "ADMINS" && u.admin_level === "NONE") {
-        return false;
-      }
-      if (roleFilter === "NON_ADMINS" && u.admin_level !== "NONE") {
-        return false;
-      }
-      if (search.trim()) {
-        const term = search.trim().toLowerCase();
-        const haystack = [
-          u.username,
-          u.first_name,
-          u.last_name,
-          u.email,
-          u.registration_number,
-          u.country,
-          u.state,
-          u.local_govt,
-          u.ward,
-        ]
-          .filter(Boolean)
-          .join(" ")
-          .toLowerCase();
-        if (!haystack.includes(term)) {
-          return false;
-        }
-      }
-      return true;
-    }) ?? [];
-
   return (
     <div className="min-h-screen flex flex-col bg-slate-950 text-slate-50 px-0 pb-0 pt-0 md:px-4 md:pb-6 md:pt-4">
       <header className="mb-0 flex items-center justify-between border-b border-slate-900 px-4 py-3 md:mb-4 md:border-none md:px-0 md:py-0">
@@ -574,14 +585,14 @@ export default function AdminDashboardPage() {
               )}
             </div>
           </form>
-          {me?.admin_level === "NATIONAL" && users && users.length > 0 && (
+          {me?.admin_level === "NATIONAL" && users && (
             <div className="mb-3 space-y-2 md:flex md:items-center md:justify-between md:space-y-0">
               <div className="flex-1 md:max-w-xs">
                 <input
                   type="text"
                   value={search}
                   onChange={(e) => setSearch(e.target.value)}
-                  placeholder="Search by name, email, location or reg no..."
+                  placeholder="Search by username, name, email or reg no..."
                   className="w-full rounded-full border border-slate-800 bg-slate-900/60 px-3 py-1.5 text-xs text-slate-100 placeholder:text-slate-500 focus:border-emerald-500 focus:outline-none"
                 />
               </div>
@@ -664,10 +675,59 @@ export default function AdminDashboardPage() {
                     Non-admins
                   </button>
                 </div>
+                <div className="flex items-center gap-1">
+                  <span className="text-slate-500">Sort</span>
+                  <button
+                    type="button"
+                    onClick={() => setOrdering("id")}
+                    className={
+                      "rounded-full border px-2 py-0.5 " +
+                      (ordering === "id"
+                        ? "border-emerald-500 bg-emerald-500/10 text-emerald-200"
+                        : "border-slate-700 text-slate-200")
+                    }
+                  >
+                    Oldest
+                  </button>
+                  <button
+                    type="button"
+                    onClick={() => setOrdering("-id")}
+                    className={
+                      "rounded-full border px-2 py-0.5 " +
+                      (ordering === "-id"
+                        ? "border-emerald-500 bg-emerald-500/10 text-emerald-200"
+                        : "border-slate-700 text-slate-200")
+                    }
+                  >
+                    Newest
+                  </button>
+                  <button
+                    type="button"
+                    onClick={() => setOrdering("username")}
+                    className={
+                      "rounded-full border px-2 py-0.5 " +
+                      (ordering === "username"
+                        ? "border-emerald-500 bg-emerald-500/10 text-emerald-200"
+                        : "border-slate-700 text-slate-200")
+                    }
+                  >
+                    Username
+                  </button>
+                </div>
+                {region.state && (
+                  <button
+                    type="button"
+                    onClick={() => setRegion({})}
+                    className="rounded-full border border-emerald-500 bg-emerald-500/10 px-2 py-0.5 text-emerald-200"
+                  >
+                    {region.ward || region.local_govt || region.state} ×
+                  </button>
+                )}
                 <div className="flex items-center gap-2 text-[10px] text-slate-500">
-                  <span>Total: {totalUsers}</span>
-                  <span>Pending: {pendingUsers}</span>
-                  <span>Admins: {adminUsers}</span>
+                  <span>
+                    Showing: {loadedUsers}
+                    {nextUsersPage ? "+" : ""}
+                  </span>
                 </div>
               </div>
             </div>
@@ -679,17 +739,14 @@ export default function AdminDashboardPage() {
           ) : (
             <div className="space-y-2 max-h-64 overflow-auto text-xs">
               {users && users.length === 0 ? (
-                <p className="text-slate-400">No users yet.</p>
+                <p className="text-slate-400">
+                  {filtersActive
+                    ? "No users match the current search or filters."
+                    : "No users yet."}
+                </p>
               ) : (
                 <>
-                  {users &&
-                    users.length > 0 &&
-                    filteredUsers.length === 0 && (
-                      <p className="text-slate-400">
-                        No users match the current search or filters.
-                      </p>
-                    )}
-                  {filteredUsers.map((user) => (
+                  {(users ?? []).map((user) => (
                   <div
                     key={user.id}
                     className="rounded-xl border border-slate-800 bg-slate-950 px-3 py-2 flex items-start justify-between gap-3"
@@ -704,7 +761,7 @@ export default function AdminDashboardPage() {
                           type="button"
                           className="underline-offset-2 hover:underline"
                           onClick={() =>
-                            setSearch(user.state ? user.state : "")
+                            setRegion(user.state ? { state: user.state } : {})
                           }
                         >
                           {user.state || "No state"}
@@ -714,8 +771,10 @@ export default function AdminDashboardPage() {
                           type="button"
                           className="underline-offset-2 hover:underline"
                           onClick={() =>
-                            setSearch(
-                              user.local_govt ? user.local_govt : ""
+                            setRegion(
+                              user.local_govt
+                                ? { state: user.state, local_govt: user.local_govt }
+                                : {}
                             )
                           }
                         >
@@ -726,7 +785,15 @@ export default function AdminDashboardPage() {
                           type="button"
                           className="underline-offset-2 hover:underline"
                           onClick={() =>
-                            setSearch(user.ward ? user.ward : "")
+                            setRegion(
+                              user.ward
+                                ? {
+                                    state: user.state,
+                                    local_govt: user.local_govt,
+                                    ward: user.ward,
+                                  }
+                                : {}
+                            )
                           }
                         >
                           {user.ward || "No ward"}
@@ -862,6 +929,16 @@ export default function AdminDashboardPage() {
                     </div>
                   </div>
                 ))}
+                  {nextUsersPage && (
+                    <button
+                      type="button"
+                      disabled={loadingMoreUsers}
+                      onClick={loadMoreUsers}
+                      className="w-full rounded-full border border-slate-700 px-3 py-1.5 text-[10px] text-slate-200 active:scale-[0.97] disabled:opacity-60"
+                    >
+                      {loadingMoreUsers ? "Loading..." : "Load more users"}
+                    </button>
+                  )}
                 </>
               )}
             </div>
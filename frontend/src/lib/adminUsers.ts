@@ -0,0 +1,45 @@
+import { apiGet } from "@/lib/api";
+
+const ADMIN_USERS_PATH = "/auth/admin/users/";
+
+export interface AdminUsersPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+export interface AdminUsersQuery {
+  search?: string;
+  ordering?: "id" | "-id" | "username" | "-username";
+  state?: string;
+  local_govt?: string;
+  ward?: string;
+  approved?: boolean;
+  admins?: boolean;
+  pageSize?: number;
+}
+
+// First page of the admin user directory. Search, ordering and filters run
+// on the server, so only one page is downloaded.
+export async function fetchAdminUsers<T>(
+  query: AdminUsersQuery = {}
+): Promise<AdminUsersPage<T>> {
+  const { pageSize = 50, approved, admins, ...rest } = query;
+  const params = new URLSearchParams({ page_size: String(pageSize) });
+  for (const [key, value] of Object.entries(rest)) {
+    const text = (value ?? "").trim();
+    if (text) params.set(key, text);
+  }
+  if (approved !== undefined) params.set("approved", String(approved));
+  if (admins !== undefined) params.set("admins", String(admins));
+  return apiGet(`${ADMIN_USERS_PATH}?${params}`, true);
+}
+
+// The page after `next`. The cursor link already carries the search,
+// ordering, filters and page size of the first request.
+export async function fetchMoreAdminUsers<T>(
+  next: string
+): Promise<AdminUsersPage<T>> {
+  // `next` is an absolute URL; keep only its query
+  return apiGet(`${ADMIN_USERS_PATH}${new URL(next).search}`, true);
+}